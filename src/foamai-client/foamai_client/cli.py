@@ -34,6 +34,17 @@ def cli():
 )
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
 @click.option("--max-retries", default=3, help="Maximum retry attempts")
+@click.option(
+    "--parallel",
+    is_flag=True,
+    help="Run the solver in parallel with MPI (decomposePar, mpirun, reconstructPar)",
+)
+@click.option(
+    "--processes",
+    type=int,
+    default=None,
+    help="Maximum MPI processes for a parallel run (default: all available cores)",
+)
 def solve(
     prompt: str,
     output_format: str,
@@ -41,6 +52,8 @@ def solve(
     no_user_approval: bool,
     verbose: bool,
     max_retries: int,
+    parallel: bool,
+    processes: int,
 ):
     """Solve a CFD problem from natural language description."""
 
@@ -54,6 +67,7 @@ def solve(
     # Display initial problem setup
     export_images = not no_export_images  # Convert negative flag to positive
     user_approval_enabled = not no_user_approval  # Convert negative flag to positive
+    parallel = parallel or (processes or 0) > 1  # Asking for several processes implies MPI
     console.print(
         Panel(
             f"[bold blue]FoamAI CFD Solver[/bold blue]\n\n"
@@ -62,7 +76,8 @@ def solve(
             f"[green]Export Images:[/green] {export_images}\n"
             f"[green]User Approval:[/green] {user_approval_enabled}\n"
             f"[green]Verbose:[/green] {verbose}\n"
-            f"[green]Max Retries:[/green] {max_retries}",
+            f"[green]Max Retries:[/green] {max_retries}\n"
+            f"[green]Parallel:[/green] {parallel}{f' ({processes} processes)' if parallel and processes else ''}",
             title="CFD Problem Setup",
             border_style="blue",
         )
@@ -77,6 +92,8 @@ def solve(
             output_format=output_format,
             max_retries=max_retries,
             user_approval_enabled=user_approval_enabled,
+            parallel_execution=parallel,
+            parallel_settings={"max_processes": processes} if processes else None,
         )
 
         # Create workflow
@@ -10,6 +10,7 @@ from loguru import logger
 
 from .state import CFDState, CFDStep
 from .remote_executor import RemoteExecutor, LocalToRemoteAdapter
+from .stl_io import rotation_matrix, stl_center, transform_stl
 
 
 def case_writer_agent(state: CFDState) -> CFDState:
@@ -88,7 +89,8 @@ def case_writer_remote(state: CFDState) -> CFDState:
                 upload_results = upload_case_files_to_server(remote, case_directory, state)
                 
                 if state["verbose"]:
-                    logger.info(f"Case Writer: Uploaded {upload_results['uploaded_count']} files to remote server")
+                    logger.info(f"Case Writer: Uploaded {upload_results['uploaded_count']} files to remote server "
+                                f"({upload_results['hit_count']} unchanged files skipped)")
                     if upload_results['failed_count'] > 0:
                         logger.warning(f"Case Writer: {upload_results['failed_count']} files failed to upload")
                 
@@ -162,6 +164,11 @@ def upload_case_files_to_server(remote: RemoteExecutor, case_directory: Path, st
     """
     Upload all generated case files to the remote server.
     
+    The local case is compared with the server's upload manifest and only
+    files whose hash changed are sent, as a single archive. Files left over
+    from a previous iteration are deleted. Servers without the sync endpoints
+    fall back to uploading the files one by one.
+    
     Args:
         remote: RemoteExecutor instance
         case_directory: Local case directory with generated files
@@ -174,7 +181,10 @@ def upload_case_files_to_server(remote: RemoteExecutor, case_directory: Path, st
         "uploaded_count": 0,
         "failed_count": 0,
         "uploaded_files": [],
-        "failed_files": []
+        "failed_files": [],
+        "hit_count": 0,
+        "miss_count": 0,
+        "deleted_count": 0
     }
     
     try:
@@ -189,6 +199,23 @@ def upload_case_files_to_server(remote: RemoteExecutor, case_directory: Path, st
         if state["verbose"]:
             logger.info(f"Uploading {len(all_files)} files to remote server...")
         
+        # Send only what changed since the last iteration, in one round trip
+        try:
+            result = remote.sync_directory(case_directory)
+            upload_results["uploaded_count"] = result["miss_count"]
+            upload_results["uploaded_files"] = result["uploaded_files"]
+            upload_results["hit_count"] = result["hit_count"]
+            upload_results["miss_count"] = result["miss_count"]
+            upload_results["deleted_count"] = len(result["deleted_files"])
+            
+            if state["verbose"]:
+                logger.info(f"Upload complete: {result['miss_count']} changed files uploaded, "
+                            f"{result['hit_count']} unchanged, {upload_results['deleted_count']} stale files deleted")
+            return upload_results
+            
+        except Exception as e:
+            logger.warning(f"Delta sync failed ({str(e)}), falling back to per-file upload")
+        
         # Upload each file
         for local_path, relative_path in all_files:
             try:
@@ -197,6 +224,7 @@ def upload_case_files_to_server(remote: RemoteExecutor, case_directory: Path, st
                 
                 result = remote.upload_file(local_path, unix_relative_path)
                 upload_results["uploaded_count"] += 1
+                upload_results["miss_count"] += 1
                 upload_results["uploaded_files"].append(unix_relative_path)
                 
                 if state["verbose"]:
@@ -389,44 +417,11 @@ def copy_stl_file_to_case(case_directory: Path, mesh_config: Dict[str, Any], sta
 
 def calculate_stl_center(stl_path: Path) -> list:
     """Calculate the center of an STL file."""
-    import struct
-    import numpy as np
-    
-    vertices = []
-    
-    with open(stl_path, 'rb') as f:
-        header = f.read(80)
-        
-    if header.startswith(b'solid'):
-        # ASCII STL
-        with open(stl_path, 'r') as f:
-            for line in f:
-                if line.strip().startswith('vertex'):
-                    parts = line.split()
-                    x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                    vertices.append([x, y, z])
-    else:
-        # Binary STL  
-        with open(stl_path, 'rb') as f:
-            f.read(80)  # Skip header
-            num_triangles = struct.unpack('<I', f.read(4))[0]
-            
-            for _ in range(num_triangles):
-                data = struct.unpack('<12fH', f.read(50))
-                # Extract vertices (skip normal)
-                vertices.extend([data[3:6], data[6:9], data[9:12]])
-    
-    vertices = np.array(vertices)
-    center = vertices.mean(axis=0).tolist()
-    return center
+    return stl_center(stl_path)
 
 
 def apply_stl_rotation(case_directory: Path, stl_path: Path, rotation_info: Dict[str, Any], state: CFDState) -> None:
     """Apply rotation to STL file by modifying vertices directly."""
-    import math
-    import struct
-    import numpy as np
-    
     angle_deg = rotation_info.get("rotation_angle", 0)
     axis = rotation_info.get("rotation_axis", "z").lower()
     center = rotation_info.get("rotation_center", None)
@@ -442,49 +437,18 @@ def apply_stl_rotation(case_directory: Path, stl_path: Path, rotation_info: Dict
     
     logger.info(f"Applying rotation: {angle_deg}° around {axis}-axis at center {center}")
     
-    # Convert angle to radians
-    angle_rad = math.radians(angle_deg)
-    cos_angle = math.cos(angle_rad)
-    sin_angle = math.sin(angle_rad)
-    
     # Create rotation matrix based on axis
-    if axis == "x":
-        rotation_matrix = np.array([
-            [1, 0, 0],
-            [0, cos_angle, -sin_angle],
-            [0, sin_angle, cos_angle]
-        ])
-    elif axis == "y":
-        rotation_matrix = np.array([
-            [cos_angle, 0, sin_angle],
-            [0, 1, 0],
-            [-sin_angle, 0, cos_angle]
-        ])
-    else:  # z axis (default)
-        rotation_matrix = np.array([
-            [cos_angle, -sin_angle, 0],
-            [sin_angle, cos_angle, 0],
-            [0, 0, 1]
-        ])
-    
-    # Read and rotate STL file
+    rotation = rotation_matrix(axis if axis in ("x", "y") else "z", angle_deg)
+    
+    # Rotate into a copy so a failure leaves the original untouched
     rotated_path = stl_path.parent / (stl_path.stem + "_rotated" + stl_path.suffix)
     
     try:
-        # Check if it's ASCII or binary STL
-        with open(stl_path, 'rb') as f:
-            header = f.read(80)
-            
-        if header.startswith(b'solid'):
-            # ASCII STL
-            rotate_ascii_stl(stl_path, rotated_path, rotation_matrix, center)
-        else:
-            # Binary STL
-            rotate_binary_stl(stl_path, rotated_path, rotation_matrix, center)
+        # Binary STLs are rotated through a memory map, ASCII STLs are rewritten
+        transform_stl(stl_path, rotated_path, rotation=rotation, center=center)
         
         # Replace original with rotated version
-        stl_path.unlink()
-        rotated_path.rename(stl_path)
+        rotated_path.replace(stl_path)
         
         if state["verbose"]:
             logger.info(f"Successfully rotated STL file: {angle_deg}° around {axis}-axis")
@@ -498,103 +462,12 @@ def apply_stl_rotation(case_directory: Path, stl_path: Path, rotation_info: Dict
 
 def rotate_ascii_stl(input_path: Path, output_path: Path, rotation_matrix, center: list) -> None:
     """Rotate an ASCII STL file."""
-    import numpy as np
-    
-    center_vec = np.array(center)
-    
-    with open(input_path, 'r') as infile, open(output_path, 'w') as outfile:
-        for line in infile:
-            line = line.strip()
-            
-            if line.startswith('vertex'):
-                # Parse vertex coordinates
-                parts = line.split()
-                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                vertex = np.array([x, y, z])
-                
-                # Translate to origin, rotate, translate back
-                vertex = vertex - center_vec
-                vertex = rotation_matrix @ vertex
-                vertex = vertex + center_vec
-                
-                # Write rotated vertex
-                outfile.write(f"      vertex {vertex[0]:.6e} {vertex[1]:.6e} {vertex[2]:.6e}\n")
-                
-            elif line.startswith('facet normal'):
-                # Parse normal vector
-                parts = line.split()
-                nx, ny, nz = float(parts[2]), float(parts[3]), float(parts[4])
-                normal = np.array([nx, ny, nz])
-                
-                # Rotate normal (no translation needed for normals)
-                normal = rotation_matrix @ normal
-                
-                # Normalize to ensure unit vector
-                normal = normal / np.linalg.norm(normal)
-                
-                # Write rotated normal
-                outfile.write(f"  facet normal {normal[0]:.6e} {normal[1]:.6e} {normal[2]:.6e}\n")
-                
-            else:
-                # Copy other lines as-is
-                outfile.write(line + '\n')
+    transform_stl(input_path, output_path, rotation=rotation_matrix, center=center)
 
 
 def rotate_binary_stl(input_path: Path, output_path: Path, rotation_matrix, center: list) -> None:
     """Rotate a binary STL file."""
-    import struct
-    import numpy as np
-    
-    center_vec = np.array(center)
-    
-    with open(input_path, 'rb') as infile:
-        # Read header
-        header = infile.read(80)
-        
-        # Read number of triangles
-        num_triangles = struct.unpack('<I', infile.read(4))[0]
-        
-        with open(output_path, 'wb') as outfile:
-            # Write header
-            outfile.write(header)
-            
-            # Write number of triangles
-            outfile.write(struct.pack('<I', num_triangles))
-            
-            # Process each triangle
-            for _ in range(num_triangles):
-                # Read normal and vertices
-                data = struct.unpack('<12fH', infile.read(50))
-                
-                # Extract normal
-                normal = np.array(data[0:3])
-                
-                # Extract vertices
-                v1 = np.array(data[3:6])
-                v2 = np.array(data[6:9])
-                v3 = np.array(data[9:12])
-                
-                # Extract attribute byte count
-                attr = data[12]
-                
-                # Rotate normal
-                normal = rotation_matrix @ normal
-                normal = normal / np.linalg.norm(normal)  # Normalize
-                
-                # Rotate vertices (translate to origin, rotate, translate back)
-                v1 = rotation_matrix @ (v1 - center_vec) + center_vec
-                v2 = rotation_matrix @ (v2 - center_vec) + center_vec
-                v3 = rotation_matrix @ (v3 - center_vec) + center_vec
-                
-                # Pack and write rotated data
-                rotated_data = struct.pack('<12fH',
-                    normal[0], normal[1], normal[2],
-                    v1[0], v1[1], v1[2],
-                    v2[0], v2[1], v2[2],
-                    v3[0], v3[1], v3[2],
-                    attr
-                )
-                outfile.write(rotated_data)
+    transform_stl(input_path, output_path, rotation=rotation_matrix, center=center)
 
 
 def validate_stl_file(stl_path: Path) -> bool:
@@ -1770,6 +1643,57 @@ echo "Case completed successfully"
     return script
 
 
+def hierarchical_split(subdomains: int, resolution: Optional[Dict[str, int]] = None) -> List[int]:
+    """
+    Split a subdomain count into (nx, ny, nz) for hierarchical decomposition.
+
+    Prime factors are handed out largest first to the direction that has the
+    most cells per subdomain so far, which keeps subdomains close to cubic.
+    """
+    cells = [1.0, 1.0, 1.0]
+    if resolution:
+        for i, key in enumerate(("x", "y", "z")):
+            cells[i] = float(resolution.get(key, 1) or 1)
+
+    factors = []
+    remaining, divisor = subdomains, 2
+    while remaining > 1:
+        while remaining % divisor == 0:
+            factors.append(divisor)
+            remaining //= divisor
+        divisor += 1
+
+    split = [1, 1, 1]
+    for factor in sorted(factors, reverse=True):
+        direction = max(range(3), key=lambda i: cells[i] / split[i])
+        split[direction] *= factor
+    return split
+
+
+def generate_decompose_par_dict(subdomains: int, method: str = "scotch",
+                                resolution: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Generate decomposeParDict for a parallel run with scotch or hierarchical decomposition."""
+    decompose_dict = {
+        "numberOfSubdomains": subdomains,
+        "method": method
+    }
+    if method == "hierarchical":
+        nx, ny, nz = hierarchical_split(subdomains, resolution)
+        decompose_dict["hierarchicalCoeffs"] = {
+            "n": f"({nx} {ny} {nz})",
+            "order": "xyz"
+        }
+    return decompose_dict
+
+
+def write_decompose_par_dict(case_directory: Path, subdomains: int, method: str = "scotch",
+                             resolution: Optional[Dict[str, int]] = None) -> Path:
+    """Write system/decomposeParDict and return its path."""
+    dict_path = case_directory / "system" / "decomposeParDict"
+    write_foam_dict(dict_path, generate_decompose_par_dict(subdomains, method, resolution))
+    return dict_path
+
+
 def write_foam_dict(file_path: Path, content: Dict[str, Any]) -> None:
     """Write OpenFOAM dictionary file."""
     with open(file_path, "w") as f:
@@ -2049,13 +1973,11 @@ def generate_background_blockmesh_dict(background_mesh: Dict[str, Any]) -> Dict[
     # Check if this is 2D or 3D
     is_2d = nz == 1
     
-    # Domain bounds - centered at origin for simplicity
-    x_min = 0
-    x_max = length
-    y_min = 0
-    y_max = height
-    z_min = 0
-    z_max = width
+    # Domain bounds - from the origin corner (placed around the STL, if any)
+    x_min, y_min, z_min = background_mesh.get("origin", [0, 0, 0])
+    x_max = x_min + length
+    y_max = y_min + height
+    z_max = z_min + width
     
     return {
         "convertToMeters": 1.0,
@@ -0,0 +1,405 @@
+"""Reading OpenFOAM fields and mesh lists into NumPy arrays.
+
+The file is memory-mapped and only scanned for the entries that are needed:
+the FoamFile header (format, arch), internalField, and the value entries of
+boundaryField. A nonuniform list in a binary file is a NumPy memmap of its
+raw data, so opening even a multi-GB field is instant. An ASCII list is cut
+out of the file in one piece, its brackets blanked out, and parsed by
+np.loadtxt's C reader. Compressed (.gz) files are read into memory first.
+
+Patches without a value entry (zeroGradient and the like) take the values of
+the cells next to them when the mesh's owner and boundary files are at hand
+(read_boundary_cells). Averages are over cells and faces, not weighted by
+volume or area, which would need the full mesh geometry.
+"""
+
+import io
+import re
+import gzip
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+# Components of the entries of each list type
+COMPONENTS = {
+    "label": 1,
+    "scalar": 1,
+    "vector": 3,
+    "sphericalTensor": 1,
+    "symmTensor": 6,
+    "tensor": 9,
+}
+
+PathLike = Union[str, Path]
+
+
+class FoamField(NamedTuple):
+    name: str
+    field_class: str  # e.g. volScalarField, volVectorField
+    internal_field: np.ndarray  # (cells,) or (cells, components); one row if uniform
+    uniform: bool
+    boundary_field: Dict[str, Dict[str, Any]]  # patch -> {"type", "value" (array or None)}
+
+
+def read_field(path: PathLike, boundary: bool = True) -> FoamField:
+    """Read an OpenFOAM field file (path, or path.gz if path does not exist).
+
+    Raises:
+        ValueError: If the file has no parseable internalField
+    """
+    path = _existing_path(path)
+    with _open_data(path) as data:
+        header, position = _parse_header(data)
+        components = COMPONENTS.get(_list_type(header.get("class", "")), 1)
+
+        start = _find_keyword(data, b"internalField", position)
+        if start < 0:
+            raise ValueError(f"No internalField in {path}")
+        internal, uniform, position = _parse_value(data, start + len(b"internalField"), header, path, components)
+
+        boundary_field = {}
+        if boundary:
+            start = _find_keyword(data, b"boundaryField", position)
+            if start >= 0:
+                boundary_field = _parse_dict_of_dicts(data, start + len(b"boundaryField"), header, path, components)
+
+    name = header.get("object", path.name[:-3] if path.suffix == ".gz" else path.name)
+    return FoamField(name, header.get("class", ""), internal, uniform, boundary_field)
+
+
+def read_list(path: PathLike, kind: str = "label") -> np.ndarray:
+    """Read a file holding one list, such as polyMesh/owner (kind is the entry type)."""
+    path = _existing_path(path)
+    with _open_data(path) as data:
+        header, position = _parse_header(data)
+        values, _ = _parse_list(data, _skip_space(data, position), header, path, COMPONENTS[kind], kind)
+    return values
+
+
+def read_boundary_cells(poly_mesh: PathLike) -> Dict[str, np.ndarray]:
+    """The cell next to every face of every patch of a polyMesh directory."""
+    poly_mesh = Path(poly_mesh)
+    boundary_path = _existing_path(poly_mesh / "boundary")
+    with _open_data(boundary_path) as data:
+        header, position = _parse_header(data)
+        # "N ( patch { ... } ... )": skip the count, then the patches are a dict of dicts
+        position = _skip_space(data, position)
+        while position < len(data) and data[position:position + 1].isdigit():
+            position += 1
+        patches = _parse_dict_of_dicts(data, position, header, boundary_path, 1, open_bracket=b"(")
+
+    owner = read_list(poly_mesh / "owner", "label")
+    cells = {}
+    for name, patch in patches.items():
+        start, count = int(patch.get("startFace", 0)), int(patch.get("nFaces", 0))
+        cells[name] = np.asarray(owner[start:start + count])
+    return cells
+
+
+def latest_time_directory(case_directory: PathLike) -> Optional[Path]:
+    """The latest time directory of a case other than 0, or None."""
+    times = []
+    for directory in Path(case_directory).iterdir():
+        try:
+            value = float(directory.name)
+        except ValueError:
+            continue
+        if directory.is_dir() and value > 0:
+            times.append((value, directory))
+    return max(times)[1] if times else None
+
+
+def field_statistics(field: FoamField, boundary_cells: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Min, max and mean of a field over the cells, and the mean on every patch.
+
+    Vector and tensor fields are reduced to their magnitude. A patch without
+    a value entry is averaged over the cells next to it if boundary_cells
+    (see read_boundary_cells) is given; otherwise, like empty patches, its
+    mean is None.
+    """
+    values = magnitude(field.internal_field)
+    statistics = {
+        "min": float(values.min()) if len(values) else None,
+        "max": float(values.max()) if len(values) else None,
+        "mean": float(values.mean()) if len(values) else None,
+        "n_cells": None if field.uniform else len(values),
+        "patches": {}
+    }
+    for name, patch in field.boundary_field.items():
+        patch_values = patch.get("value")
+        if patch_values is None and patch.get("type") != "empty" and boundary_cells and name in boundary_cells:
+            patch_values = values[0:1] if field.uniform else values[boundary_cells[name]]
+        elif patch_values is not None:
+            patch_values = magnitude(patch_values)
+        statistics["patches"][name] = (
+            float(patch_values.mean()) if patch_values is not None and len(patch_values) else None
+        )
+    return statistics
+
+
+def magnitude(values: np.ndarray) -> np.ndarray:
+    """Values of a scalar field, or the magnitudes of a vector/tensor field's entries."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.sqrt(np.einsum("ij,ij->i", values, values)) if values.ndim == 2 else values
+
+
+def _existing_path(path: PathLike) -> Path:
+    path = Path(path)
+    if not path.exists() and path.with_name(path.name + ".gz").exists():
+        return path.with_name(path.name + ".gz")
+    return path
+
+
+@contextmanager
+def _open_data(path: Path):
+    """The file's bytes: a read-only mmap, or the decompressed data of a .gz file."""
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            yield f.read()
+        return
+    with open(path, "rb") as f:
+        if path.stat().st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _skip_space(data, position: int) -> int:
+    """Skip whitespace and // or /* */ comments."""
+    end = len(data)
+    while position < end:
+        char = data[position:position + 1]
+        if char.isspace():
+            position += 1
+        elif data[position:position + 2] == b"//":
+            newline = data.find(b"\n", position)
+            position = end if newline < 0 else newline + 1
+        elif data[position:position + 2] == b"/*":
+            close = data.find(b"*/", position + 2)
+            position = end if close < 0 else close + 2
+        else:
+            break
+    return position
+
+
+def _read_token(data, position: int) -> Tuple[str, int]:
+    """A word or "quoted string" and the position after it."""
+    if data[position:position + 1] == b'"':
+        close = data.find(b'"', position + 1)
+        close = len(data) if close < 0 else close
+        return data[position + 1:close].decode("ascii", errors="replace"), close + 1
+    end = position
+    while end < len(data) and not data[end:end + 1].isspace() and data[end:end + 1] not in (b"{", b"}", b";", b"(", b")"):
+        end += 1
+    return data[position:end].decode("ascii", errors="replace"), end
+
+
+def _parse_header(data) -> Tuple[Dict[str, str], int]:
+    """The FoamFile dictionary and the position after it (0 if there is none)."""
+    start = data.find(b"FoamFile")
+    if start < 0:
+        return {}, 0
+    position = _skip_space(data, start + len(b"FoamFile"))
+    if data[position:position + 1] != b"{":
+        return {}, 0
+    header = {}
+    position = _skip_space(data, position + 1)
+    while position < len(data) and data[position:position + 1] != b"}":
+        # Tokens, not a split on ';': arch is quoted and contains ';'
+        key, position = _read_token(data, position)
+        words = []
+        position = _skip_space(data, position)
+        while position < len(data) and data[position:position + 1] not in (b";", b"}"):
+            word, end = _read_token(data, position)
+            position = end if end > position else position + 1
+            words.append(word)
+            position = _skip_space(data, position)
+        if key:
+            header[key] = " ".join(word for word in words if word)
+        if data[position:position + 1] == b";":
+            position = _skip_space(data, position + 1)
+    if position >= len(data):
+        return {}, 0
+    return header, position + 1
+
+
+def _find_keyword(data, keyword: bytes, position: int) -> int:
+    """Position of keyword as a whole word at or after position, or -1."""
+    while True:
+        position = data.find(keyword, position)
+        if position < 0:
+            return -1
+        before = data[position - 1:position] if position > 0 else b"\n"
+        after = data[position + len(keyword):position + len(keyword) + 1]
+        if before.isspace() and (after.isspace() or after in (b"{", b"")):
+            return position
+        position += len(keyword)
+
+
+def _list_type(field_class: str) -> str:
+    """The entry type of a field class (volVectorField -> vector)."""
+    for kind in ("sphericalTensor", "symmTensor", "tensor", "vector", "scalar"):
+        if kind.lower() in field_class.lower():
+            return kind
+    return "scalar"
+
+
+def _binary_dtype(header: Dict[str, str], kind: str) -> np.dtype:
+    """Dtype of the raw list data of a binary file, from the header's arch entry."""
+    arch = header.get("arch", "")
+    order = ">" if "MSB" in arch else "<"
+    match = re.search(r"label=(\d+)" if kind == "label" else r"scalar=(\d+)", arch)
+    bits = int(match.group(1)) if match else (32 if kind == "label" else 64)
+    return np.dtype(f"{order}{'i' if kind == 'label' else 'f'}{bits // 8}")
+
+
+def _parse_value(data, position: int, header: Dict[str, str], path: Path,
+                 components: int) -> Tuple[np.ndarray, bool, int]:
+    """Parse "uniform X;" or "nonuniform List<T> ...;"; returns (values, uniform, position after ';')."""
+    position = _skip_space(data, position)
+    word, position = _read_token(data, position)
+    if word == "uniform":
+        end = data.find(b";", position)
+        text = data[position:end].translate(None, b"()").split()
+        values = np.array([float(token) for token in text], dtype=np.float64)
+        return values.reshape(1, -1) if len(values) > 1 else values, True, end + 1
+    if word != "nonuniform":
+        raise ValueError(f"Unsupported field value '{word}' in {path}")
+
+    position = _skip_space(data, position)
+    list_type, position = _read_token(data, position)
+    kind = list_type[5:-1] if list_type.startswith("List<") else "scalar"
+    values, position = _parse_list(data, _skip_space(data, position), header, path,
+                                   COMPONENTS.get(kind, components), kind)
+    end = data.find(b";", position)
+    return values, False, len(data) if end < 0 else end + 1
+
+
+def _parse_list(data, position: int, header: Dict[str, str], path: Path,
+                components: int, kind: str) -> Tuple[np.ndarray, int]:
+    """Parse "N(...)" or "N{value}" at position; returns (values, position after the list)."""
+    count_end = position
+    while count_end < len(data) and data[count_end:count_end + 1].isdigit():
+        count_end += 1
+    if count_end == position:
+        raise ValueError(f"Expected a list size at byte {position} of {path}")
+    count = int(data[position:count_end])
+    shape = (count, components) if components > 1 else (count,)
+    position = _skip_space(data, count_end)
+    dtype = np.int64 if kind == "label" else np.float64
+
+    if data[position:position + 1] == b"{":
+        close = data.find(b"}", position)
+        value = [float(token) for token in data[position + 1:close].translate(None, b"()").split()]
+        return np.broadcast_to(np.array(value, dtype=dtype).reshape(-1), shape), close + 1
+    if data[position:position + 1] != b"(":
+        raise ValueError(f"Expected '(' after list size {count} in {path}")
+    start = position + 1
+
+    if header.get("format", "ascii") == "binary":
+        raw_dtype = _binary_dtype(header, kind)
+        end = start + count * components * raw_dtype.itemsize
+        if end >= len(data) or data[end:end + 1] != b")":
+            raise ValueError(f"Binary list of {count} entries does not fit in {path}")
+        if count == 0:
+            values = np.zeros(shape, dtype=raw_dtype)
+        elif isinstance(data, mmap.mmap):
+            values = np.memmap(path, dtype=raw_dtype, mode="r", offset=start, shape=shape)
+        else:
+            values = np.frombuffer(data, dtype=raw_dtype, count=count * components, offset=start).reshape(shape)
+        return values, end + 1
+
+    if count == 0:
+        close = data.find(b")", start)
+        return np.zeros(shape, dtype=dtype), close + 1
+    if components == 1:
+        end = data.find(b")", start)
+    else:
+        # The list closes at the first ')' after its entries' own closing brackets
+        closes = np.flatnonzero(np.frombuffer(data, dtype=np.uint8, offset=start) == ord(")"))
+        end = start + int(closes[count]) if len(closes) > count else -1
+    if end < 0:
+        raise ValueError(f"Unterminated list of {count} entries in {path}")
+    body = data[start:end].translate(bytes.maketrans(b"()", b"  "))
+    values = np.loadtxt(io.BytesIO(body), dtype=dtype).reshape(-1)
+    if len(values) != count * components:
+        raise ValueError(f"List in {path} has {len(values)} numbers, expected {count * components}")
+    return values.reshape(shape), end + 1
+
+
+def _skip_block(data, position: int) -> int:
+    """Position after the {...} block (or #{ ... #} verbatim code) starting at position."""
+    depth = 0
+    while position < len(data):
+        if data[position:position + 2] == b"#{":
+            close = data.find(b"#}", position + 2)
+            position = len(data) if close < 0 else close + 2
+            continue
+        char = data[position:position + 1]
+        if char == b"{":
+            depth += 1
+        elif char == b"}":
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return position
+
+
+def _parse_dict_of_dicts(data, position: int, header: Dict[str, str], path: Path,
+                         components: int, open_bracket: bytes = b"{") -> Dict[str, Dict[str, Any]]:
+    """Parse "{ name { key value; ... } ... }" (boundaryField, or a polyMesh boundary list)."""
+    position = _skip_space(data, position)
+    if data[position:position + 1] != open_bracket:
+        raise ValueError(f"Expected '{open_bracket.decode()}' at byte {position} of {path}")
+    position += 1
+    entries = {}
+    while True:
+        position = _skip_space(data, position)
+        if position >= len(data) or data[position:position + 1] in (b"}", b")"):
+            return entries
+        name, position = _read_token(data, position)
+        position = _skip_space(data, position)
+        if data[position:position + 1] != b"{":
+            # A directive or plain entry between the patches (#includeEtc ...)
+            newline = data.find(b"\n", position)
+            position = len(data) if newline < 0 else newline + 1
+            continue
+        entries[name], position = _parse_patch(data, position + 1, header, path, components)
+
+
+def _parse_patch(data, position: int, header: Dict[str, str], path: Path,
+                 components: int) -> Tuple[Dict[str, Any], int]:
+    """Parse the entries of one patch up to its closing brace; value entries become arrays."""
+    patch = {"type": None, "value": None}
+    while True:
+        position = _skip_space(data, position)
+        if position >= len(data):
+            return patch, position
+        if data[position:position + 1] == b"}":
+            return patch, position + 1
+        key, position = _read_token(data, position)
+        if not key:
+            # Stray separator
+            position += 1
+            continue
+        position = _skip_space(data, position)
+        if data[position:position + 1] in (b"{", b"#"):
+            position = _skip_block(data, position)
+            continue
+        word, _ = _read_token(data, position)
+        if word in ("uniform", "nonuniform"):
+            # Parsed also for other keys: a binary list may contain ';' bytes
+            values, _, position = _parse_value(data, position, header, path, components)
+            if key == "value":
+                patch["value"] = values
+            continue
+        end = data.find(b";", position)
+        end = len(data) if end < 0 else end
+        if key != "value":
+            patch[key] = data[position:end].decode("ascii", errors="replace").strip()
+        position = end + 1
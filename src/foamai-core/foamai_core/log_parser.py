@@ -0,0 +1,294 @@
+"""Single-pass parser for OpenFOAM utility and solver logs.
+
+blockMesh, checkMesh, snappyHexMesh and solver logs are all read by the same
+streaming parser: the log is consumed line by line (a file is never loaded as
+a whole) and every metric is filled in during that one pass.
+
+Transient solver logs can reach several GB, so the per-line cost is kept to a
+few substring checks: residual lines are split with str methods, per-step
+lines only remember the latest occurrence, and numbers are converted when a
+summary is requested. Precompiled patterns are only tried on the rare lines
+that contain their literal prefix.
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Lines are dispatched on a cheap literal check before any of these is tried
+TIME_RE = re.compile(r"^Time = ([-+\d.eE]+)")
+EXECUTION_TIME_RE = re.compile(r"^ExecutionTime = ([\d.eE+-]+) s")
+COURANT_RE = re.compile(r"^Courant Number mean: (\S+) max: (\S+)")
+MESH_CELLS_RE = re.compile(r"mesh\s*:\s*cells:\s*(\d+)", re.IGNORECASE)
+COUNT_RE = re.compile(r"(?<!internal )\bn?(cells|points|faces):\s*(\d+)", re.IGNORECASE)
+NON_ORTHOGONALITY_RE = re.compile(r"Max non-orthogonality = ([\d.eE+-]+)")
+SKEWNESS_RE = re.compile(r"Max skewness = ([\d.eE+-]+)")
+ASPECT_RATIO_RE = re.compile(r"aspect ratio = ([\d.eE+-]+)", re.IGNORECASE)
+
+# Frequent solver log lines that carry no metric, skipped after one check
+SKIP_PREFIXES = ("\n", "time step continuity errors", "PIMPLE: Iteration", "PIMPLE: iteration", "deltaT = ", "bounding ")
+
+# Read files in large blocks; lines are still handed out one at a time
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class OpenFOAMLogParser:
+    """Collects mesh, mesh quality and solver metrics from an OpenFOAM log in one pass."""
+
+    def __init__(self, max_messages: int = 10):
+        self.max_messages = max_messages
+
+        # Mesh statistics (blockMesh / checkMesh / snappyHexMesh)
+        self.counts: Dict[str, int] = {}
+        self.mesh_cells: Optional[int] = None
+        self.morph_iterations = 0
+        self.layers_added = False
+        self.mesh_ok = False
+        self.failed_checks = False
+        self.max_non_orthogonality: Optional[float] = None
+        self.max_skewness: Optional[float] = None
+        self.max_aspect_ratio: Optional[float] = None
+
+        # Solver progress
+        # Only the latest line of each per-step kind is kept; values are
+        # extracted from it when a summary is requested
+        self.time_steps = 0
+        self._time_line: Optional[str] = None
+        self._execution_time_line: Optional[str] = None
+        self._courant_line: Optional[str] = None
+        self._initial_raw: Dict[str, str] = {}
+        self._final_raw: Dict[str, str] = {}
+        self.converged = False
+        # Whether the log said either way; the latest report wins
+        self.convergence_reported = False
+        self.fatal_error = False
+        self.ended = False
+
+        self.warnings: List[str] = []
+        self.errors: List[str] = []
+
+    def feed(self, line: str):
+        """Parse one line of log output."""
+        self.feed_lines((line,))
+
+    def feed_lines(self, lines: Iterable[str]) -> "OpenFOAMLogParser":
+        """Parse an iterable of log lines (e.g. an open file)."""
+        initial_raw = self._initial_raw
+        final_raw = self._final_raw
+        for line in lines:
+            # Residual lines dominate solver logs: split them with str methods
+            # instead of a regex and keep the raw values, which are only
+            # converted to float once the summary is requested
+            if "Solving for " in line:
+                parts = line.split(", ", 3)
+                if len(parts) >= 3 and parts[1].startswith("Initial residual = "):
+                    field = parts[0].rpartition(" ")[2]
+                    initial_raw[field] = parts[1]
+                    final_raw[field] = parts[2]
+            # Other per-time-step chatter carries no metric
+            elif line and not line.startswith(SKIP_PREFIXES):
+                self._feed_other(line)
+        return self
+
+    def _feed_other(self, line: str):
+        first = line[:1]
+        if first == "T":
+            if line.startswith("Time = "):
+                self.time_steps += 1
+                self._time_line = line
+                return
+        elif first == "E":
+            if line.startswith("ExecutionTime = "):
+                self._execution_time_line = line
+                return
+            if line.startswith("End"):
+                self.ended = True
+                return
+        elif first == "C":
+            if line.startswith("Courant Number mean: "):
+                self._courant_line = line
+                return
+
+        if "s:" in line:
+            self._feed_mesh_counts(line)
+
+        if "=" in line:
+            if "Max non-orthogonality = " in line:
+                match = NON_ORTHOGONALITY_RE.search(line)
+                if match:
+                    self.max_non_orthogonality = _to_float(match.group(1))
+            elif "Max skewness = " in line:
+                match = SKEWNESS_RE.search(line)
+                if match:
+                    self.max_skewness = _to_float(match.group(1))
+            elif "aspect ratio = " in line:
+                match = ASPECT_RATIO_RE.search(line)
+                if match:
+                    self.max_aspect_ratio = _to_float(match.group(1))
+
+        if "Mesh OK" in line:
+            self.mesh_ok = True
+        elif "Failed " in line and "mesh checks" in line:
+            self.failed_checks = True
+        elif "Morph iteration " in line:
+            self.morph_iterations += 1
+        elif "Layer addition iteration" in line or "Layer mesh" in line:
+            self.layers_added = True
+        elif "converged" in line:
+            # "SIMPLE solution converged in ...", "PIMPLE: converged in ...",
+            # but also "PIMPLE: not converged within ..."
+            if "solution converged in" in line or line.startswith("PIMPLE: converged"):
+                self.converged = True
+                self.convergence_reported = True
+            elif "not converged" in line:
+                self.converged = False
+                self.convergence_reported = True
+
+        if "Warning" in line or "WARNING" in line:
+            self._add_message(self.warnings, line)
+        elif "Error" in line or "ERROR" in line:
+            if "FOAM FATAL" in line or "FOAM exiting" in line:
+                self.fatal_error = True
+            self._add_message(self.errors, line)
+        elif "FOAM exiting" in line:
+            self.fatal_error = True
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return self._match_float(TIME_RE, self._time_line)
+
+    @property
+    def execution_time(self) -> Optional[float]:
+        return self._match_float(EXECUTION_TIME_RE, self._execution_time_line)
+
+    @property
+    def courant_max(self) -> Optional[float]:
+        return self._match_float(COURANT_RE, self._courant_line, group=2)
+
+    @staticmethod
+    def _match_float(pattern: "re.Pattern", line: Optional[str], group: int = 1) -> Optional[float]:
+        match = pattern.match(line) if line else None
+        return _to_float(match.group(group)) if match else None
+
+    @property
+    def initial_residuals(self) -> Dict[str, float]:
+        return self._residual_values(self._initial_raw)
+
+    @property
+    def final_residuals(self) -> Dict[str, float]:
+        return self._residual_values(self._final_raw)
+
+    @staticmethod
+    def _residual_values(raw: Dict[str, str]) -> Dict[str, float]:
+        values = {}
+        for field, text in raw.items():
+            value = _to_float(text.rpartition("= ")[2])
+            if value is not None:
+                values[field] = value
+        return values
+
+    def _feed_mesh_counts(self, line: str):
+        if "mesh" in line or "Mesh" in line:
+            match = MESH_CELLS_RE.search(line)
+            if match:
+                # snappyHexMesh reports "<stage> mesh : cells:N faces:N points:N"
+                self.mesh_cells = int(match.group(1))
+        for match in COUNT_RE.finditer(line):
+            self.counts[match.group(1).lower()] = int(match.group(2))
+
+    def _add_message(self, messages: List[str], line: str):
+        if len(messages) < self.max_messages:
+            messages.append(line.strip())
+
+    @classmethod
+    def parse_file(cls, log_file: Union[str, Path], **kwargs) -> "OpenFOAMLogParser":
+        """Parse a log file without reading it into memory as a whole."""
+        parser = cls(**kwargs)
+        with open(log_file, "r", errors="replace", buffering=READ_BUFFER_SIZE) as f:
+            parser.feed_lines(f)
+        return parser
+
+    @classmethod
+    def parse_text(cls, text: str, **kwargs) -> "OpenFOAMLogParser":
+        """Parse log output that is already held as a string."""
+        parser = cls(**kwargs)
+        return parser.feed_lines(text.splitlines())
+
+    # Summaries in the shape the simulation executor reports
+
+    def blockmesh_info(self) -> Dict[str, Any]:
+        return {
+            "total_cells": self.counts.get("cells", 0),
+            "total_points": self.counts.get("points", 0),
+            "total_faces": self.counts.get("faces", 0),
+            "mesh_ok": self.ended and not self.fatal_error,
+            "boundary_patches": {},
+            "warnings": list(self.warnings),
+            "errors": list(self.errors)
+        }
+
+    def checkmesh_info(self) -> Dict[str, Any]:
+        mesh_ok = self.mesh_ok and not self.failed_checks
+        if self.max_aspect_ratio:
+            # Simple quality scoring based on aspect ratio
+            quality_score = max(0.0, min(1.0, 1.0 / max(1.0, self.max_aspect_ratio / 10.0)))
+        else:
+            quality_score = 1.0 if mesh_ok else 0.0
+        return {
+            "mesh_ok": mesh_ok,
+            "quality_score": quality_score,
+            "non_orthogonality": {"max": self.max_non_orthogonality or 0, "average": 0},
+            "skewness": {"max": self.max_skewness or 0, "average": 0},
+            "aspect_ratio": {"max": self.max_aspect_ratio or 0, "average": 0},
+            "warnings": list(self.warnings),
+            "errors": list(self.errors)
+        }
+
+    def snappyhexmesh_info(self) -> Dict[str, Any]:
+        return {
+            "cells_added": 0,
+            "final_cells": self.mesh_cells or self.counts.get("cells", 0),
+            "layers_added": self.layers_added,
+            "snapping_iterations": self.morph_iterations,
+            "mesh_ok": self.ended and not self.fatal_error
+        }
+
+    def solver_info(self, solver: str = "") -> Dict[str, Any]:
+        """
+        Solver summary. "iterations" is the last time value for steady
+        solvers and the number of time steps run for transient ones (which
+        the executor's throughput and scaling figures are based on).
+        """
+        final_residuals = self.final_residuals
+        last_time = self.last_time
+        execution_time = self.execution_time
+        info = {
+            "converged": self.converged,
+            "iterations": 0,
+            "final_residuals": final_residuals,
+            "initial_residuals": self.initial_residuals,
+            "execution_time": execution_time or 0,
+            "final_time": last_time or 0.0,
+            "time_steps": self.time_steps,
+            "courant_max": self.courant_max,
+            "warnings": list(self.warnings),
+            "errors": list(self.errors)
+        }
+        if (not self.convergence_reported and final_residuals
+                and (not self.fatal_error or execution_time is not None)):
+            # A run that reported residuals and finished without a fatal error,
+            # but never said whether it converged, is treated as converged, as
+            # the executor always has
+            info["converged"] = True
+        if "steady" in solver.lower() and last_time is not None:
+            info["iterations"] = int(last_time)
+        else:
+            info["iterations"] = self.time_steps
+        return info
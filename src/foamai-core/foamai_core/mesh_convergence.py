@@ -2,12 +2,17 @@
 
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 import json
 import shutil
 from loguru import logger
 
 from .state import CFDState, CFDStep, GeometryType
+from .field_io import field_statistics, latest_time_directory, read_boundary_cells, read_field
+
+# The GCI needs three levels; finer levels only run while these have not converged
+GCI_LEVELS = 3
 
 
 def mesh_convergence_agent(state: CFDState) -> CFDState:
@@ -22,30 +27,8 @@ def mesh_convergence_agent(state: CFDState) -> CFDState:
             state["mesh_convergence_levels"]
         )
         
-        # Run simulations for each mesh level
-        convergence_results = []
-        for level_idx, mesh_level in enumerate(mesh_levels):
-            logger.info(f"Mesh Convergence: Running simulation for mesh level {level_idx + 1}/{len(mesh_levels)}")
-            
-            # Create case directory for this mesh level
-            level_case_dir = create_mesh_level_case_directory(
-                state["case_directory"], 
-                level_idx, 
-                mesh_level
-            )
-            
-            # Run simulation for this mesh level
-            level_results = run_mesh_level_simulation(
-                state, 
-                mesh_level, 
-                level_case_dir,
-                level_idx
-            )
-            
-            if level_results:
-                convergence_results.append(level_results)
-            else:
-                logger.warning(f"Mesh Convergence: Failed to run simulation for mesh level {level_idx}")
+        # Run the mesh levels as concurrent jobs, stopping once converged
+        convergence_results, skipped_levels = run_mesh_levels(state, mesh_levels)
         
         # Assess convergence
         if len(convergence_results) >= 2:
@@ -122,7 +105,8 @@ def mesh_convergence_agent(state: CFDState) -> CFDState:
                 "mesh_convergence_results": {
                     "levels": convergence_results,
                     "assessment": convergence_assessment,
-                    "mesh_configs": mesh_levels
+                    "mesh_configs": mesh_levels,
+                    "skipped_levels": skipped_levels
                 },
                 "mesh_convergence_report": convergence_report,
                 "recommended_mesh_level": recommended_level,
@@ -147,6 +131,194 @@ def mesh_convergence_agent(state: CFDState) -> CFDState:
         }
 
 
+def run_mesh_levels(
+    state: CFDState,
+    mesh_levels: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Run the simulations of a mesh convergence study as concurrent jobs.
+    
+    The GCI_LEVELS coarsest levels run at the same time, splitting a core
+    budget (state["parallel_settings"]["max_processes"], or all cores) in
+    proportion to their cell counts. Results are assessed as they arrive.
+    Each finer level then gets the whole budget, but only runs while the GCI
+    of some parameter is not yet below state["mesh_convergence_threshold"];
+    once it is, the remaining (finest, most expensive) levels are skipped.
+    
+    Remote levels all run in the project's active_run on the server, so they
+    run one after another instead.
+    
+    Returns:
+        Tuple of the successful level results (coarse to fine) and the skipped level indices
+    """
+    from .simulation_executor import get_available_cores
+    
+    budget = (state.get("parallel_settings") or {}).get("max_processes") or get_available_cores()
+    if state.get("mesh_convergence_warm_start", False):
+        return run_warm_started_levels(state, mesh_levels, budget)
+    
+    concurrent = state.get("execution_mode", "local") == "local"
+    first_wave = list(range(min(GCI_LEVELS, len(mesh_levels)))) if concurrent else []
+    cores = allocate_level_cores([mesh_levels[i]["estimated_cells"] for i in first_wave], budget)
+    results = {}
+    
+    if first_wave:
+        logger.info(f"Mesh Convergence: Running levels {first_wave} concurrently on {cores} of {budget} cores")
+    with ThreadPoolExecutor(max_workers=max(1, min(len(first_wave), budget)), thread_name_prefix="mesh-level") as pool:
+        futures = {
+            pool.submit(run_mesh_level, state, mesh_levels[level_idx], level_idx, level_cores): level_idx
+            for level_idx, level_cores in zip(first_wave, cores)
+        }
+        for future in as_completed(futures):
+            record_level_result(state, results, futures[future], future.result(), len(mesh_levels))
+    
+    skipped_levels = []
+    for level_idx in range(len(first_wave), len(mesh_levels)):
+        if study_converged(state, [results[i] for i in sorted(results)]):
+            skipped_levels = list(range(level_idx, len(mesh_levels)))
+            logger.info(f"Mesh Convergence: GCI below {state['mesh_convergence_threshold']}%, "
+                        f"skipping mesh levels {skipped_levels}")
+            break
+        result = run_mesh_level(state, mesh_levels[level_idx], level_idx, budget)
+        record_level_result(state, results, level_idx, result, len(mesh_levels))
+    
+    return [results[i] for i in sorted(results)], skipped_levels
+
+
+def run_warm_started_levels(
+    state: CFDState,
+    mesh_levels: List[Dict[str, Any]],
+    budget: int
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Run the mesh levels one after another, each from the previous level's solution.
+    
+    Every level after the first maps the converged fields of the last
+    successful level onto its mesh before the solver starts (see
+    warm_start_simulation), so the levels cannot overlap and each gets the
+    whole core budget. Levels are still skipped once the study has converged.
+    
+    Returns:
+        Tuple of the successful level results (coarse to fine) and the skipped level indices
+    """
+    remote = state.get("execution_mode", "local") == "remote"
+    results = {}
+    skipped_levels = []
+    source = None
+    
+    logger.info(f"Mesh Convergence: Running levels one after another on {budget} cores, "
+                f"each starting from the previous level's solution")
+    for level_idx, mesh_level in enumerate(mesh_levels):
+        if study_converged(state, [results[i] for i in sorted(results)]):
+            skipped_levels = list(range(level_idx, len(mesh_levels)))
+            logger.info(f"Mesh Convergence: GCI below {state['mesh_convergence_threshold']}%, "
+                        f"skipping mesh levels {skipped_levels}")
+            break
+        result = run_mesh_level(state, mesh_level, level_idx, budget, source)
+        record_level_result(state, results, level_idx, result, len(mesh_levels))
+        if not result:
+            continue
+        
+        # Remote levels share active_run: keep the solution before the next level is meshed
+        if remote and level_idx < len(mesh_levels) - 1:
+            result["remote_solution_directory"] = keep_remote_solution(state, level_idx)
+            if not result["remote_solution_directory"]:
+                continue
+        source = result
+    
+    return [results[i] for i in sorted(results)], skipped_levels
+
+
+def keep_remote_solution(state: CFDState, level_idx: int) -> Optional[str]:
+    """Copy the solved level in the project's active_run aside; returns its directory or None."""
+    from .remote_executor import RemoteExecutor
+    from .simulation_executor import clone_solution_remote
+    
+    with RemoteExecutor(state.get("server_url", "http://localhost:8000"), state["project_name"]) as remote:
+        result = clone_solution_remote(remote, f"mesh_level_{level_idx}")
+    if not result["success"]:
+        logger.warning(f"Mesh Convergence: Could not keep the solution of level {level_idx} for "
+                       f"the next level, which will start from its initial fields: {result['error']}")
+        return None
+    return result["directory"]
+
+
+def run_mesh_level(
+    state: CFDState,
+    mesh_level: Dict[str, Any],
+    level_idx: int,
+    cores: int,
+    source_result: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Create the case directory of a mesh level and run its simulation."""
+    try:
+        level_case_dir = create_mesh_level_case_directory(state["case_directory"], level_idx, mesh_level)
+    except Exception as e:
+        logger.error(f"Failed to create case directory for mesh level {level_idx}: {str(e)}")
+        return None
+    return run_mesh_level_simulation(state, mesh_level, level_case_dir, level_idx, cores, source_result)
+
+
+def record_level_result(
+    state: CFDState,
+    results: Dict[int, Dict[str, Any]],
+    level_idx: int,
+    result: Optional[Dict[str, Any]],
+    num_levels: int
+) -> None:
+    """Store a finished level and log the convergence assessment so far."""
+    if not result:
+        logger.warning(f"Mesh Convergence: Failed to run simulation for mesh level {level_idx}")
+        return
+    
+    results[level_idx] = result
+    logger.info(f"Mesh Convergence: Mesh level {level_idx} finished ({len(results)}/{num_levels} levels done)")
+    if len(results) >= 2:
+        assessment = assess_mesh_convergence(
+            [results[i] for i in sorted(results)],
+            state["mesh_convergence_target_params"],
+            state["mesh_convergence_threshold"]
+        )
+        for param, param_assessment in assessment.items():
+            logger.info(f"Mesh Convergence: {param} = {param_assessment['values'][-1]:.6g}, "
+                        f"GCI {param_assessment['gci'].get('gci', 0.0):.2f}%")
+
+
+def study_converged(state: CFDState, convergence_results: List[Dict[str, Any]]) -> bool:
+    """Whether every assessed parameter has a GCI (from three levels) below the threshold."""
+    if len(convergence_results) < GCI_LEVELS:
+        return False
+    assessment = assess_mesh_convergence(
+        convergence_results,
+        state["mesh_convergence_target_params"],
+        state["mesh_convergence_threshold"]
+    )
+    gcis = [a["gci"].get("gci", 0.0) for a in assessment.values() if len(a["values"]) >= GCI_LEVELS]
+    # A GCI of 0 means it could not be computed
+    return bool(gcis) and len(gcis) == len(assessment) and all(0 < gci < state["mesh_convergence_threshold"] for gci in gcis)
+
+
+def allocate_level_cores(cells: List[int], budget: int) -> List[int]:
+    """
+    Split a core budget over concurrently running mesh levels.
+    
+    Every level gets one core, and the rest go one at a time to the level
+    with the most cells per core, so finer meshes get more MPI processes.
+    A level never gets more processes than its cells can use (see
+    MIN_CELLS_PER_PROCESS); cores a coarse level cannot use go to finer ones.
+    """
+    from .simulation_executor import MIN_CELLS_PER_PROCESS
+    
+    cores = [1] * len(cells)
+    for _ in range(budget - len(cells)):
+        usable = [i for i, count in enumerate(cells) if cores[i] < max(1, count // MIN_CELLS_PER_PROCESS)]
+        if not usable:
+            break
+        finest = max(usable, key=lambda i: cells[i] / cores[i])
+        cores[finest] += 1
+    return cores
+
+
 def generate_mesh_convergence_levels(
     base_mesh_config: Dict[str, Any], 
     geometry_info: Dict[str, Any],
@@ -259,14 +431,24 @@ def run_mesh_level_simulation(
     state: CFDState,
     mesh_level: Dict[str, Any],
     case_directory: Path,
-    level_idx: int
+    level_idx: int,
+    cores: Optional[int] = None,
+    source_result: Optional[Dict[str, Any]] = None
 ) -> Optional[Dict[str, Any]]:
-    """Run simulation for specific mesh level."""
+    """
+    Run simulation for specific mesh level, on up to cores MPI processes if given.
+    
+    With source_result (a finished coarser level), the solver starts from
+    that level's solution mapped onto this mesh.
+    """
     try:
         # Create modified state for this mesh level
         level_state = state.copy()
         level_state["mesh_config"] = mesh_level["config"]
         level_state["case_directory"] = str(case_directory)
+        if cores is not None:
+            level_state["parallel_execution"] = cores > 1
+            level_state["parallel_settings"] = {**(state.get("parallel_settings") or {}), "max_processes": cores}
         
         # Regenerate mesh with new configuration
         from .mesh_generator import mesh_generator_agent
@@ -278,7 +460,10 @@ def run_mesh_level_simulation(
         
         # Run simulation
         from .simulation_executor import simulation_executor_agent
-        level_state = simulation_executor_agent(level_state)
+        if source_result is None:
+            level_state = simulation_executor_agent(level_state)
+        else:
+            level_state = warm_start_simulation(level_state, source_result)
         
         if level_state["current_step"] == CFDStep.ERROR:
             logger.error(f"Simulation failed for level {level_idx}")
@@ -288,10 +473,12 @@ def run_mesh_level_simulation(
         simulation_results = level_state.get("simulation_results", {})
         
         # Extract key parameters for convergence assessment
+        field_stats = extract_field_statistics(case_directory)
         convergence_params = extract_convergence_parameters(
             case_directory, 
             level_state["geometry_info"],
-            level_state["mesh_convergence_target_params"]
+            level_state["mesh_convergence_target_params"],
+            field_stats
         )
         
         return {
@@ -300,8 +487,10 @@ def run_mesh_level_simulation(
             "case_directory": str(case_directory),
             "simulation_results": simulation_results,
             "convergence_parameters": convergence_params,
+            "field_statistics": field_stats,
             "mesh_quality": level_state.get("mesh_quality", {}),
-            "convergence_metrics": level_state.get("convergence_metrics", {})
+            "convergence_metrics": level_state.get("convergence_metrics", {}),
+            "warm_start": level_state.get("warm_start")
         }
         
     except Exception as e:
@@ -309,12 +498,82 @@ def run_mesh_level_simulation(
         return None
 
 
+def warm_start_simulation(level_state: CFDState, source_result: Dict[str, Any]) -> CFDState:
+    """
+    Mesh a level, map the solution of a coarser level onto it and run the solver.
+    
+    The steps of simulation_executor_agent with mapFields between checkMesh
+    and the solver, so the solver starts from the converged fields of the
+    source level instead of the uniform ones in 0/. If the mapping fails, the
+    solver starts from the initial fields as usual.
+    
+    Returns:
+        Updated level state; state["warm_start"] records the source level,
+        whether the fields were mapped and how long the mapping took
+    """
+    from .simulation_executor import (
+        simulation_executor_agent,
+        map_fields_local,
+        map_fields_remote,
+        run_solver_only_local,
+        run_solver_only_remote,
+        parse_convergence_metrics
+    )
+    from .remote_executor import RemoteExecutor
+    
+    mesh_state = simulation_executor_agent({**level_state, "config_only_mode": True})
+    if mesh_state["current_step"] == CFDStep.ERROR:
+        return mesh_state
+    
+    solver = level_state["solver_settings"]["solver"]
+    if level_state.get("execution_mode", "local") == "remote":
+        with RemoteExecutor(level_state.get("server_url", "http://localhost:8000"), level_state["project_name"]) as remote:
+            map_result = map_fields_remote(remote, source_result["remote_solution_directory"], level_state)
+            solver_results = run_solver_only_remote(remote, solver, level_state)
+    else:
+        case_directory = Path(level_state["case_directory"])
+        map_result = map_fields_local(case_directory, Path(source_result["case_directory"]), level_state)
+        solver_results = run_solver_only_local(case_directory, solver, level_state)
+    
+    if not map_result["success"]:
+        logger.warning(f"Mesh Convergence: mapFields from level {source_result['level']} failed, "
+                       f"the solver started from the initial fields: {map_result['error']}")
+    
+    if not solver_results["success"]:
+        error_msg = f"Solver execution failed: {solver_results.get('error', 'Unknown error')}"
+        logger.error(error_msg)
+        return {
+            **mesh_state,
+            "errors": mesh_state["errors"] + [error_msg],
+            "current_step": CFDStep.ERROR
+        }
+    
+    mesh_results = mesh_state["simulation_results"]
+    simulation_results = {
+        **{key: value for key, value in mesh_results.items() if key not in ("config_only", "solver_ready")},
+        "steps": {**mesh_results["steps"], "mapFields": map_result, **solver_results["steps"]},
+        "performance": solver_results.get("performance"),
+        "total_time": mesh_results.get("total_time", 0) + map_result.get("execution_time", 0) + solver_results["total_time"]
+    }
+    return {
+        **mesh_state,
+        "simulation_results": simulation_results,
+        "convergence_metrics": parse_convergence_metrics(simulation_results),
+        "warm_start": {
+            "source_level": source_result["level"],
+            "mapped": map_result["success"],
+            "map_time": map_result.get("execution_time", 0)
+        }
+    }
+
+
 def extract_convergence_parameters(
     case_directory: Path,
     geometry_info: Dict[str, Any],
-    target_params: List[str]
+    target_params: List[str],
+    field_stats: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> Dict[str, float]:
-    """Extract key parameters for convergence assessment."""
+    """Extract key parameters for convergence assessment (field_stats from extract_field_statistics)."""
     parameters = {}
     
     try:
@@ -322,8 +581,10 @@ def extract_convergence_parameters(
         geometry_type = geometry_info.get("type", "custom")
         
         # Universal parameters
-        parameters["max_velocity"] = extract_max_velocity(case_directory)
-        parameters["pressure_drop"] = extract_pressure_drop(case_directory)
+        if field_stats is None:
+            field_stats = extract_field_statistics(case_directory)
+        parameters["max_velocity"] = extract_max_velocity(field_stats)
+        parameters["pressure_drop"] = extract_pressure_drop(field_stats)
         
         # Geometry-specific parameters
         if geometry_type in ["cylinder", "sphere", "cube", "custom"]:
@@ -354,60 +615,59 @@ def extract_convergence_parameters(
     return parameters
 
 
-def extract_max_velocity(case_directory: Path) -> float:
-    """Extract maximum velocity from simulation results."""
-    try:
-        # Look for velocity data in latest time directory
-        time_dirs = [d for d in case_directory.iterdir() if d.is_dir() and d.name.replace('.', '').isdigit()]
-        if not time_dirs:
-            return 0.0
-        
-        latest_time = max(time_dirs, key=lambda x: float(x.name))
-        u_file = latest_time / "U"
-        
-        if u_file.exists():
-            with open(u_file, 'r') as f:
-                content = f.read()
-                # Simple extraction - look for internal field max values
-                # This is a simplified approach - in practice might use foamCalc or similar
-                import re
-                numbers = re.findall(r'[-+]?\d*\.?\d+', content)
-                if numbers:
-                    velocities = [abs(float(n)) for n in numbers[-100:]]  # Last 100 numbers
-                    return max(velocities) if velocities else 0.0
-        
-        return 0.0
-        
-    except Exception as e:
-        logger.error(f"Failed to extract max velocity: {str(e)}")
-        return 0.0
+def extract_field_statistics(case_directory: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Min/max/mean and patch averages of U and p at the latest time (see field_statistics).
+    
+    Patches without a value entry (zeroGradient) are averaged over the cells
+    next to them, if the mesh can be read.
+    """
+    latest_time = latest_time_directory(case_directory)
+    if latest_time is None:
+        return {}
+    
+    boundary_cells = None
+    for poly_mesh in (latest_time / "polyMesh", case_directory / "constant" / "polyMesh"):
+        if (poly_mesh / "owner").exists() or (poly_mesh / "owner.gz").exists():
+            try:
+                boundary_cells = read_boundary_cells(poly_mesh)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read the boundary faces of {poly_mesh}: {str(e)}")
+            break
+    
+    statistics = {}
+    for name in ("U", "p"):
+        try:
+            statistics[name] = field_statistics(read_field(latest_time / name), boundary_cells)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read field {latest_time / name}: {str(e)}")
+    return statistics
 
 
-def extract_pressure_drop(case_directory: Path) -> float:
-    """Extract pressure drop from simulation results."""
-    try:
-        # Similar approach to max velocity - simplified extraction
-        time_dirs = [d for d in case_directory.iterdir() if d.is_dir() and d.name.replace('.', '').isdigit()]
-        if not time_dirs:
-            return 0.0
-        
-        latest_time = max(time_dirs, key=lambda x: float(x.name))
-        p_file = latest_time / "p"
-        
-        if p_file.exists():
-            with open(p_file, 'r') as f:
-                content = f.read()
-                import re
-                numbers = re.findall(r'[-+]?\d*\.?\d+', content)
-                if numbers:
-                    pressures = [float(n) for n in numbers[-100:]]
-                    return max(pressures) - min(pressures) if pressures else 0.0
-        
-        return 0.0
-        
-    except Exception as e:
-        logger.error(f"Failed to extract pressure drop: {str(e)}")
+def extract_max_velocity(field_stats: Dict[str, Dict[str, Any]]) -> float:
+    """Maximum velocity magnitude over the cells."""
+    velocity = field_stats.get("U")
+    return velocity["max"] if velocity and velocity["max"] is not None else 0.0
+
+
+def extract_pressure_drop(field_stats: Dict[str, Dict[str, Any]]) -> float:
+    """
+    Pressure drop between the inlet and outlet patches (by name), averaged over their faces.
+    
+    Without inlet and outlet patch values, the pressure range over the cells.
+    """
+    pressure = field_stats.get("p")
+    if not pressure or pressure["max"] is None:
         return 0.0
+    
+    patches = pressure["patches"]
+    inlet = [value for name, value in patches.items() if "inlet" in name.lower() and value is not None]
+    outlet = [value for name, value in patches.items() if "outlet" in name.lower() and value is not None]
+    if inlet and outlet:
+        return float(np.mean(inlet) - np.mean(outlet))
+    return pressure["max"] - pressure["min"]
 
 
 def extract_drag_coefficient(case_directory: Path, geometry_info: Dict[str, Any]) -> Optional[float]:
@@ -672,6 +932,7 @@ def generate_convergence_report(
     }
     
     # Add mesh level information
+    savings = estimate_warm_start_savings(convergence_results)
     for i, result in enumerate(convergence_results):
         if result:
             level_info = {
@@ -679,10 +940,15 @@ def generate_convergence_report(
                 "description": mesh_levels[i]["description"],
                 "estimated_cells": mesh_levels[i]["estimated_cells"],
                 "actual_cells": result.get("mesh_quality", {}).get("total_cells", "N/A"),
-                "convergence_parameters": result.get("convergence_parameters", {})
+                "convergence_parameters": result.get("convergence_parameters", {}),
+                **savings[i]
             }
             report["mesh_levels"].append(level_info)
     
+    if any(level["warm_started"] for level in savings):
+        report["summary"]["iterations_saved"] = sum(level["iterations_saved"] or 0 for level in savings)
+        report["summary"]["wall_time_saved"] = sum(level["wall_time_saved"] or 0.0 for level in savings)
+    
     # Add convergence assessment
     report["convergence_table"] = convergence_assessment
     
@@ -697,4 +963,50 @@ def generate_convergence_report(
     
     report["recommendations"] = recommendations
     
-    return report 
\ No newline at end of file
+    return report
+
+
+def solver_effort(result: Dict[str, Any]) -> Tuple[int, float]:
+    """Solver iterations (time steps) and wall time of a finished mesh level."""
+    simulation_results = result.get("simulation_results") or {}
+    solver_step = simulation_results.get("steps", {}).get("solver", {})
+    performance = simulation_results.get("performance") or {}
+    iterations = performance.get("time_steps") or solver_step.get("solver_info", {}).get("iterations", 0)
+    wall_time = performance.get("solver_wall_time") or solver_step.get("execution_time") \
+        or solver_step.get("solver_info", {}).get("execution_time", 0)
+    return int(iterations or 0), float(wall_time or 0.0)
+
+
+def estimate_warm_start_savings(convergence_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Iterations and wall time each warm-started level saved over a cold start.
+    
+    The levels are not also run cold, so the cold iteration count is taken
+    from the coarsest level that started from the initial fields (with a
+    multigrid pressure solver, iterations to convergence hardly depend on the
+    mesh). The saved iterations are valued at the level's own time per
+    iteration, less the time mapFields took. Levels that were not warm-started
+    save nothing (None).
+    """
+    cold_iterations = next(
+        (solver_effort(r)[0] for r in convergence_results if r and not (r.get("warm_start") or {}).get("mapped")),
+        None
+    )
+    
+    savings = []
+    for result in convergence_results:
+        iterations, wall_time = solver_effort(result) if result else (0, 0.0)
+        warm_start = (result or {}).get("warm_start") or {}
+        level = {
+            "iterations": iterations,
+            "solver_wall_time": wall_time,
+            "warm_started": bool(warm_start.get("mapped")),
+            "iterations_saved": None,
+            "wall_time_saved": None
+        }
+        if level["warm_started"] and cold_iterations and iterations > 0:
+            level["iterations_saved"] = max(0, cold_iterations - iterations)
+            level["wall_time_saved"] = level["iterations_saved"] * wall_time / iterations - warm_start.get("map_time", 0)
+        savings.append(level)
+    
+    return savings
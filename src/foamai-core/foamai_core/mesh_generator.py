@@ -2,11 +2,23 @@
 
 import os
 import json
+import math
 from typing import Dict, Any, Optional
 from pathlib import Path
 from loguru import logger
 
 from .state import CFDState, CFDStep, GeometryType
+from .stl_io import analyze_stl, rotation_matrix, stl_center
+
+# Cells an STL case should end up with after snappyHexMesh, by mesh resolution
+STL_TARGET_CELLS = {"coarse": 100_000, "medium": 300_000, "fine": 1_000_000, "very_fine": 3_000_000}
+# Share of the target cells spent on the background mesh
+STL_BACKGROUND_SHARE = 0.2
+# Fewest cells across the body at the surface refinement level
+STL_MIN_SURFACE_CELLS = 10
+STL_MAX_REFINEMENT_LEVEL = 6
+# Cell layers between refinement levels (nCellsBetweenLevels in snappyHexMeshDict)
+STL_CELLS_BETWEEN_LEVELS = 3
 
 
 def mesh_generator_agent(state: CFDState) -> CFDState:
@@ -1251,15 +1263,43 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
     base_resolution = {"coarse": 20, "medium": 40, "fine": 80, "very_fine": 120}.get(mesh_resolution, 40)
     
     # Estimate domain size based on flow context
-    domain_size_multiplier = flow_context.get("domain_size_multiplier", 20.0)
+    domain_size_multiplier = flow_context.get("domain_size_multiplier") or 20.0
+    
+    # Size the domain and cells from the STL itself (as it will be after rotation)
+    analysis = analyze_stl_geometry(stl_file, parsed_params.get("rotation_info") or {})
+    if analysis is not None:
+        sizing = size_stl_mesh(analysis, mesh_resolution, domain_size_multiplier)
+        logger.info(f"Mesh Generator: STL extent {[round(e, 4) for e in analysis['extent']]} m, "
+                    f"{sizing['background_cells']} background cells of {sizing['cell_size']:.4g} m, "
+                    f"surface level {sizing['surface_level']}, ~{sizing['total_cells']} cells")
+        if not analysis["watertight"]:
+            logger.warning(f"Mesh Generator: STL surface is not watertight ({analysis['open_edges']} open, "
+                           f"{analysis['non_manifold_edges']} non-manifold edges); snappyHexMesh may leak into it")
+    else:
+        # Since we don't know the STL dimensions, use default values
+        estimated_characteristic_length = 0.1  # 10cm default
+        domain_length = estimated_characteristic_length * domain_size_multiplier
+        sizing = {
+            "characteristic_length": estimated_characteristic_length,
+            "domain_length": domain_length,
+            "domain_height": domain_length * 0.6,  # 60% of length
+            "domain_width": domain_length * 0.6,   # 60% of length
+            "origin": [0.0, 0.0, 0.0],
+            "n_cells": [int(base_resolution * 1.5), int(base_resolution * 0.9), int(base_resolution * 0.9)],
+            "min_level": 0,  # Start with 0 for more conservative approach
+            "max_level": 2,  # Reduced to 2 for better stability
+            "surface_level": 1,
+            "surface_cells": base_resolution * 1.5,  # Less aggressive refinement
+            "total_cells": int(base_resolution * base_resolution * base_resolution * 0.3),  # More conservative estimate
+            "reference_area": None
+        }
     
-    # For STL files, we'll create a reasonable domain size
-    # Since we don't know the STL dimensions yet, use default values
-    # These will be adjusted during case writing when we can analyze the STL
-    estimated_characteristic_length = 0.1  # 10cm default
-    domain_length = estimated_characteristic_length * domain_size_multiplier
-    domain_height = domain_length * 0.6  # 60% of length
-    domain_width = domain_length * 0.6   # 60% of length
+    domain_length = sizing["domain_length"]
+    domain_height = sizing["domain_height"]
+    domain_width = sizing["domain_width"]
+    x0, y0, z0 = sizing["origin"]
+    x1, y1, z1 = x0 + domain_length, y0 + domain_height, z0 + domain_width
+    n_cells_x, n_cells_y, n_cells_z = sizing["n_cells"]
     
     # Create a valid OpenFOAM dictionary name from STL filename
     # Remove extension and ensure it's a valid C++ identifier
@@ -1286,19 +1326,20 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
             "domain_length": domain_length,
             "domain_height": domain_height,
             "domain_width": domain_width,
-            "n_cells_x": int(base_resolution * 1.5),
-            "n_cells_y": int(base_resolution * 0.9),
-            "n_cells_z": int(base_resolution * 0.9),
+            "origin": [x0, y0, z0],
+            "n_cells_x": n_cells_x,
+            "n_cells_y": n_cells_y,
+            "n_cells_z": n_cells_z,
             # Create a simple box domain
             "vertices": [
-                [0, 0, 0],
-                [domain_length, 0, 0],
-                [domain_length, domain_height, 0],
-                [0, domain_height, 0],
-                [0, 0, domain_width],
-                [domain_length, 0, domain_width],
-                [domain_length, domain_height, domain_width],
-                [0, domain_height, domain_width]
+                [x0, y0, z0],
+                [x1, y0, z0],
+                [x1, y1, z0],
+                [x0, y1, z0],
+                [x0, y0, z1],
+                [x1, y0, z1],
+                [x1, y1, z1],
+                [x0, y1, z1]
             ]
         },
         
@@ -1317,22 +1358,23 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
             "snap": True,
             "add_layers": False,  # Start without layers for robustness, can be enabled later
             "refinement_levels": {
-                "min": 0,  # Start with 0 for more conservative approach
-                "max": 2,  # Reduced to 2 for better stability
-                "surface_level": 1
+                "min": sizing["min_level"],
+                "max": sizing["max_level"],
+                "surface_level": sizing["surface_level"]
             },
             "refinement_regions": {
                 "global": {
-                    "min": [0, 0, 0],
-                    "max": [domain_length, domain_height, domain_width],
+                    "min": [x0, y0, z0],
+                    "max": [x1, y1, z1],
                     "level": 0  # Start conservative
                 }
             },
-            # Better locationInMesh - place it safely in upstream region
+            # Better locationInMesh - place it safely in upstream region,
+            # slightly off the mid-planes so it never lies on a cell face
             "location_in_mesh": [
-                domain_length * 0.05,  # 5% from inlet (very safe)
-                domain_height * 0.5,   # Middle height
-                domain_width * 0.5     # Middle width
+                x0 + domain_length * 0.05,   # 5% from inlet (very safe)
+                y0 + domain_height * 0.5013, # Middle height
+                z0 + domain_width * 0.5017   # Middle width
             ],
             "layers": {
                 "n_layers": 3,
@@ -1364,19 +1406,20 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
             "domain_length": domain_length,
             "domain_height": domain_height,
             "domain_width": domain_width,
-            "characteristic_length": estimated_characteristic_length,
+            "characteristic_length": sizing["characteristic_length"],
+            "reference_area": sizing["reference_area"],
             "is_3d": True
         },
         
         # Resolution settings
         "resolution": {
             "background": base_resolution,
-            "surface": base_resolution * 1.5,  # Less aggressive refinement
+            "surface": sizing["surface_cells"],  # Cells across the body at surface level
             "refinement": base_resolution * 2   # Less aggressive refinement
         },
         
-        # Estimated cell count (will be refined during meshing)
-        "total_cells": int(base_resolution * base_resolution * base_resolution * 0.3),  # More conservative estimate
+        # Estimated cell count after snappyHexMesh
+        "total_cells": sizing["total_cells"],
         
         # Quality metrics
         "quality_metrics": {
@@ -1385,6 +1428,9 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
         }
     }
     
+    if analysis is not None:
+        mesh_config["stl_analysis"] = analysis
+    
     # Add flow-specific parameters
     if parsed_params.get("reynolds_number"):
         mesh_config["reynolds_number"] = parsed_params["reynolds_number"]
@@ -1400,6 +1446,96 @@ def generate_stl_mesh_config(stl_file: str, mesh_resolution: str, flow_context:
     return mesh_config
 
 
+def analyze_stl_geometry(stl_file: str, rotation_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Analyze an STL file as it will be meshed (after any requested rotation), or None if it cannot be read."""
+    try:
+        rotation = center = None
+        if rotation_info.get("rotate") and rotation_info.get("rotation_angle"):
+            axis = rotation_info.get("rotation_axis", "z").lower()
+            rotation = rotation_matrix(axis if axis in ("x", "y") else "z", rotation_info["rotation_angle"])
+            # Same center as the rotation applied when the case is written
+            center = rotation_info.get("rotation_center") or stl_center(stl_file)
+        return analyze_stl(stl_file, rotation=rotation, center=center)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Mesh Generator: Could not analyze STL file {stl_file}, using default domain size: {e}")
+        return None
+
+
+def size_stl_mesh(analysis: Dict[str, Any], mesh_resolution: str, domain_size_multiplier: float) -> Dict[str, Any]:
+    """
+    Domain, background cells and refinement levels for an analyzed STL surface.
+    
+    The largest extent of the surface is its characteristic length. The surface
+    cell size is chosen so that the estimated cell count after snappyHexMesh
+    (background mesh, refinement bands around the surface and its feature
+    edges) matches the target for mesh_resolution, with the background mesh
+    taking about STL_BACKGROUND_SHARE of it. Small budgets never resolve the
+    body with fewer than STL_MIN_SURFACE_CELLS cells across.
+    """
+    target_cells = STL_TARGET_CELLS.get(mesh_resolution, STL_TARGET_CELLS["medium"])
+    length = max(max(analysis["extent"]), 1e-9)
+    area = analysis["surface_area"]
+    
+    # Same proportions as the analytic geometries: 60% as high and wide as long,
+    # but always with room around the body
+    extent = analysis["extent"]
+    domain_length = max(length * domain_size_multiplier, 3 * extent[0])
+    domain = [domain_length, max(domain_length * 0.6, 3 * extent[1]), max(domain_length * 0.6, 3 * extent[2])]
+    volume = domain[0] * domain[1] * domain[2]
+    
+    # Many sharp edges get one or two levels more than the rest of the surface
+    density = analysis["feature_edge_density"]
+    feature_levels = 0 if density < 0.02 else 1 if density < 0.1 else 2
+    background_cell_goal = (volume / (STL_BACKGROUND_SHARE * target_cells)) ** (1 / 3)
+    
+    def estimate(surface_cell: float):
+        level = math.ceil(math.log2(max(background_cell_goal / surface_cell, 1.0)))
+        level = min(level, STL_MAX_REFINEMENT_LEVEL - feature_levels)
+        background_cell = surface_cell * 2 ** level
+        cells = volume / background_cell ** 3
+        # Each level adds a band of STL_CELLS_BETWEEN_LEVELS cells around the surface
+        for k in range(1, level + 1):
+            cells += STL_CELLS_BETWEEN_LEVELS * area / (background_cell / 2 ** k) ** 2
+        # and feature refinement a tube of cells along the sharp edges
+        for k in range(1, feature_levels + 1):
+            cells += STL_CELLS_BETWEEN_LEVELS ** 2 * analysis["feature_edge_length"] / (surface_cell / 2 ** k)
+        return cells, level, background_cell
+    
+    # Bisection on the (log) surface cell size; the estimate grows as cells shrink
+    coarsest = length / STL_MIN_SURFACE_CELLS
+    surface_cell = coarsest
+    if estimate(coarsest)[0] < target_cells:
+        low, high = coarsest / 1e4, coarsest
+        for _ in range(60):
+            middle = math.sqrt(low * high)
+            if estimate(middle)[0] > target_cells:
+                low = middle
+            else:
+                high = middle
+        surface_cell = high
+    total_cells, level, background_cell = estimate(surface_cell)
+    
+    n_cells = [max(1, round(size / background_cell)) for size in domain]
+    center = analysis["center"]
+    return {
+        "characteristic_length": length,
+        "domain_length": domain[0],
+        "domain_height": domain[1],
+        "domain_width": domain[2],
+        # Body a third of the way down the domain, centered across it
+        "origin": [center[0] - domain[0] / 3, center[1] - domain[1] / 2, center[2] - domain[2] / 2],
+        "n_cells": n_cells,
+        "background_cells": n_cells[0] * n_cells[1] * n_cells[2],
+        "cell_size": background_cell,
+        "min_level": level,
+        "max_level": level + feature_levels,
+        "surface_level": level,
+        "surface_cells": round(length / surface_cell),
+        "total_cells": int(total_cells),
+        "reference_area": analysis["frontal_area"]
+    }
+
+
 def calculate_total_cells(mesh_config: Dict[str, Any]) -> int:
     """Calculate total number of cells in the mesh."""
     resolution = mesh_config["resolution"]
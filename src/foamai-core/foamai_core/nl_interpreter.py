@@ -5,9 +5,6 @@ import re
 from typing import Dict, Any, Optional, Tuple, List
 from loguru import logger
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 
 from .state import CFDState, CFDStep, GeometryType, FlowType, AnalysisType
@@ -796,7 +793,8 @@ def detect_mesh_convergence_request(prompt: str) -> Dict[str, Any]:
         "mesh_convergence_active": False,
         "mesh_convergence_levels": 4,
         "mesh_convergence_target_params": [],
-        "mesh_convergence_threshold": 1.0
+        "mesh_convergence_threshold": 1.0,
+        "mesh_convergence_warm_start": False
     }
     
     # Detect mesh convergence request
@@ -875,6 +873,19 @@ def detect_mesh_convergence_request(prompt: str) -> Dict[str, Any]:
                 mesh_convergence_info["mesh_convergence_threshold"] = threshold
                 break
     
+    # Detect warm-starting each level from the previous level's solution
+    warm_start_patterns = [
+        r'warm[\s-]+start',
+        r'map\s*fields',
+        r'start\s+each\s+(?:mesh\s+)?level\s+from\s+the\s+previous',
+        r'initiali[sz]e\s+from\s+(?:the\s+)?(?:previous|coarser)\s+(?:mesh|level|solution)'
+    ]
+    
+    for pattern in warm_start_patterns:
+        if re.search(pattern, prompt_lower):
+            mesh_convergence_info["mesh_convergence_warm_start"] = True
+            break
+    
     return mesh_convergence_info
 
 
@@ -926,6 +937,50 @@ def detect_gpu_request(prompt: str) -> Dict[str, Any]:
     return gpu_info
 
 
+def detect_parallel_request(prompt: str) -> Dict[str, Any]:
+    """Detect a request to run the solver in parallel (MPI) from the prompt."""
+    prompt_lower = prompt.lower()
+    
+    # Initialize parallel info
+    parallel_info = {
+        "parallel_execution": False,
+        "max_processes": None
+    }
+    
+    # Detect explicit parallel requests
+    parallel_patterns = [
+        r'in\s+parallel',
+        r'parallel\s+(?:run|execution|simulation|solver|solve)',
+        r'\bmpi\b',
+        r'mpirun',
+        r'decompose(?:par)?\s+the\s+(?:case|domain|mesh)',
+        r'(?:all|multiple)\s+(?:cpu\s+)?(?:cores|processors|cpus)'
+    ]
+    
+    for pattern in parallel_patterns:
+        if re.search(pattern, prompt_lower):
+            parallel_info["parallel_execution"] = True
+            break
+    
+    # Extract the number of processes; asking for more than one implies parallel
+    process_patterns = [
+        r'(?:on|using|with|across)\s+(\d+)\s+(?:cpu\s+)?(?:cores|processors|processes|cpus|ranks|mpi\s+ranks)',
+        r'(\d+)\s+mpi\s+(?:ranks|processes)',
+        r'-np\s+(\d+)'
+    ]
+    
+    for pattern in process_patterns:
+        match = re.search(pattern, prompt_lower)
+        if match:
+            processes = int(match.group(1))
+            if processes > 1:
+                parallel_info["parallel_execution"] = True
+                parallel_info["max_processes"] = processes
+            break
+    
+    return parallel_info
+
+
 def detect_multiphase_flow(prompt: str) -> Dict[str, Any]:
     """Detect multiphase flow indicators from the prompt using word boundaries."""
     import re
@@ -1011,6 +1066,11 @@ def nl_interpreter_agent(state: CFDState) -> CFDState:
             if state.get("stl_file"):
                 logger.info(f"NL Interpreter: STL file provided: {state['stl_file']}")
         
+        # LLM client imported here, so the prompt detectors work without it
+        from langchain_openai import ChatOpenAI
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import PydanticOutputParser
+        
         # Get API key from config
         from .config import get_settings
         settings = get_settings()
@@ -1270,6 +1330,10 @@ Return valid JSON that matches the schema exactly.
         mesh_convergence_info = detect_mesh_convergence_request(state["user_prompt"])
         parsed_params["mesh_convergence_info"] = mesh_convergence_info
         
+        # Warm start can come from the CLI flag or from the prompt
+        mesh_convergence_warm_start = (state.get("mesh_convergence_warm_start", False)
+                                       or mesh_convergence_info["mesh_convergence_warm_start"])
+        
         # Log mesh convergence detection if found
         if mesh_convergence_info["mesh_convergence_active"]:
             if state["verbose"]:
@@ -1278,6 +1342,8 @@ Return valid JSON that matches the schema exactly.
                 logger.info(f"NL Interpreter: Convergence threshold: {mesh_convergence_info['mesh_convergence_threshold']}%")
                 if mesh_convergence_info["mesh_convergence_target_params"]:
                     logger.info(f"NL Interpreter: Target parameters: {mesh_convergence_info['mesh_convergence_target_params']}")
+                if mesh_convergence_warm_start:
+                    logger.info("NL Interpreter: Warm-starting each mesh level from the previous one")
         
         # Detect GPU request from prompt
         gpu_info = detect_gpu_request(state["user_prompt"])
@@ -1290,6 +1356,15 @@ Return valid JSON that matches the schema exactly.
             "gpu_backend": gpu_info["gpu_backend"]
         }
         
+        # Detect parallel execution request from prompt; CLI settings take priority
+        parallel_info = detect_parallel_request(state["user_prompt"])
+        parallel_execution = state.get("parallel_execution", False) or parallel_info["parallel_execution"]
+        parallel_settings = dict(state.get("parallel_settings") or {})
+        if parallel_info["max_processes"] and not parallel_settings.get("max_processes"):
+            parallel_settings["max_processes"] = parallel_info["max_processes"]
+        if parallel_execution and state["verbose"]:
+            logger.info(f"NL Interpreter: Parallel execution requested (max processes: {parallel_settings.get('max_processes', 'all cores')})")
+        
         # Log GPU detection if found
         if final_gpu_info["use_gpu"]:
             if state["verbose"]:
@@ -1346,9 +1421,13 @@ Return valid JSON that matches the schema exactly.
                     "mesh_convergence_levels": mesh_convergence_info["mesh_convergence_levels"],
                     "mesh_convergence_threshold": mesh_convergence_info["mesh_convergence_threshold"],
                     "mesh_convergence_target_params": mesh_convergence_info["mesh_convergence_target_params"],
+                    "mesh_convergence_warm_start": mesh_convergence_warm_start,
                     # Include GPU parameters in state
                     "use_gpu": final_gpu_info["use_gpu"],
-                    "gpu_info": final_gpu_info
+                    "gpu_info": final_gpu_info,
+                    # Include parallel execution parameters in state
+                    "parallel_execution": parallel_execution,
+                    "parallel_settings": parallel_settings
                 }
             else:
                 # Normal validation failure - stop execution with helpful error message
@@ -1371,9 +1450,13 @@ Return valid JSON that matches the schema exactly.
             "mesh_convergence_levels": mesh_convergence_info["mesh_convergence_levels"],
             "mesh_convergence_threshold": mesh_convergence_info["mesh_convergence_threshold"],
             "mesh_convergence_target_params": mesh_convergence_info["mesh_convergence_target_params"],
+            "mesh_convergence_warm_start": mesh_convergence_warm_start,
             # Include GPU parameters in state
             "use_gpu": final_gpu_info["use_gpu"],
-            "gpu_info": final_gpu_info
+            "gpu_info": final_gpu_info,
+            # Include parallel execution parameters in state
+            "parallel_execution": parallel_execution,
+            "parallel_settings": parallel_settings
         }
         
     except Exception as e:
@@ -1,11 +1,10 @@
 """System Orchestrator Agent - Central workflow controller."""
 
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from loguru import logger
 from pathlib import Path
 
-from langgraph.graph import StateGraph, END
 from .state import CFDState, CFDStep
 from .remote_executor import RemoteExecutor
 
@@ -447,6 +446,7 @@ def determine_next_agent(state: CFDState) -> str:
 
 def create_cfd_workflow():
     """Create and compile the CFD workflow graph."""
+    from langgraph.graph import StateGraph, END
     from .nl_interpreter import nl_interpreter_agent
     from .mesh_generator import mesh_generator_agent
     from .boundary_condition import boundary_condition_agent
@@ -526,7 +526,10 @@ def create_initial_state(
         mesh_convergence_levels: int = 4,
         mesh_convergence_target_params: List[str] = None,
         mesh_convergence_threshold: float = 1.0,
-        use_gpu: bool = False
+        mesh_convergence_warm_start: bool = False,
+        use_gpu: bool = False,
+        parallel_execution: bool = False,
+        parallel_settings: Optional[Dict[str, Any]] = None,
 
         # Remote execution parameters
         execution_mode: str = "local",
@@ -546,6 +549,9 @@ def create_initial_state(
         user_approval_enabled: Enable user approval step
         stl_file: Optional STL file path
         force_validation: Force validation
+        mesh_convergence_warm_start: Start each mesh level from the previous level's solution
+        parallel_execution: Run the solver under MPI (decomposePar -> mpirun -> reconstructPar)
+        parallel_settings: Optional "method" and "max_processes" for parallel runs
         execution_mode: "local" or "remote"
         server_url: Server URL for remote execution
         project_name: Project name for remote execution
@@ -597,6 +603,7 @@ def create_initial_state(
         mesh_convergence_levels=mesh_convergence_levels,
         mesh_convergence_target_params=mesh_convergence_target_params or [],
         mesh_convergence_threshold=mesh_convergence_threshold,
+        mesh_convergence_warm_start=mesh_convergence_warm_start,
         mesh_convergence_results={},
         mesh_convergence_report={},
         recommended_mesh_level=0,
@@ -605,8 +612,9 @@ def create_initial_state(
             "use_gpu": use_gpu,
             "gpu_explicit": False,
             "gpu_backend": "petsc"
-        }
-    ) 
+        },
+        parallel_execution=parallel_execution,
+        parallel_settings=parallel_settings or {},
 
         # Remote execution fields
         execution_mode=execution_mode,
@@ -8,12 +8,49 @@ operations with API calls.
 
 import os
 import json
+import hashlib
+import tarfile
+import tempfile
 import requests
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
+from typing import Callable, Dict, Any, Iterator, Optional, List, Union
 from loguru import logger
 
+# Open MPI refuses to start as root (the usual case in server containers)
+# unless told otherwise; other MPI implementations ignore these
+MPI_ENVIRONMENT = {
+    'OMPI_ALLOW_RUN_AS_ROOT': '1',
+    'OMPI_ALLOW_RUN_AS_ROOT_CONFIRM': '1'
+}
+
+def _sha256_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in chunks so large STL surfaces are never read in one piece"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def _iter_sse_events(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    """Parse a Server-Sent Events response into {'event', 'id', 'data'} dicts"""
+    event = {'event': 'message', 'id': None, 'data': []}
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == '':
+            if event['data']:
+                yield {'event': event['event'], 'id': event['id'], 'data': '\n'.join(event['data'])}
+            event = {'event': 'message', 'id': None, 'data': []}
+        elif not line.startswith(':'):
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'data':
+                event['data'].append(value)
+            elif field in ('event', 'id'):
+                event[field] = value
+
+
 class RemoteExecutor:
     """
     Remote executor that translates LangGraph agent operations to server API calls.
@@ -132,6 +169,135 @@ class RemoteExecutor:
             logger.error(f"Failed to upload {local_path}: {str(e)}")
             raise RuntimeError(f"File upload failed: {str(e)}")
     
+    def upload_directory(self, local_dir: Union[str, Path], destination_path: str = "",
+                         files: Optional[List[str]] = None, compression: str = "gz") -> Dict[str, Any]:
+        """
+        Upload a whole directory to the project's active_run in a single request.
+        
+        The directory is packed into a tar archive that stays in memory for
+        small cases and spills to a temporary file for large ones (e.g. big
+        STL surfaces), then streamed to the server's upload_archive endpoint.
+        
+        Args:
+            local_dir: Local directory to upload
+            destination_path: Optional subdirectory of active_run to extract into
+            files: Optional list of paths relative to local_dir to include
+                   (default: every file in the directory)
+            compression: "gz" (default), "xz", "bz2" or "" for an uncompressed tar
+            
+        Returns:
+            Server response with the extracted file list
+        """
+        local_dir = Path(local_dir)
+        
+        if not local_dir.is_dir():
+            raise FileNotFoundError(f"Local directory not found: {local_dir}")
+        
+        if files is None:
+            files = [
+                path.relative_to(local_dir).as_posix()
+                for path in sorted(local_dir.rglob("*")) if path.is_file()
+            ]
+        
+        url = self._get_api_url(f'/api/projects/{self.project_name}/upload_archive')
+        mode = f"w:{compression}" if compression else "w"
+        
+        # Small archives stay in memory, large ones spill to disk transparently
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024) as archive:
+            with tarfile.open(fileobj=archive, mode=mode) as tar:
+                for relative_path in files:
+                    tar.add(local_dir / relative_path, arcname=relative_path, recursive=False)
+            archive_size = archive.tell()
+            archive.seek(0)
+            
+            try:
+                response = self.session.post(
+                    url,
+                    params={'destination_path': destination_path},
+                    data=archive,
+                    headers={
+                        'Content-Type': 'application/x-tar',
+                        'Content-Length': str(archive_size)
+                    },
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                
+                result = response.json()
+                logger.info(f"Uploaded {len(files)} files from {local_dir} as a {archive_size} byte archive")
+                return result
+                
+            except requests.RequestException as e:
+                logger.error(f"Failed to upload directory {local_dir}: {str(e)}")
+                raise RuntimeError(f"Directory upload failed: {str(e)}")
+    
+    def get_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Get the SHA-256 and size of every file uploaded to the project's active_run"""
+        return self._make_request('GET', f'/api/projects/{self.project_name}/manifest')['files']
+    
+    def delete_files(self, paths: List[str]) -> Dict[str, Any]:
+        """Delete files (relative to active_run) from the project"""
+        return self._make_request('POST', f'/api/projects/{self.project_name}/files/delete', json={'paths': paths})
+    
+    def sync_directory(self, local_dir: Union[str, Path], delete_stale: bool = True) -> Dict[str, Any]:
+        """
+        Bring the project's active_run in line with a local directory.
+        
+        Local files are hashed and compared with the server's upload manifest.
+        Only new or changed files are sent (as one archive), and files that
+        were uploaded earlier but no longer exist locally are deleted.
+        Server-generated files such as meshes and time directories are never
+        in the manifest and are therefore left alone.
+        
+        Args:
+            local_dir: Local directory mirroring active_run
+            delete_stale: Remove previously uploaded files missing locally
+            
+        Returns:
+            Dict with uploaded/unchanged/deleted file lists, hit/miss counts
+            and the number of bytes sent and skipped
+        """
+        local_dir = Path(local_dir)
+        
+        if not local_dir.is_dir():
+            raise FileNotFoundError(f"Local directory not found: {local_dir}")
+        
+        local_files = {}
+        for path in sorted(local_dir.rglob("*")):
+            if path.is_file():
+                local_files[path.relative_to(local_dir).as_posix()] = (_sha256_file(path), path.stat().st_size)
+        
+        remote_files = self.get_manifest()
+        
+        changed = [
+            relative_path for relative_path, (digest, size) in local_files.items()
+            if remote_files.get(relative_path, {}).get('sha256') != digest
+        ]
+        changed_paths = set(changed)
+        unchanged = [relative_path for relative_path in local_files if relative_path not in changed_paths]
+        stale = [relative_path for relative_path in remote_files if relative_path not in local_files]
+        
+        if changed:
+            self.upload_directory(local_dir, files=changed)
+        
+        deleted = []
+        if stale and delete_stale:
+            deleted = self.delete_files(stale)['deleted']
+        
+        result = {
+            'uploaded_files': changed,
+            'unchanged_files': unchanged,
+            'deleted_files': deleted,
+            'hit_count': len(unchanged),
+            'miss_count': len(changed),
+            'bytes_uploaded': sum(local_files[p][1] for p in changed),
+            'bytes_skipped': sum(local_files[p][1] for p in unchanged)
+        }
+        
+        logger.info(f"Synced {local_dir}: {result['miss_count']} uploaded, {result['hit_count']} unchanged, "
+                    f"{len(deleted)} deleted ({result['bytes_skipped']} bytes skipped)")
+        return result
+    
     def upload_text_file(self, content: str, destination_path: str, filename: str = None) -> Dict[str, Any]:
         """
         Upload text content as a file to the project.
@@ -189,36 +355,39 @@ class RemoteExecutor:
     def run_command(self, command: str, args: List[str] = None, 
                    environment: Dict[str, str] = None,
                    working_directory: str = "active_run",
-                   timeout: int = None) -> Dict[str, Any]:
+                   timeout: int = None,
+                   on_output: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Execute an OpenFOAM command on the server.
         
+        The command is submitted as a background job and polled until it
+        finishes, so long solver runs do not depend on one HTTP request
+        staying open for their whole duration.
+        
         Args:
             command: Command to execute (e.g., 'blockMesh', 'simpleFoam')
             args: Command arguments
             environment: Environment variables
             working_directory: Working directory within project
-            timeout: Command timeout in seconds
+            timeout: Command timeout in seconds (default: the server's estimate,
+                     derived from the controlDict for solver runs)
+            on_output: Optional callback receiving each output line live
             
         Returns:
             Command execution result with stdout, stderr, success status
         """
-        data = {
-            'command': command,
-            'args': args or [],
-            'environment': environment or {},
-            'working_directory': working_directory,
-            'timeout': timeout or self.timeout
-        }
-        
-        url = self._get_api_url(f'/api/projects/{self.project_name}/run_command')
-        
         try:
             logger.info(f"Running command '{command}' with args {args}")
-            response = self.session.post(url, json=data, timeout=timeout or self.timeout)
-            response.raise_for_status()
+            job = self.submit_command(command, args, environment, working_directory, timeout)
             
-            result = response.json()
+            # Servers without job support answer with the finished result directly
+            if 'exit_code' in job:
+                result = job
+            else:
+                if on_output:
+                    for line in self.stream_job_log(job['job_id']):
+                        on_output(line)
+                result = self.wait_for_job(job['job_id'], timeout)
             
             if result.get('success'):
                 logger.info(f"Command '{command}' completed successfully")
@@ -227,7 +396,7 @@ class RemoteExecutor:
             
             return result
             
-        except requests.RequestException as e:
+        except (requests.RequestException, RuntimeError) as e:
             logger.error(f"Failed to run command '{command}': {str(e)}")
             return {
                 'success': False,
@@ -237,6 +406,140 @@ class RemoteExecutor:
                 'error': f"Server communication failed: {str(e)}"
             }
     
+    def submit_command(self, command: str, args: List[str] = None,
+                       environment: Dict[str, str] = None,
+                       working_directory: str = "active_run",
+                       timeout: int = None) -> Dict[str, Any]:
+        """
+        Start an OpenFOAM command on the server without waiting for it.
+        
+        Without a timeout the server picks the job's time limit itself.
+        
+        Returns:
+            Job record with 'job_id' and 'status'
+        """
+        data = {
+            'command': command,
+            'args': args or [],
+            'environment': environment or {},
+            'working_directory': working_directory,
+            'timeout': timeout,
+            'wait': False
+        }
+        return self._make_request('POST', f'/api/projects/{self.project_name}/run_command', json=data)
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Get the status of a command job"""
+        return self._make_request('GET', f'/api/jobs/{job_id}')
+    
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running command job"""
+        return self._make_request('DELETE', f'/api/jobs/{job_id}')
+    
+    def stream_job_log(self, job_id: str, offset: int = 0) -> Iterator[str]:
+        """
+        Yield a job's output lines as the server produces them.
+        
+        The server sends the log over Server-Sent Events; the iterator ends
+        when the job finishes. If the connection drops it is resumed from the
+        last byte offset received.
+        
+        Args:
+            job_id: ID of the job
+            offset: Byte offset in the job's log file to start from
+        """
+        url = self._get_api_url(f'/api/jobs/{job_id}/log')
+        retries = 0
+        
+        while True:
+            try:
+                # No read timeout: a solver may be silent for a long time between lines
+                with self.session.get(url, params={'offset': offset}, stream=True,
+                                      headers={'Accept': 'text/event-stream'},
+                                      timeout=(self.timeout, None)) as response:
+                    response.raise_for_status()
+                    for event in _iter_sse_events(response):
+                        if event['event'] == 'end':
+                            return
+                        if event['id']:
+                            offset = int(event['id'])
+                        retries = 0
+                        yield event['data']
+                return
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError) as e:
+                retries += 1
+                if retries > 3:
+                    raise RuntimeError(f"Log stream for job {job_id} failed: {e}")
+                logger.warning(f"Log stream for job {job_id} interrupted, resuming at byte {offset}")
+                time.sleep(1)
+    
+    def get_residuals(self, since: int = 0, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the server-parsed residual history of the project's solver run.
+        
+        Args:
+            since: Index of the first time step to return; pass the previous
+                   response's 'next_since' to fetch only new rows
+            job_id: Job to read the history of (default: newest solver job)
+            
+        Returns:
+            Columns 'time', 'delta_t', 'courant_mean', 'courant_max',
+            'execution_time' and per-field 'initial_residuals'/'final_residuals'
+        """
+        params = {'since': since}
+        if job_id:
+            params['job_id'] = job_id
+        return self._make_request('GET', f'/api/projects/{self.project_name}/residuals', params=params)
+    
+    def wait_for_job(self, job_id: str, timeout: int = None, poll_interval: float = 2.0) -> Dict[str, Any]:
+        """
+        Poll a command job until it finishes.
+        
+        The wait is only limited once the job has left the scheduler's queue,
+        however long it was queued. If the job outlives its time limit by
+        more than a minute, it is cancelled on the server before giving up.
+        
+        Args:
+            job_id: ID of the job
+            timeout: Maximum time to wait in seconds (default: the job's time limit)
+            poll_interval: Seconds between status requests
+            
+        Returns:
+            Command execution result with stdout, stderr, success status
+            
+        Raises:
+            RuntimeError: If the job did not finish in time
+        """
+        deadline = None
+        # Start polling fast so short utilities return quickly, then back off
+        delay = 0.1
+        
+        while True:
+            job = self.get_job(job_id)
+            if deadline is None and job['status'] != 'queued':
+                # The server enforces the time limit itself, allow some slack
+                deadline = time.time() + (timeout or job.get('time_limit') or self.timeout) + 60
+            if job['status'] in ('completed', 'failed', 'cancelled'):
+                if job.get('result'):
+                    return job['result']
+                return {
+                    'success': False,
+                    'exit_code': -1,
+                    'stdout': '',
+                    'stderr': job.get('error') or f"Job {job['status']}",
+                    'error': job.get('error') or f"Job {job['status']}",
+                    'job_id': job_id
+                }
+            if deadline is not None and time.time() > deadline:
+                # Don't leave the job running (and holding its cores) on the server
+                try:
+                    self.cancel_job(job_id)
+                except RuntimeError as e:
+                    logger.warning(f"Failed to cancel job {job_id}: {e}")
+                raise RuntimeError(f"Timed out waiting for job {job_id}")
+            time.sleep(delay)
+            delay = min(delay * 2, poll_interval)
+    
     # Specialized OpenFOAM Commands
     def run_blockmesh(self, case_directory: str = "active_run") -> Dict[str, Any]:
         """Run blockMesh command"""
@@ -258,13 +561,30 @@ class RemoteExecutor:
         """Run createPatch command"""
         return self.run_command('createPatch', ['-overwrite'], working_directory=case_directory)
     
-    def run_solver(self, solver: str, case_directory: str = "active_run", timeout: int = 1800) -> Dict[str, Any]:
-        """Run OpenFOAM solver"""
-        return self.run_command(solver, working_directory=case_directory, timeout=timeout)
+    def run_decomposepar(self, case_directory: str = "active_run", timeout: int = 1800) -> Dict[str, Any]:
+        """Run decomposePar, replacing any previous decomposition"""
+        return self.run_command('decomposePar', ['-force'], working_directory=case_directory, timeout=timeout)
     
-    def run_foamrun(self, solver: str, case_directory: str = "active_run", timeout: int = 1800) -> Dict[str, Any]:
-        """Run foamRun with specified solver"""
-        return self.run_command('foamRun', ['-solver', solver], working_directory=case_directory, timeout=timeout)
+    def run_reconstructpar(self, case_directory: str = "active_run", timeout: int = 1800) -> Dict[str, Any]:
+        """Run reconstructPar to merge the processor directories"""
+        return self.run_command('reconstructPar', working_directory=case_directory, timeout=timeout)
+    
+    def run_solver(self, solver: str, case_directory: str = "active_run", timeout: Optional[int] = None,
+                   processes: int = 1) -> Dict[str, Any]:
+        """Run OpenFOAM solver, under mpirun when processes > 1 (the case must be decomposed)"""
+        return self._run_application(solver, [], case_directory, timeout, processes)
+    
+    def run_foamrun(self, solver: str, case_directory: str = "active_run", timeout: Optional[int] = None,
+                    processes: int = 1) -> Dict[str, Any]:
+        """Run foamRun with specified solver, under mpirun when processes > 1"""
+        return self._run_application('foamRun', ['-solver', solver], case_directory, timeout, processes)
+    
+    def _run_application(self, application: str, args: List[str], case_directory: str,
+                         timeout: Optional[int], processes: int) -> Dict[str, Any]:
+        if processes > 1:
+            return self.run_command('mpirun', ['-np', str(processes), application, *args, '-parallel'],
+                                    environment=MPI_ENVIRONMENT, working_directory=case_directory, timeout=timeout)
+        return self.run_command(application, args, working_directory=case_directory, timeout=timeout)
     
     # ParaView Server Management
     def start_pvserver(self, port: Optional[int] = None) -> Dict[str, Any]:
@@ -292,6 +612,13 @@ class RemoteExecutor:
         """Check server health"""
         return self._make_request('GET', '/health')
     
+    def get_cpu_count(self) -> Optional[int]:
+        """Number of CPU cores on the server, or None if the server does not report it"""
+        try:
+            return self.health_check().get('cpu_count')
+        except RuntimeError:
+            return None
+    
     def cleanup(self):
         """Cleanup resources"""
         self.session.close()
@@ -8,7 +8,29 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List
 from loguru import logger
 from .state import CFDState, CFDStep, GeometryType, SolverType
-from .remote_executor import RemoteExecutor
+from .remote_executor import RemoteExecutor, MPI_ENVIRONMENT
+from .log_parser import OpenFOAMLogParser
+from .mesh_generator import calculate_total_cells
+from .case_writer import write_decompose_par_dict, generate_decompose_par_dict, format_foam_dict
+
+# Parallel execution: below this many cells per subdomain the extra
+# communication costs more than the added cores save
+MIN_CELLS_PER_PROCESS = 20000
+DECOMPOSITION_METHODS = ("scotch", "hierarchical")
+
+# mapFields from the latest time of a case with the same patches and fields
+# (a coarser mesh of the same geometry) into the start time of the target
+MAPFIELDS_ARGS = ["-sourceTime", "latestTime", "-consistent"]
+
+# Directories a solution is cloned to: one plain name in the project root
+CLONE_DIRECTORY_RE = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+# Cell-steps per second of the latest serial run of each solver, the
+# reference parallel runs report their scaling efficiency against
+_serial_throughput: Dict[str, float] = {}
+
+# OpenFOAM environment per GPU setting, built on first use
+_openfoam_env_cache: Dict[bool, Dict[str, str]] = {}
 
 
 
@@ -326,9 +348,10 @@ def execute_simulation_pipeline(case_directory: Path, state: CFDState, config_on
                 logger.info(f"Note: High velocity ({velocity} m/s) simulations require small time steps for stability")
                 logger.info("The solver may appear to pause but is actually computing many small time steps")
         
-        solver_result = run_solver(case_directory, solver, state)
+        solver_result = execute_solver(case_directory, solver, state)
         results["steps"]["solver"] = solver_result
         results["log_files"]["solver"] = solver_result.get("log_file")
+        results["performance"] = solver_result.get("performance")
         
         if not solver_result["success"]:
             results["error"] = f"Solver execution failed: {solver_result['error']}"
@@ -471,8 +494,9 @@ def execute_simulation_pipeline_remote(remote: RemoteExecutor, state: CFDState,
             if velocity and velocity > 100:
                 logger.info(f"Note: High velocity ({velocity} m/s) simulations require small time steps for stability")
         
-        solver_result = run_solver_remote(remote, solver, state)
+        solver_result = execute_solver_remote(remote, solver, state)
         results["steps"]["solver"] = solver_result
+        results["performance"] = solver_result.get("performance")
         
         if not solver_result["success"]:
             results["error"] = f"Solver execution failed: {solver_result['error']}"
@@ -512,7 +536,7 @@ def run_solver_only_remote(remote: RemoteExecutor, solver: str, state: CFDState)
         if state["verbose"]:
             logger.info(f"Running solver-only execution: {solver} remotely...")
         
-        solver_result = run_solver_remote(remote, solver, state)
+        solver_result = execute_solver_remote(remote, solver, state)
         
         if not solver_result["success"]:
             return {
@@ -527,6 +551,7 @@ def run_solver_only_remote(remote: RemoteExecutor, solver: str, state: CFDState)
         return {
             "success": True,
             "steps": {"solver": solver_result},
+            "performance": solver_result.get("performance"),
             "total_time": time.time() - start_time
         }
         
@@ -556,7 +581,7 @@ def run_solver_only_local(case_directory: Path, solver: str, state: CFDState) ->
         if state["verbose"]:
             logger.info(f"Running solver-only execution: {solver} locally...")
         
-        solver_result = run_solver(case_directory, solver, state)
+        solver_result = execute_solver(case_directory, solver, state)
         
         if not solver_result["success"]:
             return {
@@ -571,6 +596,7 @@ def run_solver_only_local(case_directory: Path, solver: str, state: CFDState) ->
         return {
             "success": True,
             "steps": {"solver": solver_result},
+            "performance": solver_result.get("performance"),
             "total_time": time.time() - start_time
         }
         
@@ -582,6 +608,61 @@ def run_solver_only_local(case_directory: Path, solver: str, state: CFDState) ->
         }
 
 
+def map_fields_local(case_directory: Path, source_case: Path, state: CFDState) -> Dict[str, Any]:
+    """
+    Map the latest solution of source_case onto the mesh of case_directory.
+
+    mapFields overwrites the initial fields in the start time directory, so
+    the solver starts from the source solution instead of uniform fields.
+    """
+    start_time = time.time()
+    if state["verbose"]:
+        logger.info(f"Mapping fields from {source_case} onto {case_directory}...")
+
+    # Relative, so the path also works inside WSL
+    source = os.path.relpath(source_case, case_directory)
+    result = run_openfoam_utility(case_directory, "mapFields", [source, *MAPFIELDS_ARGS])
+    result["execution_time"] = time.time() - start_time
+    return result
+
+
+def map_fields_remote(remote: RemoteExecutor, source_directory: str, state: CFDState) -> Dict[str, Any]:
+    """Map the latest solution of a case in the project (see clone_solution_remote) onto active_run."""
+    if state["verbose"]:
+        logger.info(f"Mapping fields from {source_directory} onto the remote case...")
+
+    result = remote.run_command("mapFields", [f"../{source_directory}", *MAPFIELDS_ARGS])
+    return {
+        "success": result.get("success", False),
+        "return_code": result.get("exit_code", -1),
+        "execution_time": result.get("execution_time", 0),
+        "error": (result.get("stderr") or result.get("error")) if not result.get("success") else None
+    }
+
+
+def clone_solution_remote(remote: RemoteExecutor, directory: str) -> Dict[str, Any]:
+    """
+    Copy the mesh and latest time of active_run to another directory of the project.
+
+    Every case of a project is meshed and solved in active_run, so a solution
+    that a later case maps its fields from has to be kept aside first. The
+    directory must be a plain name next to active_run (e.g. mesh_level_2),
+    as an existing copy of it is removed first.
+    """
+    if not CLONE_DIRECTORY_RE.fullmatch(directory) or directory == "active_run":
+        return {"success": False, "directory": directory, "error": f"Invalid clone directory name '{directory}'"}
+    
+    # The file delete API only removes files inside active_run, so the old copy is removed with rm
+    result = remote.run_command("rm", ["-rf", "--", directory], working_directory=".")
+    if result.get("success"):
+        result = remote.run_command("foamCloneCase", ["-latestTime", "active_run", directory], working_directory=".")
+    return {
+        "success": result.get("success", False),
+        "directory": directory,
+        "error": (result.get("stderr") or result.get("error")) if not result.get("success") else None
+    }
+
+
 def run_blockmesh(case_directory: Path, state: CFDState) -> Dict[str, Any]:
     """Run blockMesh to generate the computational mesh."""
     log_file = case_directory / "log.blockMesh"
@@ -726,8 +807,8 @@ def run_checkmesh(case_directory: Path, state: CFDState) -> Dict[str, Any]:
         }
 
 
-def run_solver(case_directory: Path, solver: str, state: CFDState) -> Dict[str, Any]:
-    """Run the OpenFOAM solver."""
+def run_solver(case_directory: Path, solver: str, state: CFDState, processes: int = 1) -> Dict[str, Any]:
+    """Run the OpenFOAM solver, under mpirun when processes > 1 (the case must be decomposed)."""
     log_file = case_directory / f"log.{solver}"
     
     # Calculate expected runtime and steps for all flows when verbose
@@ -827,6 +908,9 @@ def run_solver(case_directory: Path, solver: str, state: CFDState) -> Dict[str,
         
         # Prepare environment with GPU support if requested
         env = prepare_openfoam_env(use_gpu=use_gpu)
+        if processes > 1:
+            env.update(MPI_ENVIRONMENT)
+        solver_cmd = ["mpirun", "-np", str(processes), solver, "-parallel"] if processes > 1 else [solver]
         
         if use_gpu:
             # Check if GPU libraries are actually available
@@ -853,13 +937,13 @@ def run_solver(case_directory: Path, solver: str, state: CFDState) -> Dict[str,
             # WSL path - run through WSL
             wsl_case_dir = str(case_directory).replace("\\", "/").replace("C:", "/mnt/c")
             cmd = ["wsl", "-e", "bash", "-c", 
-                   f"cd '{wsl_case_dir}' && source {settings.openfoam_path}/etc/bashrc && {solver}"]
+                   f"cd '{wsl_case_dir}' && source {settings.openfoam_path}/etc/bashrc && {' '.join(solver_cmd)}"]
         else:
             # Windows path - run directly
-            cmd = [solver]
+            cmd = solver_cmd
         
         if state["verbose"]:
-            logger.info(f"Starting {solver} solver...")
+            logger.info(f"Starting {solver} solver{f' on {processes} MPI processes' if processes > 1 else ''}...")
             logger.info(f"Log file: {log_file}")
         
         # For verbose mode, we could potentially stream the output
@@ -1013,8 +1097,221 @@ def run_solver(case_directory: Path, solver: str, state: CFDState) -> Dict[str,
         }
 
 
+def get_available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def estimate_total_cells(state: CFDState) -> int:
+    """Estimated cell count of the case mesh, 0 if unknown."""
+    mesh_config = state.get("mesh_config", {})
+    if mesh_config.get("total_cells"):
+        return int(mesh_config["total_cells"])
+    if mesh_config.get("resolution"):
+        return calculate_total_cells(mesh_config)
+    return 0
+
+
+def choose_subdomain_count(total_cells: int, cores: int, max_processes: Optional[int] = None) -> int:
+    """Number of MPI processes for a mesh: one per core, but no fewer than MIN_CELLS_PER_PROCESS cells each."""
+    limit = min(cores, max_processes) if max_processes else cores
+    return max(1, min(limit, total_cells // MIN_CELLS_PER_PROCESS))
+
+
+def plan_parallel_run(state: CFDState, cores: int) -> Dict[str, Any]:
+    """
+    Decide how a solver run is distributed.
+    
+    Parallel execution is opt-in (state["parallel_execution"]); the optional
+    state["parallel_settings"] may set "method" (scotch or hierarchical) and
+    "max_processes". A plan with one process means a serial run.
+    """
+    settings = state.get("parallel_settings") or {}
+    total_cells = estimate_total_cells(state)
+    
+    processes = 1
+    if state.get("parallel_execution", False):
+        processes = choose_subdomain_count(total_cells, cores, settings.get("max_processes"))
+    
+    method = settings.get("method", "scotch")
+    if method not in DECOMPOSITION_METHODS:
+        logger.warning(f"Unknown decomposition method '{method}', using scotch")
+        method = "scotch"
+    
+    return {"processes": processes, "method": method, "total_cells": total_cells, "cores": cores}
+
+
+def solver_performance(solver: str, plan: Dict[str, Any], wall_time: float, time_steps: int,
+                       state: CFDState) -> Dict[str, Any]:
+    """
+    Throughput of a solver run and, for parallel runs, its scaling efficiency.
+    
+    Efficiency is parallel throughput (cell-steps per second) divided by the
+    process count times the serial throughput. The serial reference is
+    state["parallel_settings"]["serial_cell_steps_per_second"] if given,
+    otherwise the latest serial run of the same solver in this process.
+    """
+    processes = plan["processes"]
+    cell_steps = plan["total_cells"] * time_steps
+    throughput = cell_steps / wall_time if wall_time > 0 and cell_steps > 0 else None
+    
+    performance = {
+        "processes": processes,
+        "method": plan["method"] if processes > 1 else None,
+        "total_cells": plan["total_cells"],
+        "time_steps": time_steps,
+        "solver_wall_time": wall_time,
+        "cell_steps_per_second": throughput,
+        "speedup": None,
+        "scaling_efficiency": None
+    }
+    if not throughput:
+        return performance
+    
+    if processes == 1:
+        _serial_throughput[solver] = throughput
+        return performance
+    
+    reference = (state.get("parallel_settings") or {}).get("serial_cell_steps_per_second") or _serial_throughput.get(solver)
+    if reference:
+        performance["speedup"] = throughput / reference
+        performance["scaling_efficiency"] = performance["speedup"] / processes
+    return performance
+
+
+def execute_solver(case_directory: Path, solver: str, state: CFDState) -> Dict[str, Any]:
+    """Run the solver serially or, in parallel mode, decomposed over MPI processes."""
+    plan = plan_parallel_run(state, get_available_cores())
+    
+    if plan["processes"] == 1:
+        start_time = time.time()
+        result = run_solver(case_directory, solver, state)
+        wall_time = time.time() - start_time
+        time_steps = result.get("solver_info", {}).get("iterations", 0)
+        result["performance"] = solver_performance(solver, plan, wall_time, time_steps, state)
+        return result
+    
+    return run_solver_parallel(case_directory, solver, state, plan)
+
+
+def run_solver_parallel(case_directory: Path, solver: str, state: CFDState, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Write decomposeParDict, then run decomposePar, mpirun <solver> -parallel and reconstructPar."""
+    processes = plan["processes"]
+    if state["verbose"]:
+        logger.info(f"Parallel run: {processes} MPI processes ({plan['method']} decomposition of "
+                    f"~{plan['total_cells']} cells, {plan['cores']} cores available)")
+    
+    resolution = state.get("mesh_config", {}).get("resolution")
+    write_decompose_par_dict(case_directory, processes, plan["method"], resolution)
+    
+    start_time = time.time()
+    decompose_result = run_openfoam_utility(case_directory, "decomposePar", ["-force"])
+    decompose_time = time.time() - start_time
+    if not decompose_result["success"]:
+        return {**decompose_result, "solver_info": {}, "error": f"decomposePar failed: {decompose_result['error']}"}
+    
+    start_time = time.time()
+    result = run_solver(case_directory, solver, state, processes=processes)
+    solver_time = time.time() - start_time
+    
+    # Reconstruct even after a failed run so the written time steps can be inspected
+    start_time = time.time()
+    reconstruct_result = run_openfoam_utility(case_directory, "reconstructPar", [])
+    reconstruct_time = time.time() - start_time
+    if result["success"] and not reconstruct_result["success"]:
+        result["success"] = False
+        result["error"] = f"reconstructPar failed: {reconstruct_result['error']}"
+    
+    time_steps = result.get("solver_info", {}).get("iterations", 0)
+    performance = solver_performance(solver, plan, solver_time, time_steps, state)
+    performance["decompose_time"] = decompose_time
+    performance["reconstruct_time"] = reconstruct_time
+    result["performance"] = performance
+    result["log_files"] = {
+        "decomposePar": decompose_result["log_file"],
+        "reconstructPar": reconstruct_result["log_file"]
+    }
+    
+    if state["verbose"] and performance["scaling_efficiency"] is not None:
+        logger.info(f"Parallel speedup {performance['speedup']:.2f}x on {processes} processes "
+                    f"({performance['scaling_efficiency'] * 100:.0f}% scaling efficiency)")
+    return result
+
+
+def run_openfoam_utility(case_directory: Path, application: str, args: List[str], timeout: int = 1800) -> Dict[str, Any]:
+    """Run an OpenFOAM utility (e.g. decomposePar) in the case directory, logging to log.<application>."""
+    log_file = case_directory / f"log.{application}"
+    
+    try:
+        # Get settings to check if we need WSL
+        import sys
+        sys.path.append('src')
+        from foamai.config import get_settings
+        settings = get_settings()
+        
+        # Prepare environment
+        env = prepare_openfoam_env()
+        
+        # Determine if we need to use WSL
+        if settings.openfoam_path and settings.openfoam_path.startswith("/"):
+            # WSL path - run through WSL
+            wsl_case_dir = str(case_directory).replace("\\", "/").replace("C:", "/mnt/c")
+            cmd = ["wsl", "-e", "bash", "-c", 
+                   f"cd '{wsl_case_dir}' && source {settings.openfoam_path}/etc/bashrc && {' '.join([application, *args])}"]
+            cwd = None
+        else:
+            cmd = [application, *args]
+            cwd = case_directory
+        
+        with open(log_file, "w") as f:
+            result = subprocess.run(
+                cmd,
+                cwd=cwd,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                env=env if cwd else None,
+                timeout=timeout
+            )
+        
+        return {
+            "success": result.returncode == 0,
+            "return_code": result.returncode,
+            "log_file": str(log_file),
+            "error": None if result.returncode == 0 else f"{application} failed with code {result.returncode}"
+        }
+        
+    except subprocess.TimeoutExpired:
+        return {
+            "success": False,
+            "return_code": -1,
+            "log_file": str(log_file),
+            "error": f"{application} timed out"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "return_code": -1,
+            "log_file": str(log_file),
+            "error": str(e)
+        }
+
+
 def prepare_openfoam_env(use_gpu: bool = False) -> Dict[str, str]:
-    """Prepare OpenFOAM environment variables."""
+    """Prepare OpenFOAM environment variables.
+    
+    The environment is built once per GPU setting; callers get their own
+    copy so they can add to it.
+    """
+    if use_gpu not in _openfoam_env_cache:
+        _openfoam_env_cache[use_gpu] = _build_openfoam_env(use_gpu)
+    return dict(_openfoam_env_cache[use_gpu])
+
+
+def _build_openfoam_env(use_gpu: bool) -> Dict[str, str]:
+    """Build the OpenFOAM environment from the process environment and settings."""
     import os
     env = os.environ.copy()
     
@@ -1096,164 +1393,29 @@ def prepare_openfoam_env(use_gpu: bool = False) -> Dict[str, str]:
 
 def parse_blockmesh_output(log_file: Path) -> Dict[str, Any]:
     """Parse blockMesh log file for mesh information."""
-    mesh_info = {
-        "total_cells": 0,
-        "total_points": 0,
-        "total_faces": 0,
-        "boundary_patches": {},
-        "warnings": [],
-        "errors": []
-    }
-    
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
-        
-        # Extract mesh statistics
-        cells_match = re.search(r"cells:\s*(\d+)", content)
-        if cells_match:
-            mesh_info["total_cells"] = int(cells_match.group(1))
-        
-        points_match = re.search(r"points:\s*(\d+)", content)
-        if points_match:
-            mesh_info["total_points"] = int(points_match.group(1))
-        
-        faces_match = re.search(r"faces:\s*(\d+)", content)
-        if faces_match:
-            mesh_info["total_faces"] = int(faces_match.group(1))
-        
-        # Extract warnings and errors
-        warnings = re.findall(r"Warning.*", content)
-        mesh_info["warnings"] = warnings[:10]  # Limit to first 10
-        
-        errors = re.findall(r"Error.*", content)
-        mesh_info["errors"] = errors[:10]  # Limit to first 10
-        
+        return OpenFOAMLogParser.parse_file(log_file).blockmesh_info()
     except Exception as e:
         logger.warning(f"Could not parse blockMesh output: {e}")
-    
-    return mesh_info
+        return OpenFOAMLogParser().blockmesh_info()
 
 
 def parse_checkmesh_output(log_file: Path) -> Dict[str, Any]:
     """Parse checkMesh log file for mesh quality metrics."""
-    mesh_quality = {
-        "mesh_ok": False,
-        "non_orthogonality": {"max": 0, "average": 0},
-        "skewness": {"max": 0, "average": 0},
-        "aspect_ratio": {"max": 0, "average": 0},
-        "warnings": [],
-        "errors": []
-    }
-    
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
-        
-        # Check overall mesh status
-        if "Mesh OK" in content:
-            mesh_quality["mesh_ok"] = True
-        
-        # Extract non-orthogonality
-        non_orth_match = re.search(r"Max non-orthogonality = ([\d.]+)", content)
-        if non_orth_match:
-            mesh_quality["non_orthogonality"]["max"] = float(non_orth_match.group(1))
-        
-        # Extract skewness
-        skewness_match = re.search(r"Max skewness = ([\d.]+)", content)
-        if skewness_match:
-            mesh_quality["skewness"]["max"] = float(skewness_match.group(1))
-        
-        # Extract warnings and errors
-        warnings = re.findall(r"Warning.*", content)
-        mesh_quality["warnings"] = warnings[:10]
-        
-        errors = re.findall(r"Error.*", content)
-        mesh_quality["errors"] = errors[:10]
-        
+        return OpenFOAMLogParser.parse_file(log_file).checkmesh_info()
     except Exception as e:
         logger.warning(f"Could not parse checkMesh output: {e}")
-    
-    return mesh_quality
+        return OpenFOAMLogParser().checkmesh_info()
 
 
 def parse_solver_output(log_file: Path, solver: str) -> Dict[str, Any]:
     """Parse solver log file for convergence and performance metrics."""
-    solver_info = {
-        "converged": False,
-        "iterations": 0,
-        "final_residuals": {},
-        "execution_time": 0,
-        "warnings": [],
-        "errors": []
-    }
-    
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
-        
-        # Extract final residuals (simplified parsing) - use robust regex for scientific notation
-        residual_patterns = {
-            "p": r"Solving for p.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "Ux": r"Solving for Ux.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "Uy": r"Solving for Uy.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "Uz": r"Solving for Uz.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "k": r"Solving for k.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "omega": r"Solving for omega.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)",
-            "epsilon": r"Solving for epsilon.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)"
-        }
-        
-        for field, pattern in residual_patterns.items():
-            matches = re.findall(pattern, content)
-            if matches:
-                try:
-                    solver_info["final_residuals"][field] = float(matches[-1])  # Take last value
-                except ValueError:
-                    # Skip malformed numbers
-                    pass
-        
-        # Check convergence - more robust detection
-        if "SIMPLE solution converged" in content or "PIMPLE: converged" in content:
-            solver_info["converged"] = True
-        elif "FOAM exiting" not in content and solver_info["final_residuals"]:
-            # If solver completed without fatal errors and has final residuals, consider it converged
-            solver_info["converged"] = True
-        elif "ExecutionTime" in content and solver_info["final_residuals"]:
-            # If execution time is reported and we have residuals, solver likely completed successfully
-            solver_info["converged"] = True
-        
-        # Extract execution time
-        time_match = re.search(r"ExecutionTime = ([\d.]+(?:[eE][+-]?\d+)?) s", content)
-        if time_match:
-            try:
-                solver_info["execution_time"] = float(time_match.group(1))
-            except ValueError:
-                pass  # Skip malformed numbers
-        
-        # Extract iterations/time steps
-        if "steady" in solver.lower():
-            iteration_matches = re.findall(r"Time = (\d+)", content)
-            if iteration_matches:
-                solver_info["iterations"] = int(iteration_matches[-1])
-        else:
-            time_matches = re.findall(r"Time = ([\d.]+(?:[eE][+-]?\d+)?)", content)
-            if time_matches:
-                try:
-                    solver_info["final_time"] = float(time_matches[-1])
-                except ValueError:
-                    pass  # Skip malformed numbers
-        
-        # Extract warnings and errors
-        warnings = re.findall(r"Warning.*", content)
-        solver_info["warnings"] = warnings[:10]
-        
-        errors = re.findall(r"Error.*", content)
-        solver_info["errors"] = errors[:10]
-        
+        return OpenFOAMLogParser.parse_file(log_file).solver_info(solver)
     except Exception as e:
         logger.warning(f"Could not parse {solver} output: {e}")
-    
-    return solver_info
+        return OpenFOAMLogParser().solver_info(solver)
 
 
 def parse_convergence_metrics(simulation_results: Dict[str, Any]) -> Dict[str, Any]:
@@ -1566,35 +1728,11 @@ def copy_latest_mesh(case_directory: Path) -> None:
 
 def parse_snappyhexmesh_output(log_file: Path) -> Dict[str, Any]:
     """Parse snappyHexMesh log file for mesh information."""
-    info = {
-        "cells_added": 0,
-        "final_cells": 0,
-        "layers_added": False,
-        "snapping_iterations": 0
-    }
-    
     try:
-        with open(log_file, "r") as f:
-            content = f.read()
-            
-            # Look for final mesh statistics
-            final_cells_match = re.search(r"Mesh\s+:\s+cells:(\d+)", content)
-            if final_cells_match:
-                info["final_cells"] = int(final_cells_match.group(1))
-            
-            # Check if layers were added
-            if "Layer addition iteration" in content:
-                info["layers_added"] = True
-            
-            # Count snapping iterations
-            snap_matches = re.findall(r"Morph iteration (\d+)", content)
-            if snap_matches:
-                info["snapping_iterations"] = len(snap_matches)
-    
+        return OpenFOAMLogParser.parse_file(log_file).snappyhexmesh_info()
     except Exception as e:
         logger.warning(f"Failed to parse snappyHexMesh output: {e}")
-    
-    return info 
+        return OpenFOAMLogParser().snappyhexmesh_info()
 
 
 def remap_boundary_conditions_after_mesh(case_directory: Path, state: CFDState) -> Dict[str, Any]:
@@ -1909,17 +2047,22 @@ def run_checkmesh_remote(remote: RemoteExecutor, state: CFDState) -> Dict[str, A
         }
 
 
-def run_solver_remote(remote: RemoteExecutor, solver: str, state: CFDState) -> Dict[str, Any]:
-    """Run OpenFOAM solver remotely."""
+def run_solver_remote(remote: RemoteExecutor, solver: str, state: CFDState, processes: int = 1) -> Dict[str, Any]:
+    """Run OpenFOAM solver remotely, under mpirun when processes > 1."""
     try:
         if state["verbose"]:
             logger.info(f"Executing {solver} on remote server...")
         
-        # Use foamRun for modern OpenFOAM or direct solver
+        # Use foamRun for modern OpenFOAM or direct solver; the server derives
+        # the time limit from the case's controlDict
         if solver in ["incompressibleFluid", "compressibleFluid", "multiphaseFluid"]:
-            result = remote.run_foamrun(solver, timeout=1800)
+            result = remote.run_foamrun(solver, processes=processes)
         else:
-            result = remote.run_solver(solver, timeout=1800)
+            result = remote.run_solver(solver, processes=processes)
+        
+        solver_info = parse_solver_output_from_text(result.get("stdout", ""), solver)
+        if result.get("job_id"):
+            solver_info.update(get_residual_history_remote(remote, result["job_id"]))
         
         return {
             "success": result.get("success", False),
@@ -1927,7 +2070,7 @@ def run_solver_remote(remote: RemoteExecutor, solver: str, state: CFDState) -> D
             "stdout": result.get("stdout", ""),
             "stderr": result.get("stderr", ""),
             "execution_time": result.get("execution_time", 0),
-            "solver_info": parse_solver_output_from_text(result.get("stdout", ""), solver),
+            "solver_info": solver_info,
             "error": result.get("stderr") if not result.get("success") else None
         }
         
@@ -1943,6 +2086,91 @@ def run_solver_remote(remote: RemoteExecutor, solver: str, state: CFDState) -> D
         }
 
 
+def execute_solver_remote(remote: RemoteExecutor, solver: str, state: CFDState) -> Dict[str, Any]:
+    """
+    Run the solver remotely, serially or decomposed over MPI processes.
+    
+    The process count is planned from the server's core count; the
+    decomposeParDict is generated here and uploaded before decomposePar runs.
+    """
+    cores = (remote.get_cpu_count() or 1) if state.get("parallel_execution", False) else 1
+    plan = plan_parallel_run(state, cores)
+    processes = plan["processes"]
+    
+    if processes == 1:
+        result = run_solver_remote(remote, solver, state)
+        time_steps = result.get("solver_info", {}).get("iterations", 0)
+        result["performance"] = solver_performance(solver, plan, result.get("execution_time", 0), time_steps, state)
+        return result
+    
+    if state["verbose"]:
+        logger.info(f"Parallel run: {processes} MPI processes ({plan['method']} decomposition of "
+                    f"~{plan['total_cells']} cells, {cores} cores on server)")
+    
+    try:
+        resolution = state.get("mesh_config", {}).get("resolution")
+        decompose_dict = generate_decompose_par_dict(processes, plan["method"], resolution)
+        remote.upload_text_file(format_foam_dict(decompose_dict, "decomposeParDict"), "system/decomposeParDict")
+    except Exception as e:
+        logger.error(f"Failed to upload decomposeParDict: {str(e)}")
+        return {"success": False, "return_code": -1, "stdout": "", "stderr": str(e), "solver_info": {}, "error": str(e)}
+    
+    decompose_result = remote.run_decomposepar()
+    if not decompose_result.get("success"):
+        return {
+            "success": False,
+            "return_code": decompose_result.get("exit_code", -1),
+            "stdout": decompose_result.get("stdout", ""),
+            "stderr": decompose_result.get("stderr", ""),
+            "solver_info": {},
+            "error": f"decomposePar failed: {decompose_result.get('stderr')}"
+        }
+    
+    result = run_solver_remote(remote, solver, state, processes=processes)
+    
+    # Reconstruct even after a failed run so the written time steps can be inspected
+    reconstruct_result = remote.run_reconstructpar()
+    if result["success"] and not reconstruct_result.get("success"):
+        result["success"] = False
+        result["error"] = f"reconstructPar failed: {reconstruct_result.get('stderr')}"
+    
+    time_steps = result.get("solver_info", {}).get("iterations", 0)
+    performance = solver_performance(solver, plan, result.get("execution_time", 0), time_steps, state)
+    performance["decompose_time"] = decompose_result.get("execution_time", 0)
+    performance["reconstruct_time"] = reconstruct_result.get("execution_time", 0)
+    result["performance"] = performance
+    
+    if state["verbose"] and performance["scaling_efficiency"] is not None:
+        logger.info(f"Parallel speedup {performance['speedup']:.2f}x on {processes} processes "
+                    f"({performance['scaling_efficiency'] * 100:.0f}% scaling efficiency)")
+    return result
+
+
+def get_residual_history_remote(remote: RemoteExecutor, job_id: str) -> Dict[str, Any]:
+    """Fetch the server-parsed residual history of a solver job."""
+    try:
+        history = remote.get_residuals(job_id=job_id)
+    except Exception as e:
+        logger.warning(f"Could not fetch residual history for job {job_id}: {str(e)}")
+        return {}
+    if not history.get("row_count"):
+        return {}
+    
+    # Last reported final residual per field, as parse_solver_output() gives locally
+    final_residuals = {}
+    for field, values in history.get("final_residuals", {}).items():
+        reported = [value for value in values if value is not None]
+        if reported:
+            final_residuals[field] = reported[-1]
+    
+    return {
+        "final_residuals": final_residuals,
+        "final_time": history["time"][-1],
+        "iterations": history["row_count"],
+        "residual_history": history
+    }
+
+
 def run_snappyhexmesh_remote(remote: RemoteExecutor, state: CFDState) -> Dict[str, Any]:
     """Run snappyHexMesh remotely."""
     try:
@@ -2030,145 +2258,19 @@ def run_createpatch_remote(remote: RemoteExecutor, state: CFDState) -> Dict[str,
 # Text parsing functions (for parsing command output from server responses)
 def parse_blockmesh_output_from_text(output_text: str) -> Dict[str, Any]:
     """Parse blockMesh output from text string."""
-    mesh_info = {
-        "total_cells": 0,
-        "total_points": 0,
-        "total_faces": 0,
-        "mesh_ok": False
-    }
-    
-    try:
-        for line in output_text.split('\n'):
-            if "cells:" in line.lower():
-                # Extract cell count
-                match = re.search(r'cells:\s*(\d+)', line, re.IGNORECASE)
-                if match:
-                    mesh_info["total_cells"] = int(match.group(1))
-            
-            elif "points:" in line.lower():
-                # Extract point count
-                match = re.search(r'points:\s*(\d+)', line, re.IGNORECASE)
-                if match:
-                    mesh_info["total_points"] = int(match.group(1))
-            
-            elif "faces:" in line.lower():
-                # Extract face count
-                match = re.search(r'faces:\s*(\d+)', line, re.IGNORECASE)
-                if match:
-                    mesh_info["total_faces"] = int(match.group(1))
-            
-            elif "end" in line.lower() and ("blockmesh" in line.lower() or "successfully" in line.lower()):
-                mesh_info["mesh_ok"] = True
-        
-    except Exception as e:
-        logger.warning(f"Error parsing blockMesh output: {str(e)}")
-    
-    return mesh_info
+    return OpenFOAMLogParser.parse_text(output_text).blockmesh_info()
 
 
 def parse_checkmesh_output_from_text(output_text: str) -> Dict[str, Any]:
     """Parse checkMesh output from text string."""
-    mesh_quality = {
-        "mesh_ok": False,
-        "quality_score": 0.0,
-        "errors": [],
-        "warnings": []
-    }
-    
-    try:
-        for line in output_text.split('\n'):
-            line_lower = line.lower()
-            
-            if "mesh ok" in line_lower or "successful" in line_lower:
-                mesh_quality["mesh_ok"] = True
-            
-            elif "failed" in line_lower or "error" in line_lower:
-                mesh_quality["errors"].append(line.strip())
-            
-            elif "warning" in line_lower:
-                mesh_quality["warnings"].append(line.strip())
-            
-            # Extract quality metrics if available
-            elif "aspect ratio" in line_lower:
-                match = re.search(r'(\d+\.?\d*)', line)
-                if match:
-                    aspect_ratio = float(match.group(1))
-                    # Simple quality scoring based on aspect ratio
-                    mesh_quality["quality_score"] = max(0.0, min(1.0, 1.0 / max(1.0, aspect_ratio / 10.0)))
-        
-        # If no specific quality score found, use binary success/failure
-        if mesh_quality["quality_score"] == 0.0:
-            mesh_quality["quality_score"] = 1.0 if mesh_quality["mesh_ok"] else 0.0
-        
-    except Exception as e:
-        logger.warning(f"Error parsing checkMesh output: {str(e)}")
-    
-    return mesh_quality
+    return OpenFOAMLogParser.parse_text(output_text).checkmesh_info()
 
 
 def parse_solver_output_from_text(output_text: str, solver: str) -> Dict[str, Any]:
     """Parse solver output from text string."""
-    solver_info = {
-        "execution_time": 0.0,
-        "final_time": 0.0,
-        "iterations": 0,
-        "converged": False
-    }
-    
-    try:
-        for line in output_text.split('\n'):
-            line_lower = line.lower()
-            
-            # Look for time execution info
-            if "execution time" in line_lower or "cpu time" in line_lower:
-                match = re.search(r'(\d+\.?\d*)', line)
-                if match:
-                    solver_info["execution_time"] = float(match.group(1))
-            
-            # Look for final time
-            elif "time =" in line_lower or "final time" in line_lower:
-                match = re.search(r'(\d+\.?\d*)', line)
-                if match:
-                    solver_info["final_time"] = float(match.group(1))
-            
-            # Look for convergence indicators
-            elif "converged" in line_lower or "solution converged" in line_lower:
-                solver_info["converged"] = True
-            
-            elif "end" in line_lower and solver.lower() in line_lower:
-                # Solver completed
-                pass
-        
-    except Exception as e:
-        logger.warning(f"Error parsing {solver} output: {str(e)}")
-    
-    return solver_info
+    return OpenFOAMLogParser.parse_text(output_text).solver_info(solver)
 
 
 def parse_snappyhexmesh_output_from_text(output_text: str) -> Dict[str, Any]:
     """Parse snappyHexMesh output from text string."""
-    mesh_info = {
-        "final_cells": 0,
-        "layers_added": False,
-        "mesh_ok": False
-    }
-    
-    try:
-        for line in output_text.split('\n'):
-            line_lower = line.lower()
-            
-            if "cells:" in line_lower and "final" in line_lower:
-                match = re.search(r'(\d+)', line)
-                if match:
-                    mesh_info["final_cells"] = int(match.group(1))
-            
-            elif "layer" in line_lower and ("added" in line_lower or "successful" in line_lower):
-                mesh_info["layers_added"] = True
-            
-            elif "successfully completed" in line_lower or "end snappy" in line_lower:
-                mesh_info["mesh_ok"] = True
-        
-    except Exception as e:
-        logger.warning(f"Error parsing snappyHexMesh output: {str(e)}")
-    
-    return mesh_info 
\ No newline at end of file
+    return OpenFOAMLogParser.parse_text(output_text).snappyhexmesh_info()
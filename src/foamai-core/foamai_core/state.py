@@ -118,6 +118,7 @@ class CFDState(TypedDict):
     mesh_convergence_active: bool = False
     mesh_convergence_levels: int = 4
     mesh_convergence_threshold: float = 1.0
+    mesh_convergence_warm_start: bool = False  # Start each level from the previous level's mapped solution
     mesh_convergence_target_params: List[str] = []
     mesh_convergence_results: Dict[str, Any] = {}
     mesh_convergence_report: Dict[str, Any] = {}
@@ -127,6 +128,10 @@ class CFDState(TypedDict):
     use_gpu: bool = False
     gpu_info: Dict[str, Any] = {} 
 
+    # MPI-parallel solver execution (decomposePar -> mpirun -> reconstructPar)
+    parallel_execution: bool = False
+    parallel_settings: Dict[str, Any] = {}  # "method" (scotch/hierarchical), "max_processes", "serial_cell_steps_per_second"
+
     # Remote execution configuration
     execution_mode: str  # "local" or "remote"
     server_url: Optional[str]  # URL of remote OpenFOAM server
@@ -0,0 +1,404 @@
+"""Vectorized reading, transforming and writing of STL surfaces.
+
+Binary STLs are memory-mapped as a NumPy structured array (STL_DTYPE, one
+50-byte record per facet), so opening even a multi-GB file is instant and
+only the pages that are touched are read. Transforms work on whole blocks of
+facets at once and can be applied in place on a writable map, which writes
+the result back without another copy of the data.
+
+ASCII STLs are parsed in large chunks: each chunk is tokenized with one
+bytes.split(), the number tokens are picked out as array columns and
+converted in one step. Named solids are kept, since snappyHexMesh uses them
+as surface regions.
+
+analyze_stl() measures a surface for sizing a mesh around it: bounding box,
+surface and frontal area, feature edges and watertightness.
+"""
+
+import mmap
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# One binary STL facet. v1/v2/v3 and vertices overlap, so the corners can be
+# addressed one at a time or as a (3, 3) block for vectorized transforms.
+STL_DTYPE = np.dtype({
+    "names": ["normal", "v1", "v2", "v3", "vertices", "attr"],
+    "formats": [("<f4", (3,)), ("<f4", (3,)), ("<f4", (3,)), ("<f4", (3,)), ("<f4", (3, 3)), "<u2"],
+    "offsets": [0, 12, 24, 36, 12, 48],
+    "itemsize": 50,
+})
+BINARY_HEADER_SIZE = 84
+
+# Facets processed per step when transforming, to bound temporary memory
+TRANSFORM_BLOCK_SIZE = 262_144
+# Bytes of ASCII STL tokenized at a time
+ASCII_CHUNK_SIZE = 32 * 1024 * 1024
+# Normals of adjacent facets further apart than this make their shared edge a
+# feature edge (surfaceFeatureExtract's includedAngle 150)
+FEATURE_ANGLE_DEG = 30.0
+
+PathLike = Union[str, Path]
+
+
+class STLSurface(NamedTuple):
+    facets: np.ndarray  # STL_DTYPE records (a np.memmap for binary files)
+    solids: List[Tuple[str, int]]  # (name, facet count) in file order
+    binary: bool
+
+
+def is_binary_stl(path: PathLike) -> bool:
+    """Whether an STL file is binary.
+
+    ASCII files start with 'solid', but so do many binary headers; a file whose
+    size matches the facet count in its header is taken to be binary.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        header = f.read(BINARY_HEADER_SIZE)
+    if len(header) == BINARY_HEADER_SIZE:
+        count = int(np.frombuffer(header, dtype="<u4", count=1, offset=80)[0])
+        if size == BINARY_HEADER_SIZE + count * STL_DTYPE.itemsize:
+            return True
+    return not header.lstrip().startswith(b"solid")
+
+
+def read_stl(path: PathLike, writable: bool = False) -> STLSurface:
+    """Open an STL file.
+
+    Binary files are memory-mapped (read-only unless writable, in which case
+    changes to facets go straight to the file). ASCII files are parsed into
+    memory; writable has no effect for them.
+    """
+    path = Path(path)
+    if not is_binary_stl(path):
+        return read_ascii_stl(path)
+
+    with open(path, "rb") as f:
+        header = f.read(BINARY_HEADER_SIZE)
+    # A header count beyond the end of a truncated file must not be mapped
+    count = min(int(np.frombuffer(header, dtype="<u4", count=1, offset=80)[0]),
+                (path.stat().st_size - BINARY_HEADER_SIZE) // STL_DTYPE.itemsize)
+    name = header[:80].split(b"\0", 1)[0].decode("ascii", errors="replace").strip()
+    if name.startswith("solid"):
+        name = name[5:].strip()
+    if count == 0:
+        return STLSurface(np.zeros(0, dtype=STL_DTYPE), [(name, 0)], True)
+    facets = np.memmap(path, dtype=STL_DTYPE, mode="r+" if writable else "r",
+                       offset=BINARY_HEADER_SIZE, shape=(count,))
+    return STLSurface(facets, [(name, count)], True)
+
+
+def read_ascii_stl(path: PathLike, chunk_size: int = ASCII_CHUNK_SIZE) -> STLSurface:
+    """Parse an ASCII STL file, possibly with several named solids."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        solids = []
+        blocks = []
+        # Plain find() rather than a regex scan: facets never contain 'solid'
+        start = data.find(b"solid")
+        if start < 0:
+            raise ValueError(f"No 'solid' found in ASCII STL: {path}")
+        while start >= 0:
+            header_end = data.find(b"\n", start)
+            header_end = len(data) if header_end < 0 else header_end
+            end = data.find(b"endsolid", header_end)
+            end = len(data) if end < 0 else end
+            facets = _parse_ascii_range(data, header_end, end, chunk_size)
+            solids.append((data[start + 5:header_end].decode("ascii", errors="replace").strip(), len(facets)))
+            blocks.append(facets)
+            start = data.find(b"\n", end)
+            start = -1 if start < 0 else data.find(b"solid", start)
+    facets = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+    return STLSurface(facets, solids, False)
+
+
+def _parse_ascii_range(data, start: int, end: int, chunk_size: int) -> np.ndarray:
+    """Parse the facets between two byte offsets, chunk by chunk."""
+    blocks = []
+    position = start
+    while position < end:
+        chunk_end = min(end, position + chunk_size)
+        if chunk_end < end:
+            # Only whole facets: cut after the last 'endfacet' in the chunk
+            cut = data.rfind(b"endfacet", position, chunk_end)
+            if cut < 0:
+                cut = data.find(b"endfacet", chunk_end, end)
+            chunk_end = end if cut < 0 else cut + len(b"endfacet")
+        blocks.append(_parse_ascii_facets(data[position:chunk_end]))
+        position = chunk_end
+    if not blocks:
+        return np.zeros(0, dtype=STL_DTYPE)
+    return np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+
+
+# Token layout of one well-formed ASCII facet and where its 12 numbers are:
+# facet normal nx ny nz outer loop (vertex x y z) x3 endloop endfacet
+FACET_TOKENS = 21
+NUMBER_COLUMNS = [2, 3, 4, 8, 9, 10, 12, 13, 14, 16, 17, 18]
+
+
+def _parse_ascii_facets(chunk: bytes) -> np.ndarray:
+    tokens = chunk.split()
+    if not tokens:
+        return np.zeros(0, dtype=STL_DTYPE)
+
+    if len(tokens) % FACET_TOKENS == 0:
+        # Object array: no copy of the token bytes, and the numbers are
+        # gathered by column before converting
+        table = np.array(tokens, dtype=object).reshape(-1, FACET_TOKENS)
+        if (table[:, 1] == b"normal").all() and (table[:, 7] == b"vertex").all() and (table[:, 15] == b"vertex").all():
+            values = table[:, NUMBER_COLUMNS].astype(np.float32)
+            facets = np.zeros(len(table), dtype=STL_DTYPE)
+            facets["normal"] = values[:, :3]
+            facets["vertices"] = values[:, 3:].reshape(-1, 3, 3)
+            return facets
+
+    # Irregular layout (e.g. missing keywords or extra tokens): locate the
+    # numbers from their keywords
+    tokens = np.array(tokens)
+    offsets = np.arange(1, 4)
+    normal_at = np.flatnonzero(tokens == b"normal")
+    vertex_at = np.flatnonzero(tokens == b"vertex")
+    if len(vertex_at) != 3 * len(normal_at):
+        raise ValueError(f"Malformed ASCII STL: {len(normal_at)} facets but {len(vertex_at)} vertices")
+
+    facets = np.zeros(len(normal_at), dtype=STL_DTYPE)
+    facets["normal"] = tokens[normal_at[:, None] + offsets].astype(np.float32)
+    facets["vertices"] = tokens[vertex_at[:, None] + offsets].astype(np.float32).reshape(-1, 3, 3)
+    return facets
+
+
+def write_stl(path: PathLike, surface: STLSurface, binary: Optional[bool] = None) -> None:
+    """Write a surface as binary (default: as it was read) or ASCII STL."""
+    binary = surface.binary if binary is None else binary
+    if binary:
+        name = surface.solids[0][0] if surface.solids else ""
+        # No leading 'solid', which readers that only sniff the header take for ASCII
+        header = (name or "binary STL").encode("ascii", errors="replace")[:80].ljust(80, b" ")
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(np.uint32(len(surface.facets)).tobytes())
+            # Straight from the (possibly memory-mapped) records, no per-facet work
+            surface.facets.tofile(f)
+        return
+
+    template = ("  facet normal %.6e %.6e %.6e\n    outer loop\n"
+                + "      vertex %.6e %.6e %.6e\n" * 3
+                + "    endloop\n  endfacet\n")
+    solids = surface.solids or [("", len(surface.facets))]
+    with open(path, "w", buffering=8 * 1024 * 1024) as f:
+        first = 0
+        for name, count in solids:
+            f.write(f"solid {name}\n")
+            for block_start in range(first, first + count, TRANSFORM_BLOCK_SIZE):
+                block = surface.facets[block_start:min(first + count, block_start + TRANSFORM_BLOCK_SIZE)]
+                values = np.empty((len(block), 12), dtype=np.float64)
+                values[:, :3] = block["normal"]
+                values[:, 3:] = block["vertices"].reshape(-1, 9)
+                f.write("".join(template % tuple(row) for row in values.tolist()))
+            f.write(f"endsolid {name}\n")
+            first += count
+
+
+def rotation_matrix(axis: str, angle_deg: float) -> np.ndarray:
+    """Rotation by angle_deg degrees around the x, y or z axis."""
+    angle = np.radians(angle_deg)
+    c, s = np.cos(angle), np.sin(angle)
+    matrices = {
+        "x": [[1, 0, 0], [0, c, -s], [0, s, c]],
+        "y": [[c, 0, s], [0, 1, 0], [-s, 0, c]],
+        "z": [[c, -s, 0], [s, c, 0], [0, 0, 1]],
+    }
+    return np.array(matrices[axis.lower()], dtype=np.float64)
+
+
+def transform_facets(
+    facets: np.ndarray,
+    rotation: Optional[np.ndarray] = None,
+    center: Optional[Sequence[float]] = None,
+    translation: Optional[Sequence[float]] = None,
+    block_size: int = TRANSFORM_BLOCK_SIZE,
+) -> None:
+    """Rotate about center, then translate, all facets in place and recompute their normals."""
+    rotation = np.eye(3) if rotation is None else np.asarray(rotation, dtype=np.float64)
+    center = np.zeros(3) if center is None else np.asarray(center, dtype=np.float64)
+    shift = center + (np.zeros(3) if translation is None else np.asarray(translation, dtype=np.float64))
+
+    for start in range(0, len(facets), block_size):
+        block = facets[start:start + block_size]
+        # p' = R (p - c) + c + t, as one matmul over all corners of the block
+        vertices = (block["vertices"].astype(np.float64) - center) @ rotation.T + shift
+        block["vertices"] = vertices
+        block["normal"] = facet_normals(vertices)
+
+
+def facet_normals(vertices: np.ndarray) -> np.ndarray:
+    """Unit normals of (n, 3, 3) triangle corners, zero for degenerate facets."""
+    normals = np.cross(vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+    normals[lengths[:, 0] == 0] = 0
+    return normals
+
+
+def transform_stl(
+    input_path: PathLike,
+    output_path: Optional[PathLike] = None,
+    rotation: Optional[np.ndarray] = None,
+    center: Optional[Sequence[float]] = None,
+    translation: Optional[Sequence[float]] = None,
+) -> None:
+    """Transform an STL file, in place or into output_path, keeping its format.
+
+    Binary files are copied (if needed) and transformed through a writable
+    memory map; ASCII files are parsed, transformed and rewritten.
+    """
+    input_path = Path(input_path)
+    output_path = Path(output_path) if output_path is not None else input_path
+
+    if is_binary_stl(input_path):
+        if output_path != input_path:
+            shutil.copyfile(input_path, output_path)
+        surface = read_stl(output_path, writable=True)
+        transform_facets(surface.facets, rotation, center, translation)
+        if isinstance(surface.facets, np.memmap):
+            surface.facets.flush()
+        return
+
+    surface = read_ascii_stl(input_path)
+    transform_facets(surface.facets, rotation, center, translation)
+    write_stl(output_path, surface)
+
+
+def stl_center(path: PathLike) -> List[float]:
+    """Mean of all facet corners (each shared vertex counted once per facet)."""
+    facets = read_stl(path).facets
+    total = np.zeros(3)
+    for start in range(0, len(facets), TRANSFORM_BLOCK_SIZE):
+        total += facets["vertices"][start:start + TRANSFORM_BLOCK_SIZE].sum(axis=(0, 1), dtype=np.float64)
+    return (total / max(1, 3 * len(facets))).tolist()
+
+
+def analyze_stl(
+    path: PathLike,
+    flow_direction: Sequence[float] = (1.0, 0.0, 0.0),
+    rotation: Optional[np.ndarray] = None,
+    center: Optional[Sequence[float]] = None,
+    feature_angle_deg: float = FEATURE_ANGLE_DEG,
+) -> Dict[str, Any]:
+    """
+    Geometric properties of an STL surface for sizing a snappyHexMesh case.
+
+    With rotation (about center), the properties are those of the rotated
+    surface, so they can be computed before the rotation is applied.
+
+    Returns:
+        Dict with n_facets, bounds_min/bounds_max/extent/center (of the bounding
+        box), surface_area, frontal_area (projected on the plane normal to
+        flow_direction), n_edges, feature_edges, feature_edge_length,
+        feature_edge_density (feature edges per edge), open_edges,
+        non_manifold_edges and watertight
+    """
+    facets = read_stl(path).facets
+    if len(facets) == 0:
+        raise ValueError(f"STL file has no facets: {path}")
+    flow = np.asarray(flow_direction, dtype=np.float64)
+    flow = flow / np.linalg.norm(flow)
+    rotation = None if rotation is None else np.asarray(rotation, dtype=np.float64)
+    center = np.zeros(3) if center is None else np.asarray(center, dtype=np.float64)
+
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    area = 0.0
+    frontal_positive = frontal_negative = 0.0
+    normals = np.empty((len(facets), 3), dtype=np.float32)
+    for start in range(0, len(facets), TRANSFORM_BLOCK_SIZE):
+        vertices = facets["vertices"][start:start + TRANSFORM_BLOCK_SIZE].astype(np.float64)
+        if rotation is not None:
+            vertices = (vertices - center) @ rotation.T + center
+        lower = np.minimum(lower, vertices.min(axis=(0, 1)))
+        upper = np.maximum(upper, vertices.max(axis=(0, 1)))
+        # Twice the area vector of every facet
+        doubled = np.cross(vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0])
+        lengths = np.linalg.norm(doubled, axis=1)
+        area += 0.5 * lengths.sum()
+        # Projected areas of facets facing into and away from the flow: equal
+        # for a closed surface, and each one the frontal area of a convex body
+        projected = 0.5 * (doubled @ flow)
+        frontal_positive += projected[projected > 0].sum()
+        frontal_negative -= projected[projected < 0].sum()
+        np.divide(doubled, lengths[:, None], out=doubled, where=lengths[:, None] > 0)
+        normals[start:start + len(vertices)] = doubled
+
+    analysis = {
+        "n_facets": len(facets),
+        "bounds_min": lower.tolist(),
+        "bounds_max": upper.tolist(),
+        "extent": (upper - lower).tolist(),
+        "center": ((upper + lower) / 2).tolist(),
+        "surface_area": float(area),
+        "frontal_area": float(max(frontal_positive, frontal_negative)),
+    }
+    analysis.update(_edge_topology(facets, normals, feature_angle_deg))
+    return analysis
+
+
+def _vertex_ids(facets: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Number the distinct corners of all facets; returns (n, 3) ids and their count."""
+    # Facets share corners with bit-identical coordinates in an STL, so the
+    # raw bits are sorted (adding 0 turns -0.0 into 0.0 first)
+    bits = (facets["vertices"].reshape(-1, 3) + np.float32(0)).view(np.uint32)
+    high = (bits[:, 0].astype(np.uint64) << np.uint64(32)) | bits[:, 1]
+    order = np.lexsort((bits[:, 2], high))
+    high, low = high[order], bits[order, 2]
+    new = np.empty(len(order), dtype=bool)
+    new[0] = True
+    new[1:] = (high[1:] != high[:-1]) | (low[1:] != low[:-1])
+    ids = np.empty(len(order), dtype=np.int64)
+    ids[order] = np.cumsum(new) - 1
+    return ids.reshape(-1, 3), int(ids.max()) + 1 if len(ids) else 0
+
+
+def _edge_topology(facets: np.ndarray, normals: np.ndarray, feature_angle_deg: float) -> Dict[str, Any]:
+    """Edge counts, feature edges and watertightness from shared corners."""
+    vertex_ids, n_vertices = _vertex_ids(facets)
+
+    # Every facet edge as one sorted integer key; equal keys are the same edge
+    first = vertex_ids
+    second = np.roll(vertex_ids, -1, axis=1)
+    keys = (np.minimum(first, second) * n_vertices + np.maximum(first, second)).ravel()
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    counts = np.diff(np.concatenate((starts, [len(keys)])))
+
+    # Edges of exactly two facets: compare the normals on either side
+    manifold = starts[counts == 2]
+    facet_a = order[manifold] // 3
+    facet_b = order[manifold + 1] // 3
+    cosines = np.einsum("ij,ij->i", normals[facet_a], normals[facet_b])
+    feature = cosines < np.cos(np.radians(feature_angle_deg))
+
+    # Feature edge lengths from the corners of facet_a (rotation keeps lengths)
+    slot = order[manifold[feature]]
+    vertices = facets["vertices"]
+    tail = vertices[slot // 3, slot % 3].astype(np.float64)
+    head = vertices[slot // 3, (slot % 3 + 1) % 3].astype(np.float64)
+    feature_length = float(np.linalg.norm(head - tail, axis=1).sum())
+
+    n_edges = len(starts)
+    open_edges = int((counts == 1).sum())
+    non_manifold_edges = int((counts > 2).sum())
+    return {
+        "n_edges": n_edges,
+        "feature_edges": int(feature.sum()),
+        "feature_edge_length": feature_length,
+        "feature_edge_density": float(feature.sum()) / n_edges,
+        "open_edges": open_edges,
+        "non_manifold_edges": non_manifold_edges,
+        "watertight": open_edges == 0 and non_manifold_edges == 0,
+    }
@@ -5,7 +5,7 @@ Handles all REST API communication with the project-based server
 import requests
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 from pathlib import Path
 from datetime import datetime
 from .config import Config
@@ -288,6 +288,110 @@ class ProjectAPIClient:
         
         return self._make_request('POST', 'run_command', data, project_name=project_name)
     
+    def submit_command(self, command: str, args: Optional[List[str]] = None,
+                      environment: Optional[Dict[str, str]] = None,
+                      working_directory: str = "active_run",
+                      timeout: int = 300,
+                      project_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start an OpenFOAM command as a background job without waiting for it
+        
+        Returns:
+            Job record with 'job_id' and 'status'; follow the output with
+            stream_job_log() and fetch the result with get_job()
+        """
+        project_name = project_name or self.current_project
+        if not project_name:
+            raise ValueError("No project specified and no current project set")
+        
+        data = {
+            'command': command,
+            'args': args or [],
+            'environment': environment or {},
+            'working_directory': working_directory,
+            'timeout': timeout,
+            'wait': False
+        }
+        
+        return self._make_request('POST', 'run_command', data, project_name=project_name)
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Get the status (and result, once finished) of a command job"""
+        return self._make_request('GET', 'job_status', job_id=job_id)
+    
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running command job"""
+        return self._make_request('DELETE', 'job_cancel', job_id=job_id)
+    
+    def stream_job_log(self, job_id: str, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Follow a job's output as it is produced
+        
+        Args:
+            job_id: ID of the job
+            offset: Byte offset in the job's log file to resume from
+            
+        Yields:
+            {'offset': int, 'line': str} for every output line. The iterator
+            ends once the job has finished.
+        """
+        url = Config.get_api_url('job_log', job_id=job_id)
+        logger.info(f"Streaming job log from {url}")
+        
+        # No read timeout: a solver can be silent for a long time between lines
+        with self.session.get(url, params={'offset': offset}, stream=True,
+                              headers={'Accept': 'text/event-stream'},
+                              timeout=(self.timeout, None)) as response:
+            response.raise_for_status()
+            
+            event_type, event_id, data = 'message', None, []
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    field, _, value = line.partition(':')
+                    value = value[1:] if value.startswith(' ') else value
+                    if field == 'event':
+                        event_type = value
+                    elif field == 'id':
+                        event_id = value
+                    elif field == 'data':
+                        data.append(value)
+                    continue
+                
+                # A blank line terminates an event
+                if event_type == 'end':
+                    return
+                if data:
+                    yield {'offset': int(event_id) if event_id else offset, 'line': '\n'.join(data)}
+                event_type, event_id, data = 'message', None, []
+    
+    def get_residuals(self, since: int = 0, job_id: Optional[str] = None,
+                      project_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the residual history of a project's solver run for live plotting
+        
+        Args:
+            since: Index of the first time step to return; pass the previous
+                   response's 'next_since' to fetch only new rows
+            job_id: Job to read the history of (default: newest solver job)
+            project_name: Project name (uses current project if not specified)
+            
+        Returns:
+            Columns 'time', 'courant_max', ... and per-field
+            'initial_residuals'/'final_residuals' lists
+        """
+        project_name = project_name or self.current_project
+        if not project_name:
+            raise ValueError("No project specified and no current project set")
+        
+        params = {'since': since}
+        if job_id:
+            params['job_id'] = job_id
+        
+        url = Config.get_api_url('residuals', project_name=project_name)
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
     def run_blockmesh(self, project_name: Optional[str] = None) -> Dict[str, Any]:
         """Run blockMesh command"""
         return self.run_command('blockMesh', ['-case', '.'], project_name=project_name)
@@ -34,6 +34,10 @@ class Config:
         
         # Command execution
         'run_command': '/api/projects/{project_name}/run_command',
+        'job_status': '/api/jobs/{job_id}',
+        'job_cancel': '/api/jobs/{job_id}',
+        'job_log': '/api/jobs/{job_id}/log',
+        'residuals': '/api/projects/{project_name}/residuals',
         
         # ParaView server management
         'start_pvserver': '/api/projects/{project_name}/pvserver/start',
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-command overhead of the OpenFOAM environment.
+
+Runs a trivial command many times the way CommandService used to (a bash
+that sources the OpenFOAM bashrc before every command) and the way it does
+now (exec with the environment captured once), and reports per-command
+latency for both.
+
+By default a synthetic bashrc that forks helpers and exports variables the
+way the OpenFOAM one does is used; pass --bashrc to measure a real
+installation.
+
+Usage:
+    python benchmark_command_env.py [--runs 200] [--bashrc /opt/openfoam12/etc/bashrc] [--command true]
+
+Runs locally; no server is needed.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, '.')
+
+SYNTHETIC_BASHRC = """
+export WM_PROJECT=OpenFOAM
+export WM_PROJECT_VERSION=12
+export WM_PROJECT_DIR="$(cd "$(dirname "${BASH_SOURCE:-$0}")/.." && pwd)"
+for name in ARCH COMPILER PRECISION_OPTION LABEL_SIZE COMPILE_OPTION MPLIB OPTIONS; do
+    export WM_$name="$(echo $name | tr '[:upper:]' '[:lower:]')"
+done
+for i in $(seq 1 40); do
+    export FOAM_SETTING_$i="$(basename "$WM_PROJECT_DIR")/$(uname -m)/$i"
+done
+export PATH="$WM_PROJECT_DIR/platforms/bin:$PATH"
+"""
+
+def time_runs(runs: int, prepare) -> list:
+    """Wall-clock seconds of each of `runs` executions of the prepared command"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cmd_list, env = prepare()
+        subprocess.run(cmd_list, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(name: str, latencies: list):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+    print(f"{name:<24} {statistics.mean(ordered) * 1000:>9.2f} {ordered[len(ordered) // 2] * 1000:>9.2f} "
+          f"{p95 * 1000:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-command OpenFOAM environment overhead")
+    parser.add_argument("--runs", type=int, default=200, help="Executions per variant")
+    parser.add_argument("--bashrc", help="OpenFOAM bashrc to source (default: a synthetic one)")
+    parser.add_argument("--command", default="true", help="Command to run")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("COMMAND ENVIRONMENT BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bashrc = args.bashrc
+        if bashrc is None:
+            bashrc = os.path.join(tmp, "etc", "bashrc")
+            Path(bashrc).parent.mkdir()
+            Path(bashrc).write_text(SYNTHETIC_BASHRC)
+        os.environ["OPENFOAM_BASHRC"] = bashrc
+        # Imported here: the module creates its service from OPENFOAM_BASHRC
+        from command_service import CommandService
+
+        start = time.perf_counter()
+        service = CommandService()
+        startup = time.perf_counter() - start
+        if service.get_openfoam_environment() is None:
+            print(f"✗ Could not source {bashrc}")
+            sys.exit(1)
+        print(f"bashrc: {bashrc} (captured once in {startup * 1000:.1f} ms)")
+        print(f"{args.runs} runs of '{args.command}'\n")
+
+        work_dir = Path(tmp)
+        legacy = time_runs(args.runs, lambda: (
+            service._prepare_command_with_openfoam_env(args.command), os.environ.copy()
+        ))
+        cached = time_runs(args.runs, lambda: service._prepare_command(args.command, None, work_dir))
+
+    print(f"{'variant':<24} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    report("source on every command", legacy)
+    report("cached environment", cached)
+    print()
+    speedup = statistics.mean(legacy) / statistics.mean(cached)
+    print(f"✓ {speedup:.1f}x lower per-command overhead with the cached environment")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark API latency while the database is slow.
+
+Many clients hit a database-backed endpoint (task updates) and an endpoint
+that never touches the database (job listing) at the same time. Halfway
+through, an outside connection holds the SQLite write lock for a few
+seconds, as a Celery worker or a slow disk would. Latency percentiles are
+reported per endpoint for the quiet and the locked phase.
+
+With database calls on their own executor the job listing keeps its
+latency while the lock is held; when queries run on the event loop every
+request stalls behind the lock.
+
+Usage:
+    python benchmark_db_latency.py [--clients 20] [--duration 10] [--lock-seconds 3] [--db tasks.db]
+
+Run this on the server host, from the directory the server was started in
+(so --db points at the server's database).
+"""
+
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, '.')
+from config import EC2_HOST, API_PORT, DATABASE_PATH
+
+API_BASE_URL = f"http://{EC2_HOST}:{API_PORT}"
+TASK_PREFIX = "latency-benchmark-task"
+
+def percentiles(latencies: list) -> dict:
+    """p50/p95/p99/max of a list of latencies in seconds, reported in ms"""
+    if not latencies:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "count": len(ordered),
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+def hold_write_lock(db_path: str, start_after: float, seconds: float, window: list):
+    """Take the database write lock from outside the server for `seconds`"""
+    time.sleep(start_after)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("BEGIN IMMEDIATE")
+    window.append(time.time())
+    time.sleep(seconds)
+    conn.rollback()
+    window.append(time.time())
+    conn.close()
+
+def client(index: int, deadline: float, session: requests.Session, samples: list, lock: threading.Lock):
+    """Alternate task updates and job listings until the deadline"""
+    task_id = f"{TASK_PREFIX}-{index}"
+    i = 0
+    while time.time() < deadline:
+        if i % 2 == 0:
+            name = "PUT /api/tasks/{id}"
+            call = lambda: session.put(f"{API_BASE_URL}/api/tasks/{task_id}",
+                                       json={"status": "running", "message": f"update {i}"}, timeout=60)
+        else:
+            name = "GET /api/jobs"
+            call = lambda: session.get(f"{API_BASE_URL}/api/jobs", timeout=60)
+        start = time.time()
+        response = call()
+        end = time.time()
+        with lock:
+            samples.append((name, start, end - start, response.status_code))
+        i += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API latency under database lock contention")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Length of the run in seconds")
+    parser.add_argument("--lock-seconds", type=float, default=3.0, help="How long the write lock is held (0 to skip)")
+    parser.add_argument("--db", default=DATABASE_PATH, help="Path of the server's SQLite database")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  ⏱️  DATABASE LATENCY BENCHMARK")
+    print("=" * 60)
+    print(f"API URL: {API_BASE_URL}, {args.clients} clients for {args.duration:.0f}s")
+    print()
+
+    for index in range(args.clients):
+        requests.post(f"{API_BASE_URL}/api/tasks", json={"task_id": f"{TASK_PREFIX}-{index}"}, timeout=30)
+
+    samples = []
+    samples_lock = threading.Lock()
+    lock_window = []
+    deadline = time.time() + args.duration
+    locker = None
+    if args.lock_seconds > 0:
+        locker = threading.Thread(
+            target=hold_write_lock,
+            args=(args.db, (args.duration - args.lock_seconds) / 2, args.lock_seconds, lock_window),
+            daemon=True
+        )
+        locker.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            for index in range(args.clients):
+                pool.submit(client, index, deadline, requests.Session(), samples, samples_lock)
+        if locker:
+            locker.join()
+    finally:
+        for index in range(args.clients):
+            requests.delete(f"{API_BASE_URL}/api/tasks/{TASK_PREFIX}-{index}", timeout=60)
+
+    errors = sum(1 for sample in samples if sample[3] >= 400)
+    print(f"{'endpoint':<22} {'phase':<8} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name in ("PUT /api/tasks/{id}", "GET /api/jobs"):
+        phases = {"quiet": [], "locked": []}
+        for sample_name, start, latency, _ in samples:
+            if sample_name != name:
+                continue
+            # A request is 'locked' if it was in flight while the lock was held
+            locked = len(lock_window) == 2 and start < lock_window[1] and start + latency > lock_window[0]
+            phases["locked" if locked else "quiet"].append(latency)
+        for phase, latencies in phases.items():
+            if not latencies:
+                continue
+            stats = percentiles(latencies)
+            print(f"{name:<22} {phase:<8} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+                  f"{stats['p99']:>9.1f} {stats['max']:>9.1f}")
+
+    print()
+    if errors:
+        print(f"⚠ {errors} requests failed")
+    else:
+        print("✓ All requests succeeded")
+
+if __name__ == "__main__":
+    main()
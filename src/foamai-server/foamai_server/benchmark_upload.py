@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming upload endpoint.
+
+Runs 1, 10 and 50 parallel 200MB uploads against a running FoamAI server
+and samples the resident set size (RSS) of the server process while they
+are in flight. With streaming uploads the peak RSS should stay close to the
+idle RSS plus roughly one chunk per concurrent upload.
+
+Usage:
+    python benchmark_upload.py --server-pid <uvicorn pid> [--size-mb 200] [--parallel 1 10 50]
+
+The server PID is needed to read its RSS, so run this on the server host.
+"""
+
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import requests
+
+# Import EC2_HOST from config.py
+sys.path.insert(0, '.')
+from config import EC2_HOST, UPLOAD_CHUNK_SIZE
+
+API_BASE_URL = f"http://{EC2_HOST}:8000"
+PROJECT_NAME = "upload-benchmark-project"
+
+def generate_payload(size_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yield size_bytes of data without holding the whole payload client-side."""
+    block = b"solid benchmark\n" * (chunk_size // 16)
+    remaining = size_bytes
+    while remaining > 0:
+        piece = block[:min(len(block), remaining)]
+        remaining -= len(piece)
+        yield piece
+
+def upload_one(index: int, size_bytes: int) -> float:
+    """Stream a single upload and return its duration in seconds."""
+    start = time.time()
+    response = requests.post(
+        f"{API_BASE_URL}/api/projects/{PROJECT_NAME}/upload_stream",
+        params={"destination_path": f"constant/triSurface/bench_{index}.stl"},
+        data=generate_payload(size_bytes),
+        timeout=3600
+    )
+    response.raise_for_status()
+    return time.time() - start
+
+def sample_rss(process: psutil.Process, stop: threading.Event, samples: list):
+    """Record the server RSS every 50ms until stopped."""
+    while not stop.is_set():
+        try:
+            samples.append(process.memory_info().rss)
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(0.05)
+
+def run_round(process: psutil.Process, parallel: int, size_bytes: int) -> dict:
+    """Run one round of parallel uploads and return RSS/throughput figures."""
+    baseline = process.memory_info().rss
+    samples = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_rss, args=(process, stop, samples), daemon=True)
+    sampler.start()
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        durations = list(pool.map(lambda i: upload_one(i, size_bytes), range(parallel)))
+    elapsed = time.time() - start
+
+    stop.set()
+    sampler.join()
+
+    peak = max(samples) if samples else baseline
+    return {
+        "parallel": parallel,
+        "baseline_rss_mb": baseline / (1024 * 1024),
+        "peak_rss_mb": peak / (1024 * 1024),
+        "rss_growth_mb": (peak - baseline) / (1024 * 1024),
+        "throughput_mb_s": parallel * size_bytes / (1024 * 1024) / elapsed,
+        "slowest_upload_s": max(durations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming uploads")
+    parser.add_argument("--server-pid", type=int, required=True, help="PID of the FoamAI API server process")
+    parser.add_argument("--size-mb", type=int, default=200, help="Size of each upload in MB")
+    parser.add_argument("--parallel", type=int, nargs="+", default=[1, 10, 50], help="Parallel upload counts")
+    args = parser.parse_args()
+
+    process = psutil.Process(args.server_pid)
+    size_bytes = args.size_mb * 1024 * 1024
+
+    print("=" * 60)
+    print("  📈 STREAMING UPLOAD BENCHMARK")
+    print("=" * 60)
+    print(f"API URL: {API_BASE_URL}")
+    print(f"Upload size: {args.size_mb}MB, chunk size: {UPLOAD_CHUNK_SIZE // 1024}KB")
+    print()
+
+    requests.post(f"{API_BASE_URL}/api/projects", json={"project_name": PROJECT_NAME})
+
+    try:
+        print(f"{'parallel':>8} {'baseline MB':>12} {'peak MB':>10} {'growth MB':>10} {'MB/s':>8} {'slowest s':>10}")
+        for parallel in args.parallel:
+            result = run_round(process, parallel, size_bytes)
+            print(f"{result['parallel']:>8} {result['baseline_rss_mb']:>12.1f} {result['peak_rss_mb']:>10.1f} "
+                  f"{result['rss_growth_mb']:>10.1f} {result['throughput_mb_s']:>8.1f} {result['slowest_upload_s']:>10.1f}")
+    finally:
+        requests.delete(f"{API_BASE_URL}/api/projects/{PROJECT_NAME}")
+
+if __name__ == "__main__":
+    main()
@@ -38,9 +38,8 @@ celery_app.conf.update(
     # Prevent hanging during shutdown
     worker_pool_restarts=True,
     
-    # Timeout settings
-    task_soft_time_limit=300,  # 5 minutes
-    task_time_limit=360,       # 6 minutes
+    # No blanket time limits: solver runs can take hours. Commands get a
+    # per-job limit from the API's resource scheduler (see scheduler.py)
     
     # Connection settings
     broker_connection_retry_on_startup=True,
@@ -111,8 +110,9 @@ def cleanup_worker_on_shutdown(**kwargs):
     
     # Close any remaining database connections
     try:
-        from database import get_connection
+        from database import close_all_connections
         print("🔄 Closing database connections...")
+        close_all_connections()
     except Exception as e:
         print(f"⚠️ Error closing database connections: {e}")
 
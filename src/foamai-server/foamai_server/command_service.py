@@ -3,27 +3,78 @@ import logging
 import os
 import time
 import re
+import threading
 import glob
+import shlex
 import shutil
+import signal
+import uuid
+import psutil
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from config import JOB_DEFAULT_TIMEOUT, COMMAND_KILL_GRACE_PERIOD
+from snapshot_service import snapshot_service, SnapshotError
+from resource_limits import resource_limiter, ResourceLimitError
+from metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+# Variables that describe the capturing shell rather than the OpenFOAM environment
+SHELL_STATE_VARIABLES = {"_", "PWD", "OLDPWD", "SHLVL"}
+
+COMMAND_NAME_PATTERN = re.compile(r"^[A-Za-z][\w.+-]{0,63}$")
+COMMAND_DURATION = metrics.histogram(
+    "foamai_command_duration_seconds",
+    "Run time of executed commands, by command name and outcome (success, failure, timeout)",
+    ["command", "outcome"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600, 7200, 21600, 86400)
+)
+
+def _command_label(command: str) -> str:
+    name = Path(command).name
+    return name if COMMAND_NAME_PATTERN.match(name) else "other"
+
 class CommandExecutionError(Exception):
     """Custom exception for command execution errors"""
     pass
 
+class _OutputCapture:
+    """Bounded in-memory copy of a command's output stream.
+
+    The full output always goes to the log file; only the first ``limit``
+    bytes (plus the line that crossed it) are kept for the response.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.lines: List[str] = []
+
+    def append(self, line: str):
+        if self.size > self.limit:
+            return
+        self.lines.append(line)
+        self.size += len(line.encode('utf-8'))
+
+    def getvalue(self) -> str:
+        return "".join(self.lines)
+
 class CommandService:
     """Service for executing OpenFOAM commands in project directories"""
     
     def __init__(self):
-        self.default_timeout = 300  # 5 minutes
+        self.default_timeout = JOB_DEFAULT_TIMEOUT
         self.max_output_size = 10 * 1024 * 1024  # 10MB limit for output
         # OpenFOAM environment script path (with auto-detection)
         self.openfoam_bashrc = self._find_openfoam_bashrc()
         logger.info(f"Using OpenFOAM bashrc: {self.openfoam_bashrc}")
+        # Environment captured after sourcing the bashrc, keyed by the
+        # bashrc's (mtime, size); None as environment if sourcing failed
+        self._openfoam_env: Optional[Tuple[Optional[Tuple[int, int]], Optional[Dict[str, str]]]] = None
+        self._openfoam_env_lock = threading.Lock()
+        self.get_openfoam_environment()
     
     def _find_openfoam_bashrc(self) -> str:
         """
@@ -101,7 +152,7 @@ class CommandService:
         return sorted_paths[0]
     def _save_run_copy(self, project_dir: Path, working_directory: str) -> str:
         """
-        Save a copy of the active_run directory to a numbered run folder.
+        Save a snapshot of the active_run directory to a numbered run folder.
         
         Args:
             project_dir: Path to the project directory
@@ -111,35 +162,12 @@ class CommandService:
             str: The name of the created run directory (e.g., 'run_000')
             
         Raises:
-            CommandExecutionError: If the copy operation fails
+            CommandExecutionError: If the snapshot fails
         """
-        source_dir = project_dir / working_directory
-        
-        if not source_dir.exists():
-            raise CommandExecutionError(f"Source directory does not exist: {source_dir}")
-        
-        # Find the next available run directory name
-        run_counter = 0
-        while True:
-            run_dir_name = f"run_{run_counter:03d}"
-            target_dir = project_dir / run_dir_name
-            
-            if not target_dir.exists():
-                break
-            run_counter += 1
-            
-            # Safety check to prevent infinite loop
-            if run_counter > 9999:
-                raise CommandExecutionError("Too many run directories (max 9999)")
-        
         try:
-            # Copy the entire directory tree
-            shutil.copytree(source_dir, target_dir)
-            logger.info(f"Saved run copy to: {run_dir_name}")
-            return run_dir_name
-            
-        except Exception as e:
-            raise CommandExecutionError(f"Failed to save run copy: {e}")
+            return snapshot_service.save_run(project_dir, working_directory)
+        except SnapshotError as e:
+            raise CommandExecutionError(str(e))
 
     
     def execute_command(
@@ -150,7 +178,10 @@ class CommandService:
         environment: Optional[Dict[str, str]] = None,
         working_directory: str = "active_run",
         timeout: Optional[int] = None,
-        save_run: bool = False
+        save_run: bool = False,
+        on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        job_id: Optional[str] = None
     ) -> Dict:
         """
         Execute a command in the specified project directory.
@@ -162,6 +193,13 @@ class CommandService:
             environment: Additional environment variables
             working_directory: Subdirectory within project (default: "active_run")
             timeout: Timeout in seconds (default: 300)
+            save_run: Save a copy of the working directory on success
+            on_start: Optional callback receiving the started process, e.g. so
+                      that a job can be cancelled with terminate_process_tree()
+            on_output: Optional callback receiving (stream, line) for every
+                       line of output as it is produced
+            job_id: Job the command runs for, used to name its log file so
+                    concurrent runs of the same command do not share one
             
         Returns:
             Dict containing execution results
@@ -182,11 +220,8 @@ class CommandService:
             logger.info(f"Creating working directory: {work_dir}")
             work_dir.mkdir(parents=True, exist_ok=True)
         
-        # Prepare command with OpenFOAM environment sourcing
-        cmd_list = self._prepare_command_with_openfoam_env(command, args)
-        
-        # Prepare environment
-        exec_env = os.environ.copy()
+        # Prepare command and environment (OpenFOAM bashrc already sourced)
+        cmd_list, exec_env = self._prepare_command(command, args, work_dir)
         if environment:
             exec_env.update(environment)
         
@@ -200,26 +235,71 @@ class CommandService:
         logger.info(f"Timeout: {exec_timeout} seconds")
         logger.info(f"OpenFOAM bashrc: {self.openfoam_bashrc}")
         
+        log_path = self.get_log_path(project_path, working_directory, command, job_id or uuid.uuid4().hex)
+        stdout_capture = _OutputCapture(self.max_output_size)
+        stderr_capture = _OutputCapture(self.max_output_size)
+        
+        # Per-project CPU/memory limits, and accounting of what the command used
         try:
-            # Execute command
-            result = subprocess.run(
-                cmd_list,
-                cwd=str(work_dir),
-                env=exec_env,
-                capture_output=True,
-                text=True,
-                timeout=exec_timeout
-            )
+            command_limits = resource_limiter.prepare(project_dir)
+        except ResourceLimitError as e:
+            raise CommandExecutionError(str(e))
+        usage = None
+        
+        try:
+            # Execute command, spilling its output to log.<command>.<job_id> line by line
+            with open(log_path, "w", buffering=1) as log_file:
+                log_lock = threading.Lock()
+                # No preexec_fn: the server is multithreaded, and without one
+                # the child is spawned without running Python after fork
+                process = subprocess.Popen(
+                    command_limits.wrap(cmd_list),
+                    cwd=str(work_dir),
+                    env=exec_env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    bufsize=1,
+                    # Own process group, so the whole tree (mpirun, solver ranks) can be signalled
+                    start_new_session=True
+                )
+                command_limits.started(process.pid)
+                readers = [
+                    threading.Thread(
+                        target=self._pump_output,
+                        args=(process.stdout, "stdout", stdout_capture, log_file, log_lock, on_output),
+                        daemon=True
+                    ),
+                    threading.Thread(
+                        target=self._pump_output,
+                        args=(process.stderr, "stderr", stderr_capture, log_file, log_lock, on_output),
+                        daemon=True
+                    )
+                ]
+                for reader in readers:
+                    reader.start()
+                if on_start:
+                    on_start(process)
+                
+                try:
+                    process.wait(timeout=exec_timeout)
+                except subprocess.TimeoutExpired:
+                    self.terminate_process_tree(process)
+                    raise
+                finally:
+                    for reader in readers:
+                        reader.join()
+                    usage = command_limits.finish()
             
             execution_time = time.time() - start_time
             
             # Truncate output if too large
-            stdout = self._truncate_output(result.stdout, "stdout")
-            stderr = self._truncate_output(result.stderr, "stderr")
+            stdout = self._truncate_output(stdout_capture.getvalue(), "stdout")
+            stderr = self._truncate_output(stderr_capture.getvalue(), "stderr")
             
             # Save run copy if requested and command was successful
             saved_run_directory = None
-            if save_run and result.returncode == 0:
+            if save_run and process.returncode == 0:
                 try:
                     saved_run_directory = self._save_run_copy(project_dir, working_directory)
                     logger.info(f"Command completed successfully and run saved to: {saved_run_directory}")
@@ -227,22 +307,27 @@ class CommandService:
                     logger.error(f"Command succeeded but failed to save run copy: {e}")
                     # Don't fail the entire operation just because the copy failed
 
-            logger.info(f"Command completed in {execution_time:.2f} seconds with exit code {result.returncode}")
+            logger.info(f"Command completed in {execution_time:.2f} seconds with exit code {process.returncode}")
+            COMMAND_DURATION.observe(execution_time, _command_label(command),
+                                     "success" if process.returncode == 0 else "failure")
             
             return {
-                "success": result.returncode == 0,
-                "exit_code": result.returncode,
+                "success": process.returncode == 0,
+                "exit_code": process.returncode,
                 "stdout": stdout,
                 "stderr": stderr,
                 "execution_time": round(execution_time, 2),
                 "command": " ".join(cmd_list),
                 "working_directory": str(work_dir),
                 "timestamp": datetime.now().isoformat(),
-                "saved_run_directory": saved_run_directory
+                "saved_run_directory": saved_run_directory,
+                "log_file": str(log_path),
+                **usage
             }
             
         except subprocess.TimeoutExpired:
             execution_time = time.time() - start_time
+            COMMAND_DURATION.observe(execution_time, _command_label(command), "timeout")
             error_msg = f"Command timed out after {exec_timeout} seconds"
             logger.error(error_msg)
             raise CommandExecutionError(error_msg)
@@ -261,6 +346,145 @@ class CommandService:
             error_msg = f"Unexpected error executing command: {e}"
             logger.error(error_msg)
             raise CommandExecutionError(error_msg)
+        
+        finally:
+            if usage is None:
+                # The command never started; release its cgroup
+                command_limits.finish()
+    
+    def terminate_process_tree(self, process: subprocess.Popen, grace_period: float = COMMAND_KILL_GRACE_PERIOD):
+        """
+        Stop a command started by execute_command and every process it started.
+
+        The command's process group, and descendants that left it, get SIGINT
+        first so that mpirun and OpenFOAM can shut down cleanly (and write a
+        final time step where configured to). Whatever is still alive after
+        grace_period seconds is killed with SIGKILL.
+        """
+        descendants = self._descendants(process.pid)
+        self._signal_tree(process, descendants, signal.SIGINT)
+
+        deadline = time.monotonic() + grace_period
+        try:
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            pass
+        # Processes started since the first signal, then wait for the rest
+        descendants = list({p.pid: p for p in descendants + self._descendants(process.pid)}.values())
+        _, alive = psutil.wait_procs(descendants, timeout=max(0.0, deadline - time.monotonic()))
+
+        if process.poll() is None or alive:
+            logger.warning(f"Process tree of PID {process.pid} still running after {grace_period}s, killing it")
+            self._signal_tree(process, alive, signal.SIGKILL)
+        process.wait()
+
+    def _descendants(self, pid: int) -> List[psutil.Process]:
+        try:
+            return psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def _signal_tree(self, process: subprocess.Popen, descendants: List[psutil.Process], sig: int):
+        """Send sig to the process group of process and to the given descendants"""
+        try:
+            # start_new_session made the command the leader of its own group
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+        for child in descendants:
+            try:
+                child.send_signal(sig)
+            except psutil.Error:
+                pass
+
+    def get_log_path(self, project_path: str, working_directory: str, command: str, job_id: str) -> Path:
+        """Path of the log file a job's command output is spilled to (log.<command>.<job_id>)"""
+        return Path(project_path) / working_directory / f"log.{Path(command).name}.{job_id}"
+    
+    def _pump_output(self, stream, stream_name: str, capture: _OutputCapture, log_file, log_lock: threading.Lock,
+                     on_output: Optional[Callable[[str, str], None]] = None):
+        """Copy a process output stream line by line to the log file and capture buffer"""
+        for line in stream:
+            with log_lock:
+                log_file.write(line)
+            capture.append(line)
+            if on_output:
+                try:
+                    on_output(stream_name, line)
+                except Exception as e:
+                    logger.warning(f"Output callback failed: {e}")
+        stream.close()
+    
+    def get_openfoam_environment(self) -> Optional[Dict[str, str]]:
+        """
+        Environment of a shell that has sourced the OpenFOAM bashrc.
+        
+        The bashrc is sourced once and the captured environment is reused
+        until the file's modification time or size changes. Returns None if
+        it cannot be sourced.
+        """
+        try:
+            stat = os.stat(self.openfoam_bashrc)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        
+        with self._openfoam_env_lock:
+            if self._openfoam_env is not None and self._openfoam_env[0] == signature:
+                return self._openfoam_env[1]
+            env = self._source_openfoam_bashrc() if signature else None
+            self._openfoam_env = (signature, env)
+            return env
+    
+    def _source_openfoam_bashrc(self) -> Optional[Dict[str, str]]:
+        """Source the bashrc in a login-less bash and capture the resulting environment"""
+        start_time = time.time()
+        try:
+            result = subprocess.run(
+                ["bash", "-c", f"source {shlex.quote(self.openfoam_bashrc)} > /dev/null 2>&1 && env -0"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=60
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Could not source OpenFOAM bashrc {self.openfoam_bashrc}: {e}")
+            return None
+        if result.returncode != 0:
+            logger.warning(f"Sourcing OpenFOAM bashrc {self.openfoam_bashrc} failed with exit code {result.returncode}")
+            return None
+        
+        env = {}
+        for entry in result.stdout.split(b"\0"):
+            name, sep, value = entry.decode("utf-8", errors="surrogateescape").partition("=")
+            if sep and name not in SHELL_STATE_VARIABLES:
+                env[name] = value
+        logger.info(f"Captured OpenFOAM environment ({len(env)} variables) in {time.time() - start_time:.2f} seconds")
+        return env
+    
+    def _prepare_command(self, command: str, args: Optional[List[str]], work_dir: Path) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Prepare a command to exec directly with the cached OpenFOAM environment.
+        
+        Commands that are not an executable on the OpenFOAM PATH (typos, shell
+        builtins) are run through bash so they fail or work as they did when
+        every command was wrapped. If the bashrc cannot be sourced, commands
+        are wrapped with it as before.
+        """
+        openfoam_env = self.get_openfoam_environment()
+        if openfoam_env is None:
+            return self._prepare_command_with_openfoam_env(command, args), os.environ.copy()
+        
+        env = dict(openfoam_env)
+        if os.sep in command:
+            candidate = Path(command) if Path(command).is_absolute() else work_dir / command
+            executable = str(candidate) if candidate.is_file() and os.access(candidate, os.X_OK) else None
+        else:
+            executable = shutil.which(command, path=env.get("PATH", ""))
+        
+        if executable is None:
+            full_command = " ".join([command, *(self._shell_escape(arg) for arg in args or [])])
+            return ["bash", "-c", full_command], env
+        return [executable, *(args or [])], env
     
     def _prepare_command_with_openfoam_env(self, command: str, args: Optional[List[str]] = None) -> List[str]:
         """
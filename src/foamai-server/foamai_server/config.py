@@ -12,23 +12,54 @@ from dotenv import load_dotenv
 # Load environment variables from a .env file if it exists
 load_dotenv()
 
-# PVServer Management Configuration
-MAX_CONCURRENT_PVSERVERS = 6
-CLEANUP_THRESHOLD_HOURS = 4
-
 # Port Configuration
-PORT_RANGE_START = 11111
-PORT_RANGE_END = 11116
+PORT_RANGE_START = int(os.environ.get("PVSERVER_PORT_RANGE_START", "11111"))
+PORT_RANGE_END = int(os.environ.get("PVSERVER_PORT_RANGE_END", "11116"))
 API_PORT = int(os.environ.get("API_PORT", "8000"))
 
+# PVServer Management Configuration
+MAX_CONCURRENT_PVSERVERS = int(os.environ.get("MAX_CONCURRENT_PVSERVERS", PORT_RANGE_END - PORT_RANGE_START + 1))
+CLEANUP_THRESHOLD_HOURS = float(os.environ.get("PVSERVER_IDLE_TIMEOUT_HOURS", "4"))  # pvservers without activity for this long are reclaimed
+PVSERVER_POOL_SIZE = int(os.environ.get("PVSERVER_POOL_SIZE", "2"))  # idle pre-started pvservers kept warm
+PVSERVER_POOL_MAINTENANCE_INTERVAL = 60  # seconds between pool refills and idle reclaims
+
 # Database Configuration
 DATABASE_PATH = 'tasks.db'
+DATABASE_BUSY_TIMEOUT = 30  # seconds a writer waits for a lock before 'database is locked'
+DATABASE_STATEMENT_CACHE = 128  # prepared statements cached per connection
+DATABASE_EXECUTOR_WORKERS = int(os.environ.get("DATABASE_EXECUTOR_WORKERS", "8"))  # threads serving API database calls
 
 # Project Configuration
 PROJECTS_BASE_PATH = Path(os.environ.get("PROJECTS_BASE_PATH", "~/foam_projects")).expanduser()
 
 # File Upload Configuration
 MAX_UPLOAD_SIZE = 300 * 1024 * 1024  # 300MB in bytes
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB read/write chunks for streamed uploads
+MAX_ARCHIVE_EXTRACTED_SIZE = 2 * 1024 * 1024 * 1024  # 2GB unpacked limit for case archives
+
+# Command Job Configuration
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", os.cpu_count() or 4))
+JOB_HISTORY_SIZE = 500  # finished jobs kept in memory for status queries
+LOG_STREAM_POLL_INTERVAL = 0.25  # seconds between log file polls when streaming job output
+RESIDUAL_HISTORY_JOBS = 50  # jobs whose parsed residual histories are kept in memory
+SAVE_RUN_MODE = os.environ.get("SAVE_RUN_MODE", "snapshot")  # 'snapshot' (hardlink/reflink unchanged files) or 'copy' (full copy)
+JOB_DEFAULT_TIMEOUT = 300  # seconds, for commands other than solver runs without an explicit timeout
+RESOURCE_LIMITS_MODE = os.environ.get("RESOURCE_LIMITS_MODE", "auto")  # 'auto', 'cgroup' (v2), 'rlimit' (RLIMIT_AS + CPU affinity) or 'off'
+CGROUP_ROOT = Path(os.environ.get("FOAMAI_CGROUP_ROOT", "/sys/fs/cgroup/foamai.slice"))  # parent of the per-project cgroups
+COMMAND_CPU_LIMIT = float(os.environ.get("COMMAND_CPU_LIMIT", "0"))  # default cores per project (0: unlimited)
+COMMAND_MEMORY_LIMIT_MB = int(os.environ.get("COMMAND_MEMORY_LIMIT_MB", "0"))  # default memory per project (0: unlimited)
+RESOURCE_SAMPLE_INTERVAL = 1.0  # seconds between usage samples without cgroup accounting
+COMMAND_KILL_GRACE_PERIOD = float(os.environ.get("COMMAND_KILL_GRACE_PERIOD", "10"))  # seconds between SIGINT and SIGKILL when stopping a command
+
+# Job Scheduling Configuration
+SCHEDULER_CORES = int(os.environ.get("SCHEDULER_CORES", os.cpu_count() or 1))  # cores jobs may occupy together
+SCHEDULER_MEMORY_MB = int(os.environ.get("SCHEDULER_MEMORY_MB", "0"))  # memory jobs may occupy together (0: 90% of RAM)
+SCHEDULER_INTERACTIVE_RESERVED_CORES = int(os.environ.get("SCHEDULER_INTERACTIVE_RESERVED_CORES", "1"))  # cores kept free of solver/meshing jobs
+SCHEDULER_STARVATION_SECONDS = 300  # queued jobs waiting longer than this are no longer backfilled past
+SOLVER_SECONDS_PER_CELL_STEP = float(os.environ.get("SOLVER_SECONDS_PER_CELL_STEP", "5e-6"))  # single-core cost estimate
+JOB_TIME_LIMIT_SAFETY_FACTOR = 4  # estimated solver run time is multiplied by this
+JOB_MIN_SOLVER_TIME_LIMIT = 600  # seconds
+JOB_MAX_TIME_LIMIT = int(os.environ.get("JOB_MAX_TIME_LIMIT", 3 * 24 * 3600))  # seconds, also used when no estimate is possible
 
 # --- General Application Settings ---
 # Load EC2_HOST from environment or default to localhost if not set
@@ -37,6 +68,7 @@ EC2_HOST = os.environ.get("EC2_HOST", "127.0.0.1")
 # --- PVServer Management Configuration ---
 PROCESS_CHECK_TIMEOUT = 5  # seconds
 PVSERVER_START_TIMEOUT = 30  # seconds
+PVSERVER_LIVENESS_TTL = float(os.environ.get("PVSERVER_LIVENESS_TTL", "10"))  # seconds a process check of an untracked pvserver is reused
 
 # Logging Configuration
 LOG_LEVEL = 'INFO'
@@ -1,11 +1,20 @@
+import os
+import asyncio
+import logging
 import sqlite3
+import functools
+import threading
 import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Callable, TypeVar
 from pathlib import Path
 
-from config import DATABASE_PATH
+from config import DATABASE_PATH, DATABASE_BUSY_TIMEOUT, DATABASE_STATEMENT_CACHE, DATABASE_EXECUTOR_WORKERS
 from process_validator import validator
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
     """Custom exception for database-related errors"""
@@ -19,38 +28,147 @@ class ProjectPVServerError(DatabaseError):
     """Exception raised for project pvserver-related errors"""
     pass
 
+# Each thread keeps one open connection instead of connecting per query.
+# Connections are tracked so they can be closed on shutdown, and are tagged
+# with the PID that opened them so forked (Celery) workers never reuse one.
+# Only the owning thread queries a connection, but shutdown closes them all
+# from one thread, so sqlite3's same-thread check is turned off.
+_local = threading.local()
+_connections: List[Tuple[int, sqlite3.Connection]] = []
+_connections_lock = threading.Lock()
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a connection configured for concurrent use by API and Celery workers"""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=DATABASE_BUSY_TIMEOUT,
+        cached_statements=DATABASE_STATEMENT_CACHE,
+        check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers run alongside a writer; NORMAL sync is safe in WAL mode
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _connections_lock:
+        _connections.append((os.getpid(), conn))
+    return conn
+
+def _thread_connection() -> sqlite3.Connection:
+    """Get this thread's connection, opening it on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _open_connection()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def _discard_thread_connection():
+    """Drop this thread's connection so the next query opens a fresh one"""
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None:
+        with _connections_lock:
+            _connections[:] = [entry for entry in _connections if entry[1] is not conn]
+        with contextlib.suppress(sqlite3.Error):
+            conn.close()
+
+def close_all_connections():
+    """Close every pooled connection of this process, e.g. on worker shutdown"""
+    with _connections_lock:
+        # Connections inherited from a parent process are forgotten, not closed
+        connections = [conn for pid, conn in _connections if pid == os.getpid()]
+        _connections.clear()
+    failed = 0
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            failed += 1
+            logger.warning(f"Failed to close database connection: {e}")
+    _local.conn = None
+    if failed:
+        raise DatabaseError(f"Failed to close {failed} of {len(connections)} database connections")
+
+# The API's event loop never runs a query itself: database calls (and the
+# process checks some of them do) are handed to this dedicated pool with
+# run_db(), so lock waits or slow disks only hold up requests that need the
+# database. Its threads each keep their pooled connection.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+T = TypeVar("T")
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DATABASE_EXECUTOR_WORKERS, thread_name_prefix="foamai-db")
+        return _executor
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database function on the database executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    """Stop the database executor and close the connections of its threads"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    close_all_connections()
+
 @contextlib.contextmanager
 def get_connection():
-    """Context manager for database connections with proper cleanup"""
-    conn = None
+    """Context manager yielding this thread's pooled database connection"""
+    try:
+        conn = _thread_connection()
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Database connection failed: {e}")
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
         yield conn
+    except sqlite3.ProgrammingError as e:
+        # Closed or otherwise unusable connection: replace it on next use
+        _discard_thread_connection()
+        raise DatabaseError(f"Database operation failed: {e}")
     except sqlite3.Error as e:
-        if conn:
+        with contextlib.suppress(sqlite3.Error):
             conn.rollback()
         raise DatabaseError(f"Database operation failed: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+QUERY_DURATION = metrics.histogram(
+    "foamai_db_query_duration_seconds",
+    "Time to execute a database query, by statement type",
+    ["statement"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5)
+)
 
 def execute_query(query: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False) -> Any:
     """Execute a query with proper error handling and connection management"""
-    with get_connection() as conn:
+    with QUERY_DURATION.time(query.lstrip().split(None, 1)[0].upper()), get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(query, params)
-        
-        if fetch_one:
-            return cursor.fetchone()
-        elif fetch_all:
-            return cursor.fetchall()
-        else:
-            conn.commit()
-            return cursor.rowcount
+        try:
+            cursor.execute(query, params)
+            
+            if fetch_one:
+                return cursor.fetchone()
+            elif fetch_all:
+                return cursor.fetchall()
+            else:
+                conn.commit()
+                return cursor.rowcount
+        finally:
+            # Release the statement so no read snapshot is held between queries
+            cursor.close()
+
+_project_table_ready = False
 
 def init_project_pvserver_table():
-    """Initialize the project_pvservers table if it doesn't exist"""
+    """Initialize the project_pvservers table if it doesn't exist (once per process)"""
+    global _project_table_ready
+    if _project_table_ready:
+        return
     query = """
         CREATE TABLE IF NOT EXISTS project_pvservers (
             project_name TEXT PRIMARY KEY,
@@ -64,6 +182,7 @@ def init_project_pvserver_table():
         )
     """
     execute_query(query)
+    _project_table_ready = True
 
 # =============================================================================
 # TASK OPERATIONS
@@ -157,6 +276,19 @@ def set_pvserver_stopped(task_id: str, message: str = "Process stopped"):
     if rows_affected == 0:
         raise TaskNotFoundError(f"Task with ID '{task_id}' not found to set pvserver to stopped.")
 
+def touch_pvserver_activity(port: int):
+    """Record client activity on the running pvserver on a port (task and project records)."""
+    now = datetime.now()
+    execute_query(
+        "UPDATE tasks SET pvserver_last_activity = ? WHERE pvserver_port = ? AND pvserver_status = 'running'",
+        (now, port)
+    )
+    init_project_pvserver_table()
+    execute_query(
+        "UPDATE project_pvservers SET last_activity = ? WHERE port = ? AND status = 'running'",
+        (now, port)
+    )
+
 def _cleanup_stale_pvserver_entry(task_id: str, error_message: str = "Process died (cleaned up)"):
     """Sets a pvserver status to 'stopped' for a stale process. For internal use."""
     set_pvserver_stopped(task_id, message=error_message)
@@ -401,29 +533,17 @@ def get_tasks_by_status(status: str) -> List[Dict]:
     return [dict(row) for row in execute_query(query, (status,), fetch_all=True)]
 
 def get_database_stats() -> Dict:
-    """Get database statistics"""
-    stats = {}
-    
-    # Task stats
-    task_count = execute_query("SELECT COUNT(*) as count FROM tasks", fetch_one=True)
-    stats['total_tasks'] = task_count['count'] if task_count else 0
-    
-    running_task_pvservers = execute_query("SELECT COUNT(*) as count FROM tasks WHERE pvserver_status = 'running'", fetch_one=True)
-    stats['running_task_pvservers'] = running_task_pvservers['count'] if running_task_pvservers else 0
-    
-    # Project stats
-    try:
-        init_project_pvserver_table()
-        project_count = execute_query("SELECT COUNT(*) as count FROM project_pvservers", fetch_one=True)
-        stats['total_project_pvservers'] = project_count['count'] if project_count else 0
-        
-        running_project_pvservers = execute_query("SELECT COUNT(*) as count FROM project_pvservers WHERE status = 'running'", fetch_one=True)
-        stats['running_project_pvservers'] = running_project_pvservers['count'] if running_project_pvservers else 0
-    except DatabaseError:
-        stats['total_project_pvservers'] = 0
-        stats['running_project_pvservers'] = 0
-    
-    return stats
+    """Get database statistics with a single aggregate query"""
+    init_project_pvserver_table()
+    query = """
+        SELECT
+            (SELECT COUNT(*) FROM tasks) AS total_tasks,
+            (SELECT COUNT(*) FROM tasks WHERE pvserver_status = 'running') AS running_task_pvservers,
+            (SELECT COUNT(*) FROM project_pvservers) AS total_project_pvservers,
+            (SELECT COUNT(*) FROM project_pvservers WHERE status = 'running') AS running_project_pvservers
+    """
+    row = execute_query(query, fetch_one=True)
+    return dict(row)
 
 def cleanup_stale_pvserver_entries() -> List[str]:
     """Clean up stale pvserver entries and return list of cleaned task IDs"""
@@ -0,0 +1,202 @@
+"""
+Cached file index of project directories.
+
+Listing a large transient case means stat'ing tens of thousands of files.
+The index keeps (path, size, mtime) for every file under a project's
+active_run and revalidates it per directory: a directory is only re-read
+when its modification time changed, which happens whenever an entry is
+added, removed or renamed (new time directories, atomic uploads).
+
+Files rewritten in place do not touch their directory's mtime, so jobs
+that run commands in a project register as writers. While a command is
+running, listings re-stat the files of its working directory (logs) and of
+every directory modified since it started (new time directories,
+postProcessing output); everything else is served from the index. Once it
+finished, the next listing re-stats every file, which picks up in-place
+rewrites elsewhere (e.g. mapFields writing 0/).
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+
+# A directory read within this many seconds of its last modification may
+# have been changed again within the same timestamp tick, so it is re-read
+RACY_WINDOW = 2.0
+
+class FileEntry(NamedTuple):
+    path: str  # relative to the indexed root
+    size: int
+    mtime: float
+
+class _Directory(NamedTuple):
+    mtime_ns: int
+    scanned_at: float
+    files: Dict[str, Tuple[int, float]]  # name -> (size, mtime)
+    subdirectories: List[str]
+
+class _RootIndex:
+    """Index of one directory tree"""
+
+    def __init__(self):
+        self.directories: Dict[str, _Directory] = {}
+        self.entries: List[FileEntry] = []
+        self.total_size = 0
+        self.writers: List[Tuple[float, Optional[str]]] = []  # (start time, working directory relative to root)
+        self.full_rescan = True
+        self.lock = threading.Lock()
+
+class FileIndex:
+    """Per-directory cached listing of project files"""
+
+    def __init__(self):
+        self._roots: Dict[Path, _RootIndex] = {}
+        self._lock = threading.Lock()
+
+    def _root(self, root: Path) -> _RootIndex:
+        with self._lock:
+            index = self._roots.get(root)
+            if index is None:
+                index = self._roots[root] = _RootIndex()
+            return index
+
+    def _matching_roots(self, path: Path) -> List[_RootIndex]:
+        """Indexes of roots at or below path"""
+        with self._lock:
+            return [index for root, index in self._roots.items() if root == path or path in root.parents]
+
+    def writer_started(self, root: Path, working_directory: Optional[Path] = None):
+        """A command that may modify files in place started in working_directory (default root) of the tree at root"""
+        index = self._root(Path(root))
+        with index.lock:
+            index.writers.append((time.time(), self._relative(Path(root), working_directory)))
+
+    def writer_finished(self, root: Path, working_directory: Optional[Path] = None):
+        """A command registered with writer_started finished; its changes are picked up on the next listing"""
+        index = self._root(Path(root))
+        relative = self._relative(Path(root), working_directory)
+        with index.lock:
+            for i, (_, directory) in enumerate(index.writers):
+                if directory == relative:
+                    del index.writers[i]
+                    break
+            index.full_rescan = True
+
+    @staticmethod
+    def _relative(root: Path, working_directory: Optional[Path]) -> Optional[str]:
+        """working_directory as an index key ('' for root), or None if it is outside root"""
+        if working_directory is None:
+            return ""
+        try:
+            relative = Path(working_directory).relative_to(root).as_posix()
+        except ValueError:
+            return None
+        return "" if relative == "." else relative
+
+    def invalidate(self, path: Path):
+        """Re-stat every file under path on the next listing"""
+        for index in self._matching_roots(Path(path)):
+            with index.lock:
+                index.full_rescan = True
+
+    def forget(self, path: Path):
+        """Drop the indexes of roots at or below path (e.g. a deleted project)"""
+        path = Path(path)
+        with self._lock:
+            for root in [root for root in self._roots if root == path or path in root.parents]:
+                del self._roots[root]
+
+    def list_files(self, root: Path) -> Tuple[List[FileEntry], int]:
+        """
+        Return the files under root, sorted by path, and their total size.
+
+        Returns:
+            Tuple of (entries, total_size); empty if root is not a readable directory
+        """
+        root = Path(root)
+        index = self._root(root)
+        with index.lock:
+            full = index.full_rescan
+            index.full_rescan = False
+            hot = {directory for _, directory in index.writers if directory is not None}
+            # Timestamps may lag by up to a tick, so start a bit earlier
+            since = min(started for started, _ in index.writers) - RACY_WINDOW if index.writers else None
+            try:
+                changed = self._refresh(root, index, full, hot, since)
+            except OSError:
+                index.directories = {}
+                index.entries = []
+                index.total_size = 0
+                return [], 0
+            if changed:
+                entries = []
+                for directory, listing in index.directories.items():
+                    prefix = f"{directory}/" if directory else ""
+                    entries.extend(FileEntry(prefix + name, size, mtime) for name, (size, mtime) in listing.files.items())
+                entries.sort()
+                index.entries = entries
+                index.total_size = sum(entry.size for entry in entries)
+            return index.entries, index.total_size
+
+    def _refresh(self, root: Path, index: _RootIndex, full: bool, hot: AbstractSet[str] = frozenset(),
+                 since: Optional[float] = None) -> bool:
+        """
+        Bring index.directories up to date; returns True if anything was re-read.
+
+        Besides changed directories, the directories in hot and those modified
+        at or after since (while commands are running) are re-read.
+        """
+        if not root.is_dir():
+            raise NotADirectoryError(root)
+
+        directories: Dict[str, _Directory] = {}
+        changed = full or not index.directories
+        pending = [""]
+        while pending:
+            relative = pending.pop()
+            path = root / relative if relative else root
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                changed = True
+                continue
+            cached = index.directories.get(relative)
+            if (not full and cached is not None and cached.mtime_ns == mtime_ns
+                    and cached.scanned_at - mtime_ns / 1e9 > RACY_WINDOW
+                    and relative not in hot and (since is None or mtime_ns / 1e9 < since)):
+                listing = cached
+            else:
+                listing = self._scan_directory(path, mtime_ns)
+                changed = True
+            directories[relative] = listing
+            pending.extend(f"{relative}/{name}" if relative else name for name in listing.subdirectories)
+
+        if directories.keys() != index.directories.keys():
+            changed = True
+        index.directories = directories
+        return changed
+
+    def _scan_directory(self, path: Path, mtime_ns: int) -> _Directory:
+        scanned_at = time.time()
+        files = {}
+        subdirectories = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files[entry.name] = (stat.st_size, stat.st_mtime)
+                    except OSError:
+                        # Skip entries we can't read or that disappeared
+                        continue
+        except OSError:
+            pass
+        return _Directory(mtime_ns, scanned_at, files, subdirectories)
+
+# Global file index instance
+file_index = FileIndex()
@@ -0,0 +1,356 @@
+"""
+Job service for running OpenFOAM commands in the background.
+
+Commands are submitted to a bounded worker pool and tracked by job ID, so
+long solver runs never block the API's event loop. Callers can either
+await a job's completion or return immediately and poll its status.
+
+Jobs only reach the pool once the resource scheduler admits them, i.e.
+when their estimated cores and memory fit next to the jobs already running.
+"""
+
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import MAX_CONCURRENT_JOBS, JOB_HISTORY_SIZE
+from command_service import command_service, CommandExecutionError
+from scheduler import ResourceScheduler, SchedulerError, estimate_requirements
+from residual_service import residual_service
+from file_index import file_index
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+class JobError(Exception):
+    """Custom exception for job-related errors"""
+    pass
+
+class JobNotFoundError(JobError):
+    """Exception raised when a job is not found"""
+    pass
+
+class JobService:
+    """Service for running commands as background jobs"""
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS, history_size: int = JOB_HISTORY_SIZE):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="foamai-job")
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._processes: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.scheduler = ResourceScheduler(max_jobs=max_workers)
+        logger.info(f"Job service started with {max_workers} workers, "
+                    f"{self.scheduler.cores} cores and {self.scheduler.memory_mb} MB for jobs")
+
+    def submit(
+        self,
+        project_name: str,
+        project_path: str,
+        command: str,
+        args: Optional[List[str]] = None,
+        environment: Optional[Dict[str, str]] = None,
+        working_directory: str = "active_run",
+        timeout: Optional[int] = None,
+        save_run: bool = False,
+        priority: Optional[str] = None
+    ) -> Dict:
+        """
+        Queue a command for execution and return its job record immediately.
+
+        Without a timeout, solver runs get a time limit estimated from the
+        case's controlDict and mesh size.
+
+        Returns:
+            Dict: Snapshot of the new job (status 'queued' or 'running')
+
+        Raises:
+            JobError: If the priority is invalid
+        """
+        try:
+            requirements = estimate_requirements(
+                Path(project_path) / working_directory, command, args, priority, timeout
+            )
+        except SchedulerError as e:
+            raise JobError(str(e))
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "project_name": project_name,
+            "command": command,
+            "args": args or [],
+            "working_directory": working_directory,
+            "status": JOB_QUEUED,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "pid": None,
+            "log_file": str(command_service.get_log_path(project_path, working_directory, command, job_id)),
+            "result": None,
+            "error": None,
+            "priority": requirements["priority"],
+            "cores": requirements["cores"],
+            "memory_mb": requirements["memory_mb"],
+            "time_limit": requirements["time_limit"]
+        }
+        params = {
+            "project_path": project_path,
+            "command": command,
+            "args": args,
+            "environment": environment,
+            "working_directory": working_directory,
+            "timeout": requirements["time_limit"],
+            "save_run": save_run
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            # Completed by the worker once the scheduler has admitted the job
+            self._futures[job_id] = Future()
+            self._prune_history()
+
+        logger.info(f"Queued job {job_id}: '{command}' for project '{project_name}' "
+                    f"({requirements['priority']}, {requirements['cores']} cores, {requirements['memory_mb']} MB, "
+                    f"time limit {requirements['time_limit']} s)")
+        self.scheduler.submit(job_id, requirements, lambda: self._dispatch(job_id, params))
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Dict:
+        """Get a snapshot of a job. Raises JobNotFoundError if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError(f"Job '{job_id}' not found")
+            return dict(job)
+
+    def list_jobs(self, project_name: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        """List jobs, newest first, optionally filtered by project and status"""
+        with self._lock:
+            jobs = [dict(job) for job in reversed(self._jobs.values())]
+        if project_name:
+            jobs = [job for job in jobs if job["project_name"] == project_name]
+        if status:
+            jobs = [job for job in jobs if job["status"] == status]
+        return jobs
+
+    def count_active_jobs(self) -> int:
+        """Count queued and running jobs"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] not in FINISHED_STATUSES)
+
+    def cancel_job(self, job_id: str) -> Dict:
+        """
+        Cancel a queued or running job.
+
+        Queued jobs are removed from the queue before they start. Running jobs
+        have their whole process tree stopped (SIGINT, then SIGKILL after
+        COMMAND_KILL_GRACE_PERIOD) in the background, and their resources are
+        released immediately so that queued jobs can start.
+
+        Raises:
+            JobNotFoundError: If the job does not exist
+            JobError: If the job has already finished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError(f"Job '{job_id}' not found")
+            if job["status"] in FINISHED_STATUSES:
+                raise JobError(f"Job '{job_id}' already finished with status '{job['status']}'")
+
+            job["cancel_requested"] = True
+            if self.scheduler.remove(job_id):
+                self._futures[job_id].cancel()
+                self._finish(job, JOB_CANCELLED, error="Cancelled before start")
+            process = self._processes.get(job_id)
+
+        if process is not None:
+            logger.info(f"Stopping process tree of job {job_id} (PID {process.pid})")
+            threading.Thread(
+                target=command_service.terminate_process_tree, args=(process,),
+                name=f"foamai-cancel-{job_id[:8]}", daemon=True
+            ).start()
+            self.scheduler.release(job_id)
+
+        return self.get_job(job_id)
+
+    def read_log(self, job_id: str, offset: int = 0, max_bytes: int = 64 * 1024) -> List[Tuple[int, str]]:
+        """
+        Read complete lines from a job's log file starting at a byte offset.
+
+        Nothing is returned until the job's process has started, so a stale
+        log from a previous run of the same command is never replayed. Once
+        the job has finished a trailing line without a newline is returned too.
+
+        Returns:
+            List of (byte offset just after the line, line without line ending)
+        """
+        job = self.get_job(job_id)
+        if job["pid"] is None:
+            return []
+        finished = job["status"] in FINISHED_STATUSES
+
+        try:
+            with open(job["log_file"], "rb") as f:
+                f.seek(offset)
+                data = f.read(max_bytes)
+        except FileNotFoundError:
+            return []
+
+        *complete, tail = data.split(b"\n")
+        lines = []
+        for raw in complete:
+            offset += len(raw) + 1
+            lines.append((offset, raw.decode("utf-8", errors="replace").rstrip("\r")))
+        if tail and (finished or (not complete and len(data) == max_bytes)):
+            # No more output is coming, or a single line exceeds max_bytes
+            offset += len(tail)
+            lines.append((offset, tail.decode("utf-8", errors="replace").rstrip("\r")))
+        return lines
+
+    async def wait(self, job_id: str) -> Dict:
+        """
+        Wait for a job to finish without blocking the event loop.
+
+        Returns:
+            Dict: The command result of the job
+
+        Raises:
+            CommandExecutionError: If the command could not be run or was cancelled
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is None:
+            raise JobNotFoundError(f"Job '{job_id}' not found")
+
+        try:
+            return await asyncio.wrap_future(future)
+        except CancelledError:
+            raise CommandExecutionError(f"Job '{job_id}' was cancelled")
+
+    def _dispatch(self, job_id: str, params: Dict):
+        """Hand an admitted job to the worker pool and forward its outcome"""
+        with self._lock:
+            future = self._futures[job_id]
+        if not future.set_running_or_notify_cancel():
+            self.scheduler.release(job_id)
+            return
+
+        def forward(worker: Future):
+            self.scheduler.release(job_id)
+            if worker.exception() is not None:
+                future.set_exception(worker.exception())
+            else:
+                future.set_result(worker.result())
+
+        self._executor.submit(self._run, job_id, params).add_done_callback(forward)
+
+    def _run(self, job_id: str, params: Dict) -> Dict:
+        """Worker body: execute the command and record the outcome"""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.get("cancel_requested"):
+                self._finish(job, JOB_CANCELLED, error="Cancelled before start")
+                raise CommandExecutionError(f"Job '{job_id}' was cancelled")
+            job["status"] = JOB_RUNNING
+            job["started_at"] = datetime.now()
+
+        # Solver output is parsed into a residual history while it runs
+        history = residual_service.start(job_id, job["project_name"])
+
+        def on_output(stream: str, line: str):
+            if stream == "stdout":
+                history.feed(line)
+
+        # Commands may rewrite files in place, which the file index cannot see
+        active_run = Path(params["project_path"]) / "active_run"
+        work_dir = Path(params["project_path"]) / params.get("working_directory", "active_run")
+        file_index.writer_started(active_run, work_dir)
+
+        try:
+            result = command_service.execute_command(
+                **params,
+                on_start=lambda process: self._register_process(job_id, process),
+                on_output=on_output,
+                job_id=job_id
+            )
+        except CommandExecutionError as e:
+            with self._lock:
+                self._finish(job, JOB_FAILED, error=str(e))
+            raise
+        except Exception as e:
+            with self._lock:
+                self._finish(job, JOB_FAILED, error=f"Unexpected error: {e}")
+            raise CommandExecutionError(f"Unexpected error executing command: {e}")
+        finally:
+            history.finish()
+            file_index.writer_finished(active_run, work_dir)
+            with self._lock:
+                self._processes.pop(job_id, None)
+
+        result["job_id"] = job_id
+        with self._lock:
+            if job.get("cancel_requested"):
+                status = JOB_CANCELLED
+            else:
+                status = JOB_COMPLETED if result["success"] else JOB_FAILED
+            self._finish(job, status, result=result)
+
+        logger.info(f"Job {job_id} finished with status '{job['status']}'")
+        return result
+
+    def _register_process(self, job_id: str, process):
+        with self._lock:
+            self._processes[job_id] = process
+            self._jobs[job_id]["pid"] = process.pid
+            cancelled = self._jobs[job_id].get("cancel_requested")
+        if cancelled:
+            # Cancelled between admission and process start
+            command_service.terminate_process_tree(process)
+
+    def _finish(self, job: Dict, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Mark a job as finished. Must be called with the lock held."""
+        job["status"] = status
+        job["finished_at"] = datetime.now()
+        job["result"] = result
+        job["error"] = error
+
+    def _prune_history(self):
+        """Drop the oldest finished jobs beyond history_size. Must be called with the lock held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+
+# Global instance for easy import
+job_service = JobService()
+
+def _scheduler_gauge(key: str):
+    return lambda: job_service.scheduler.get_status()[key]
+
+metrics.gauge("foamai_jobs_queued", "Jobs waiting for resources, by priority",
+              lambda: {(priority,): count for priority, count in job_service.scheduler.get_status()["queued_jobs"].items()},
+              ["priority"])
+metrics.gauge("foamai_jobs_running", "Jobs admitted by the scheduler", _scheduler_gauge("running_jobs"))
+metrics.gauge("foamai_scheduler_cores_used", "Estimated cores occupied by running jobs", _scheduler_gauge("used_cores"))
+metrics.gauge("foamai_scheduler_cores", "Cores available to jobs", _scheduler_gauge("cores"))
+metrics.gauge("foamai_scheduler_memory_used_mb", "Estimated memory occupied by running jobs", _scheduler_gauge("used_memory_mb"))
+metrics.gauge("foamai_scheduler_memory_mb", "Memory available to jobs", _scheduler_gauge("memory_mb"))
@@ -1,16 +1,19 @@
 import os
+import json
+import asyncio
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import ValidationError
 
-from config import PROJECTS_BASE_PATH, MAX_UPLOAD_SIZE
+from config import PROJECTS_BASE_PATH, LOG_STREAM_POLL_INTERVAL
 from database import (
     create_task, get_task, task_exists, update_task_status, update_task_rejection,
     get_all_tasks, get_tasks_by_status, delete_task, get_database_stats,
@@ -18,19 +21,30 @@ from database import (
     # Project-based pvserver functions
     create_project_pvserver, get_project_pvserver_info, set_project_pvserver_stopped,
     set_project_pvserver_error, get_all_project_pvservers, delete_project_pvserver,
+    touch_pvserver_activity,
+    # Async access from endpoints
+    run_db, shutdown_executor,
     # Exception classes
     DatabaseError, TaskNotFoundError, ProjectPVServerError
 )
 from pvserver_service import PVServerService, PVServerServiceError
+from pvserver_pool import pvserver_pool
 from project_service import ProjectService, ProjectError
 from command_service import command_service, CommandExecutionError
+from upload_service import upload_service, UploadError, UploadTooLargeError
+from job_service import job_service, JobError, JobNotFoundError, FINISHED_STATUSES
+from metrics import metrics, MetricsMiddleware
+from resource_limits import resource_limiter
+from residual_service import residual_service, ResidualError
 from schemas import (
     TaskCreationRequest, TaskUpdateRequest, TaskResponse, TaskRejectionRequest,
     ProjectCreationRequest, ProjectResponse, ProjectListResponse, ProjectInfoResponse,
-    FileUploadResponse, PVServerStartRequest, PVServerResponse, PVServerListResponse,
+    ProjectLimitsRequest, ProjectLimitsResponse,
+    FileUploadResponse, ArchiveUploadResponse, ManifestResponse, FileDeleteRequest, FileDeleteResponse,
+    PVServerStartRequest, PVServerResponse, PVServerListResponse,
     PVServerStopResponse, ClearAllPVServersResponse, ProjectPVServerStartRequest, ProjectPVServerResponse,
     ProjectPVServerInfoResponse, ProjectPVServerStopResponse, CombinedPVServerResponse,
-    CommandRequest, CommandResponse,
+    CommandRequest, CommandResponse, JobResponse, JobListResponse, SchedulerStatusResponse, ResidualsResponse,
     ErrorResponse, HealthCheckResponse, DatabaseStatsResponse
 )
 
@@ -46,8 +60,11 @@ pvserver_service = PVServerService()
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     logger.info("Starting FoamAI Server...")
+    pvserver_pool.start()
     yield
     logger.info("Shutting down FoamAI Server...")
+    pvserver_pool.shutdown()
+    shutdown_executor()
 
 app = FastAPI(
     title="FoamAI Server",
@@ -65,6 +82,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms per route (see GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # =============================================================================
 # EXCEPTION HANDLERS
 # =============================================================================
@@ -141,6 +161,42 @@ async def command_execution_error_handler(request: Request, exc: CommandExecutio
         ).model_dump(mode='json')
     )
 
+@app.exception_handler(JobError)
+async def job_error_handler(request: Request, exc: JobError):
+    """Handle background job errors"""
+    return JSONResponse(
+        status_code=404 if isinstance(exc, JobNotFoundError) else 400,
+        content=ErrorResponse(
+            detail=str(exc),
+            error_type=type(exc).__name__,
+            timestamp=datetime.now()
+        ).model_dump(mode='json')
+    )
+
+@app.exception_handler(ResidualError)
+async def residual_error_handler(request: Request, exc: ResidualError):
+    """Handle residual history errors"""
+    return JSONResponse(
+        status_code=404,
+        content=ErrorResponse(
+            detail=str(exc),
+            error_type="ResidualError",
+            timestamp=datetime.now()
+        ).model_dump(mode='json')
+    )
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    """Handle file upload errors"""
+    return JSONResponse(
+        status_code=413 if isinstance(exc, UploadTooLargeError) else 400,
+        content=ErrorResponse(
+            detail=str(exc),
+            error_type=type(exc).__name__,
+            timestamp=datetime.now()
+        ).model_dump(mode='json')
+    )
+
 @app.exception_handler(ValidationError)
 async def validation_error_handler(request: Request, exc: ValidationError):
     """Handle pydantic validation errors"""
@@ -161,13 +217,14 @@ async def validation_error_handler(request: Request, exc: ValidationError):
 async def health_check():
     """Health check endpoint"""
     try:
-        stats = get_database_stats()
+        stats = await run_db(get_database_stats)
         return HealthCheckResponse(
             status="healthy",
             timestamp=datetime.now(),
             database_connected=True,
             running_pvservers=stats.get('running_task_pvservers', 0),
-            running_project_pvservers=stats.get('running_project_pvservers', 0)
+            running_project_pvservers=stats.get('running_project_pvservers', 0),
+            cpu_count=os.cpu_count()
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -176,7 +233,8 @@ async def health_check():
             timestamp=datetime.now(),
             database_connected=False,
             running_pvservers=0,
-            running_project_pvservers=0
+            running_project_pvservers=0,
+            cpu_count=os.cpu_count()
         )
 
 # =============================================================================
@@ -196,11 +254,36 @@ async def list_projects():
     return ProjectListResponse(projects=projects, count=len(projects))
 
 @app.get("/api/projects/{project_name}", response_model=ProjectInfoResponse)
-async def get_project(project_name: str):
-    """Get project information"""
-    project_info = project_service.get_project_info(project_name)
+async def get_project(
+    project_name: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    prefix: Optional[str] = None,
+    kind: Optional[str] = None
+):
+    """Get project information, optionally with a filtered page of its files"""
+    project_info = await run_in_threadpool(
+        project_service.get_project_info, project_name,
+        offset=offset, limit=limit, prefix=prefix, kind=kind
+    )
     return project_info
 
+@app.get("/api/projects/{project_name}/limits", response_model=ProjectLimitsResponse)
+async def get_project_limits(project_name: str):
+    """Get the CPU and memory limits applied to a project's commands"""
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    limits = project_service.get_project_limits(project_name)
+    return ProjectLimitsResponse(**limits, enforcement=resource_limiter.mode)
+
+@app.put("/api/projects/{project_name}/limits", response_model=ProjectLimitsResponse)
+async def set_project_limits(project_name: str, request: ProjectLimitsRequest):
+    """Set the CPU and memory limits of a project's commands; they apply from the next command on"""
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    limits = project_service.set_project_limits(project_name, request.cpu_limit, request.memory_limit_mb)
+    return ProjectLimitsResponse(**limits, enforcement=resource_limiter.mode)
+
 @app.delete("/api/projects/{project_name}")
 async def delete_project(project_name: str):
     """Delete a project"""
@@ -222,47 +305,112 @@ async def upload_file(
     if not project_service.project_exists(project_name):
         raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
     
-    # Check file size
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    
-    if file_size > MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024*1024)}MB"
-        )
+    # Reject early if the multipart part already declares an oversized file
+    upload_service.check_declared_size(file.size)
     
-    # Get project root and create active_run directory
-    project_root = Path(PROJECTS_BASE_PATH) / project_name
-    active_run_dir = project_root / "active_run"
-    active_run_dir.mkdir(parents=True, exist_ok=True)
+    # Copy the spooled upload into active_run chunk by chunk
+    result = await upload_service.save_upload(
+        project_name, destination_path, upload_service.iter_upload_file(file)
+    )
     
-    # Construct full file path in active_run directory
-    file_path = active_run_dir / destination_path
+    return FileUploadResponse(
+        filename=file.filename or "unknown",
+        file_path=result["file_path"],
+        file_size=result["file_size"],
+        upload_time=datetime.now(),
+        message=f"File uploaded successfully to {project_name}/active_run"
+    )
+
+@app.post("/api/projects/{project_name}/upload_stream", response_model=FileUploadResponse)
+async def upload_file_stream(project_name: str, destination_path: str, request: Request):
+    """Stream the raw request body into a file in a project's active_run directory"""
+    # Check if project exists
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
     
-    # Create parent directories if they don't exist
-    file_path.parent.mkdir(parents=True, exist_ok=True)
+    content_length = request.headers.get("content-length")
+    upload_service.check_declared_size(int(content_length) if content_length else None)
     
-    # Write file
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # The body is never materialised: each received chunk goes straight to disk
+    result = await upload_service.save_upload(project_name, destination_path, request.stream())
     
     return FileUploadResponse(
-        filename=file.filename or "unknown",
-        file_path=str(file_path.relative_to(project_root)),
-        file_size=file_size,
+        filename=Path(destination_path).name,
+        file_path=result["file_path"],
+        file_size=result["file_size"],
         upload_time=datetime.now(),
-        message=f"File uploaded successfully to {project_name}/active_run"
+        message=f"File streamed successfully to {project_name}/active_run"
+    )
+
+@app.post("/api/projects/{project_name}/upload_archive", response_model=ArchiveUploadResponse)
+async def upload_archive(project_name: str, request: Request, destination_path: str = ""):
+    """Upload a whole case directory as one tar archive (plain, gzip, bzip2, xz or zstd)"""
+    # Check if project exists
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    
+    content_length = request.headers.get("content-length")
+    upload_service.check_declared_size(int(content_length) if content_length else None)
+    
+    archive_path = await upload_service.save_archive(project_name, request.stream())
+    try:
+        archive_size = archive_path.stat().st_size
+        # Extraction is disk-bound, keep it off the event loop
+        result = await run_in_threadpool(
+            upload_service.extract_archive, project_name, archive_path, destination_path
+        )
+    finally:
+        archive_path.unlink(missing_ok=True)
+    
+    return ArchiveUploadResponse(
+        archive_size=archive_size,
+        file_count=result["file_count"],
+        total_size=result["total_size"],
+        files=result["files"],
+        skipped=result["skipped"],
+        upload_time=datetime.now(),
+        message=f"Extracted {result['file_count']} files into {project_name}/active_run"
+    )
+
+@app.get("/api/projects/{project_name}/manifest", response_model=ManifestResponse)
+async def get_upload_manifest(project_name: str):
+    """Get SHA-256 hashes and sizes of the files uploaded into active_run"""
+    # Check if project exists
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    
+    # Files changed on the server since upload are re-hashed, keep that off the event loop
+    files = await run_in_threadpool(upload_service.get_manifest, project_name)
+    return ManifestResponse(project_name=project_name, files=files, file_count=len(files))
+
+@app.post("/api/projects/{project_name}/files/delete", response_model=FileDeleteResponse)
+async def delete_project_files(project_name: str, request: FileDeleteRequest):
+    """Delete files from a project's active_run directory"""
+    # Check if project exists
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    
+    result = await run_in_threadpool(upload_service.delete_files, project_name, request.paths)
+    return FileDeleteResponse(
+        deleted=result["deleted"],
+        missing=result["missing"],
+        message=f"Deleted {len(result['deleted'])} files from {project_name}/active_run"
     )
 
 # =============================================================================
 # COMMAND EXECUTION ENDPOINTS
 # =============================================================================
 
-@app.post("/api/projects/{project_name}/run_command", response_model=CommandResponse)
+@app.post("/api/projects/{project_name}/run_command", response_model=Union[CommandResponse, JobResponse])
 async def run_command(project_name: str, request: CommandRequest):
-    """Execute an OpenFOAM command in a project directory"""
+    """
+    Execute an OpenFOAM command in a project directory.
+    
+    The command always runs in the background job pool. With wait=true (the
+    default) the response is the command result once it finishes; with
+    wait=false the job is returned immediately and can be polled at
+    /api/jobs/{job_id}.
+    """
     # Check if project exists
     if not project_service.project_exists(project_name):
         raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
@@ -277,18 +425,24 @@ async def run_command(project_name: str, request: CommandRequest):
         logger.warning(f"Unknown OpenFOAM command '{request.command}' for project '{project_name}'{suggestion_text}")
         # Note: We log a warning but don't block execution for flexibility
     
+    job = job_service.submit(
+        project_name=project_name,
+        project_path=str(project_path),
+        command=request.command,
+        args=request.args,
+        environment=request.environment,
+        working_directory=request.working_directory,
+        timeout=request.timeout,
+        save_run=request.save_run,
+        priority=request.priority
+    )
+    
+    if not request.wait:
+        return JSONResponse(status_code=202, content=JobResponse(**job).model_dump(mode='json'))
+    
     try:
-        # Execute the command
-        result = command_service.execute_command(
-            project_path=str(project_path),
-            command=request.command,
-            args=request.args,
-            environment=request.environment,
-            working_directory=request.working_directory,
-            timeout=request.timeout,
-            save_run=request.save_run
-        )
-        
+        # Awaiting the job keeps the event loop free while the command runs
+        result = await job_service.wait(job["job_id"])
         return CommandResponse(**result)
         
     except CommandExecutionError as e:
@@ -298,6 +452,99 @@ async def run_command(project_name: str, request: CommandRequest):
         logger.error(f"Unexpected error executing command for project '{project_name}': {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error executing command: {str(e)}")
 
+@app.get("/api/projects/{project_name}/residuals", response_model=ResidualsResponse)
+async def get_residuals(project_name: str, since: int = 0, job_id: Optional[str] = None):
+    """
+    Get the residual history of a project's solver run as columns.
+    
+    Only time steps from index `since` on are returned; pass the previous
+    response's `next_since` to poll for new rows while the solver runs.
+    Without `job_id` the newest job with solver output is used, falling
+    back to parsing the newest log.* file in active_run.
+    """
+    if not project_service.project_exists(project_name):
+        raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+    
+    if job_id:
+        history = residual_service.get_history(job_id)
+        source = "job"
+    else:
+        latest = residual_service.latest_for_project(project_name)
+        if latest:
+            (job_id, history), source = latest, "job"
+        else:
+            from_logs = await run_in_threadpool(residual_service.history_from_logs, project_name)
+            if from_logs is None:
+                return ResidualsResponse(project_name=project_name, since=since, next_since=0, row_count=0)
+            source, history = from_logs
+    
+    return ResidualsResponse(project_name=project_name, job_id=job_id, source=source, **history.rows_since(since))
+
+# =============================================================================
+# JOB ENDPOINTS
+# =============================================================================
+
+@app.get("/api/jobs", response_model=JobListResponse)
+async def list_jobs(project_name: Optional[str] = None, status: Optional[str] = None):
+    """List command jobs, optionally filtered by project and status"""
+    jobs = job_service.list_jobs(project_name, status)
+    return JobListResponse(jobs=jobs, count=len(jobs))
+
+@app.get("/api/scheduler", response_model=SchedulerStatusResponse)
+async def get_scheduler_status():
+    """Get the capacity of the job scheduler and how much of it is in use"""
+    return SchedulerStatusResponse(**job_service.scheduler.get_status())
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the status (and result, once finished) of a command job"""
+    return JobResponse(**job_service.get_job(job_id))
+
+@app.delete("/api/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running command job"""
+    return JobResponse(**job_service.cancel_job(job_id))
+
+@app.get("/api/jobs/{job_id}/log")
+async def stream_job_log(job_id: str, request: Request, offset: int = 0):
+    """
+    Stream a job's output as Server-Sent Events while it runs.
+    
+    Each line is sent as a 'message' event whose id is the byte offset in the
+    log file just after that line, so a client can resume with ?offset= or the
+    Last-Event-ID header. A final 'end' event carries the job status.
+    """
+    job_service.get_job(job_id)  # 404 before the stream starts
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    
+    async def event_stream():
+        position = offset
+        while True:
+            if await request.is_disconnected():
+                return
+            
+            # Check the status before reading so no output written after it is missed
+            status = job_service.get_job(job_id)["status"]
+            lines = job_service.read_log(job_id, position)
+            if lines:
+                for position, line in lines:
+                    yield f"id: {position}\ndata: {line}\n\n"
+            elif status in FINISHED_STATUSES:
+                job = JobResponse(**job_service.get_job(job_id))
+                end = {"status": job.status, "exit_code": job.result.exit_code if job.result else None, "error": job.error}
+                yield f"id: {position}\nevent: end\ndata: {json.dumps(end)}\n\n"
+                return
+            else:
+                await asyncio.sleep(LOG_STREAM_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # =============================================================================
 # TASK ENDPOINTS
 # =============================================================================
@@ -305,14 +552,14 @@ async def run_command(project_name: str, request: CommandRequest):
 @app.post("/api/tasks", response_model=TaskResponse)
 async def create_task_endpoint(request: TaskCreationRequest):
     """Create a new task"""
-    create_task(request.task_id, request.initial_status, request.initial_message)
-    task_data = get_task(request.task_id)
+    await run_db(create_task, request.task_id, request.initial_status, request.initial_message)
+    task_data = await run_db(get_task, request.task_id)
     return TaskResponse(**task_data)
 
 @app.get("/api/tasks/{task_id}", response_model=TaskResponse)
 async def get_task_endpoint(task_id: str):
     """Get task by ID"""
-    task_data = get_task(task_id)
+    task_data = await run_db(get_task, task_id)
     if not task_data:
         raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
     return TaskResponse(**task_data)
@@ -320,31 +567,31 @@ async def get_task_endpoint(task_id: str):
 @app.put("/api/tasks/{task_id}", response_model=TaskResponse)
 async def update_task_endpoint(task_id: str, request: TaskUpdateRequest):
     """Update task status and information"""
-    update_task_status(task_id, request.status, request.message, request.file_path, request.case_path)
-    task_data = get_task(task_id)
+    await run_db(update_task_status, task_id, request.status, request.message, request.file_path, request.case_path)
+    task_data = await run_db(get_task, task_id)
     return TaskResponse(**task_data)
 
 @app.post("/api/tasks/{task_id}/reject")
 async def reject_task(task_id: str, request: TaskRejectionRequest):
     """Reject a task with optional comments"""
-    update_task_rejection(task_id, request.comments)
+    await run_db(update_task_rejection, task_id, request.comments)
     return {"message": f"Task '{task_id}' rejected successfully"}
 
 @app.get("/api/tasks")
 async def list_tasks(status: Optional[str] = None):
     """List all tasks, optionally filtered by status"""
     if status:
-        tasks = get_tasks_by_status(status)
+        tasks = await run_db(get_tasks_by_status, status)
     else:
-        tasks = get_all_tasks()
+        tasks = await run_db(get_all_tasks)
     return {"tasks": tasks, "count": len(tasks)}
 
 @app.delete("/api/tasks/{task_id}")
 async def delete_task_endpoint(task_id: str):
     """Delete a task"""
-    if not task_exists(task_id):
+    if not await run_db(task_exists, task_id):
         raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
-    delete_task(task_id)
+    await run_db(delete_task, task_id)
     return {"message": f"Task '{task_id}' deleted successfully"}
 
 # =============================================================================
@@ -354,19 +601,19 @@ async def delete_task_endpoint(task_id: str):
 @app.post("/api/start_pvserver", response_model=PVServerResponse)
 async def start_pvserver(request: PVServerStartRequest):
     """Start a PVServer for a specific case (legacy task-based)"""
-    result = pvserver_service.start_pvserver(request.case_path)
+    result = await run_in_threadpool(pvserver_service.start_pvserver, request.case_path)
     return PVServerResponse(**result)
 
 @app.delete("/api/pvservers/{port}", response_model=PVServerStopResponse)
 async def stop_pvserver(port: int):
     """Stop a PVServer by port (legacy)"""
-    result = pvserver_service.stop_pvserver(port)
+    result = await run_in_threadpool(pvserver_service.stop_pvserver, port)
     return PVServerStopResponse(**result)
 
 @app.get("/api/pvservers", response_model=CombinedPVServerResponse)
 async def list_all_pvservers():
     """List all running PVServers (both task and project-based)"""
-    all_pvservers = get_all_running_pvservers_combined()
+    all_pvservers = await run_db(get_all_running_pvservers_combined)
     
     # Separate task and project pvservers
     task_pvservers = [pv for pv in all_pvservers if pv.get('source') == 'task']
@@ -376,14 +623,15 @@ async def list_all_pvservers():
         task_pvservers=task_pvservers,
         project_pvservers=project_pvservers,
         total_count=len(all_pvservers),
-        running_count=len(all_pvservers)
+        running_count=len(all_pvservers),
+        pool=pvserver_pool.get_stats()
     )
 
 @app.post("/api/pvservers/clear-all", response_model=ClearAllPVServersResponse)
 async def clear_all_pvservers():
     """Clear all running pvserver processes (both database-tracked and system processes)"""
     try:
-        result = pvserver_service.clear_all_pvservers()
+        result = await run_in_threadpool(pvserver_service.clear_all_pvservers)
         return ClearAllPVServersResponse(**result)
     except PVServerServiceError as e:
         logger.error(f"Failed to clear all pvservers: {e}")
@@ -411,7 +659,7 @@ async def start_project_pvserver(project_name: str, request: ProjectPVServerStar
     active_run_path.mkdir(parents=True, exist_ok=True)
     
     # Check if project already has a running pvserver
-    existing_pvserver = get_project_pvserver_info(project_name)
+    existing_pvserver = await run_db(get_project_pvserver_info, project_name)
     if existing_pvserver and existing_pvserver.get('status') == 'running':
         raise HTTPException(
             status_code=400,
@@ -419,10 +667,11 @@ async def start_project_pvserver(project_name: str, request: ProjectPVServerStar
         )
     
     # Start the pvserver
-    result = pvserver_service.start_pvserver(str(active_run_path))
+    result = await run_in_threadpool(pvserver_service.start_pvserver, str(active_run_path))
     
     # Store in project pvserver database
-    create_project_pvserver(
+    await run_db(
+        create_project_pvserver,
         project_name=project_name,
         port=result['port'],
         pid=result['pid'],
@@ -430,7 +679,7 @@ async def start_project_pvserver(project_name: str, request: ProjectPVServerStar
     )
     
     # Get the stored record to return complete info
-    pvserver_info = get_project_pvserver_info(project_name)
+    pvserver_info = await run_db(get_project_pvserver_info, project_name)
     
     if not pvserver_info:
         raise ProjectPVServerError(f"Failed to retrieve pvserver info for project '{project_name}' after creation")
@@ -451,7 +700,7 @@ async def start_project_pvserver(project_name: str, request: ProjectPVServerStar
 async def stop_project_pvserver(project_name: str):
     """Stop the PVServer for a project"""
     # Get project pvserver info
-    pvserver_info = get_project_pvserver_info(project_name)
+    pvserver_info = await run_db(get_project_pvserver_info, project_name)
     if not pvserver_info:
         raise HTTPException(status_code=404, detail=f"No pvserver found for project '{project_name}'")
     
@@ -463,13 +712,13 @@ async def stop_project_pvserver(project_name: str):
     
     # Stop the pvserver process
     try:
-        pvserver_service.stop_pvserver(pvserver_info['port'])
+        await run_in_threadpool(pvserver_service.stop_pvserver, pvserver_info['port'])
     except PVServerServiceError as e:
         logger.warning(f"Failed to stop pvserver process: {e}")
         # Continue to update database even if process stop failed
     
     # Update database
-    set_project_pvserver_stopped(project_name, "Stopped via API")
+    await run_db(set_project_pvserver_stopped, project_name, "Stopped via API")
     
     return ProjectPVServerStopResponse(
         project_name=project_name,
@@ -481,7 +730,7 @@ async def stop_project_pvserver(project_name: str):
 @app.get("/api/projects/{project_name}/pvserver/info", response_model=ProjectPVServerInfoResponse)
 async def get_project_pvserver_info_endpoint(project_name: str):
     """Get PVServer information for a project"""
-    pvserver_info = get_project_pvserver_info(project_name)
+    pvserver_info = await run_db(get_project_pvserver_info, project_name)
     
     if not pvserver_info:
         return ProjectPVServerInfoResponse(
@@ -489,6 +738,10 @@ async def get_project_pvserver_info_endpoint(project_name: str):
             status="not_found"
         )
     
+    if pvserver_info['status'] == 'running':
+        # Clients ask for this when they connect; counts as activity for idle reclaiming
+        await run_db(touch_pvserver_activity, pvserver_info['port'])
+    
     return ProjectPVServerInfoResponse(
         project_name=project_name,
         port=pvserver_info.get('port'),
@@ -508,7 +761,7 @@ async def get_project_pvserver_info_endpoint(project_name: str):
 @app.get("/api/system/stats", response_model=DatabaseStatsResponse)
 async def get_system_stats():
     """Get system statistics"""
-    stats = get_database_stats()
+    stats = await run_db(get_database_stats)
     return DatabaseStatsResponse(
         total_tasks=stats.get('total_tasks', 0),
         running_task_pvservers=stats.get('running_task_pvservers', 0),
@@ -517,6 +770,12 @@ async def get_system_stats():
         timestamp=datetime.now()
     )
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, command, upload, database and pvserver metrics in the Prometheus text format"""
+    text = await run_in_threadpool(metrics.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
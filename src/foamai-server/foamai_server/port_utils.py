@@ -1,8 +1,10 @@
 import socket
 from typing import Optional, Tuple
 
-# Port Configuration
-PVSERVER_PORT_RANGE = (11111, 11116)  # 6 ports: 11111-11116
+from config import PORT_RANGE_START, PORT_RANGE_END
+
+# Port Configuration (PVSERVER_PORT_RANGE_START/END in the environment)
+PVSERVER_PORT_RANGE = (PORT_RANGE_START, PORT_RANGE_END)
 
 class PortError(Exception):
     """Custom exception for port-related errors"""
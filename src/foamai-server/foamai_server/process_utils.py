@@ -2,14 +2,30 @@ import subprocess
 import os
 import psutil
 import atexit
+import select
 import threading
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List
 
-from process_validator import validate_pvserver_pid
+from config import PVSERVER_START_TIMEOUT
+from process_validator import validate_pvserver_pid, validator
+from metrics import metrics
 
+# pvserver prints this once it listens for clients
+PVSERVER_READY_MARKER = "Accepting connection"
+# Seconds between readiness checks while a pvserver starts
+READINESS_POLL_INTERVAL = 0.1
+# Output lines kept per pvserver for error messages
+OUTPUT_TAIL_LINES = 50
+
+PVSERVER_STARTUP_DURATION = metrics.histogram(
+    "foamai_pvserver_startup_seconds",
+    "Time from launching a pvserver until it accepts connections",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+)
 
 class ProcessError(Exception):
     """Custom exception for process-related errors"""
@@ -22,43 +38,143 @@ class PVServerError(ProcessError):
 
 class ProcessManager:
     """Manages the lifecycle of pvserver subprocesses."""
+
+    # Seconds between checks of tracked processes when pidfds are unavailable
+    REAPER_INTERVAL = 5
     
     def __init__(self):
         self._active_pvservers: Dict[int, Dict] = {}
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._output: Dict[int, deque] = {}
         self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_w, False)
         self._shutdown_in_progress = False
         self._setup_exit_handler()
         self._start_reaper_thread()
 
     def _start_reaper_thread(self):
-        """Starts a background thread to reap zombie processes."""
-        reaper_thread = threading.Thread(target=self._reap_zombies, daemon=True)
+        """Starts a background thread that records pvserver exits as they happen."""
+        reaper_thread = threading.Thread(target=self._reap_exited, daemon=True)
         reaper_thread.start()
-        print("🧟‍♂️ Started zombie reaper thread to clean up defunct processes.")
+        print("🧟‍♂️ Started reaper thread to track pvserver exits.")
+
+    def _wake_reaper(self):
+        """Make the reaper pick up newly tracked processes right away."""
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _reap_exited(self):
+        """
+        Wait for tracked pvservers to exit and reap them.
+
+        Each tracked process gets a pidfd (Linux 5.3+), which becomes readable
+        the moment the process exits, so exits are recorded in the liveness
+        cache immediately. Where pidfds are unavailable the tracked processes
+        are polled every REAPER_INTERVAL seconds instead. Only our own
+        pvservers are waited for: other children (e.g. solver runs) are
+        reaped by whoever started them.
+        """
+        poller = select.poll()
+        poller.register(self._wakeup_r, select.POLLIN)
+        pidfds: Dict[int, int] = {}  # pid -> pidfd
 
-    def _reap_zombies(self):
-        """Periodically reap dead child processes to prevent them from becoming zombies."""
         while not self._shutdown_in_progress:
-            try:
-                # Non-blocking wait for any child process to exit.
-                # This cleans up zombies.
-                pid, status = os.waitpid(-1, os.WNOHANG)
-                while pid > 0:
-                    print(f"🧹 Reaped zombie process PID {pid} with status {status}.")
-                    with self._lock:
-                        if pid in self._active_pvservers:
-                            print(f"🧟‍♂️ Zombie PID {pid} was a tracked pvserver. Removing from tracking.")
-                            del self._active_pvservers[pid]
-                    # Check for more zombies immediately, in case multiple children exited.
-                    pid, status = os.waitpid(-1, os.WNOHANG)
-            except ChildProcessError:
-                # This error is expected and simply means there are no children to reap.
-                pass
-            except Exception as e:
-                print(f"🧟‍♂️ Reaper thread encountered an error: {e}")
-            
-            # Wait for a short interval before checking again.
-            time.sleep(5)
+            with self._lock:
+                processes = dict(self._processes)
+
+            if hasattr(os, "pidfd_open"):
+                for pid in processes.keys() - pidfds.keys():
+                    try:
+                        pidfds[pid] = os.pidfd_open(pid)
+                        poller.register(pidfds[pid], select.POLLIN)
+                    except OSError:
+                        pass  # Already gone; poll() below reaps it
+
+            for pid, process in processes.items():
+                try:
+                    returncode = process.poll()
+                except Exception as e:
+                    print(f"🧟‍♂️ Reaper thread encountered an error: {e}")
+                    continue
+                if returncode is not None:
+                    self._record_exit(pid, returncode)
+
+            for pid in pidfds.keys() - processes.keys():
+                pidfd = pidfds.pop(pid)
+                poller.unregister(pidfd)
+                os.close(pidfd)
+
+            for fd, _ in poller.poll(self.REAPER_INTERVAL * 1000):
+                if fd == self._wakeup_r:
+                    os.read(self._wakeup_r, 4096)
+
+    def _record_exit(self, pid: int, returncode: int):
+        """Forget an exited pvserver and mark it dead in the liveness cache."""
+        print(f"🧹 Reaped pvserver PID {pid} with exit code {returncode}.")
+        with self._lock:
+            self._active_pvservers.pop(pid, None)
+            self._processes.pop(pid, None)
+            self._output.pop(pid, None)
+        validator.mark_exited(pid)
+
+    def _drain(self, stream, name: str, output: deque, ready: threading.Event):
+        """
+        Read a pvserver output pipe until the process exits.
+
+        Keeps the pipe from filling up (which would stall pvserver), keeps
+        the last lines for error messages and signals readiness when the
+        'Accepting connection(s)' line appears.
+        """
+        try:
+            for raw in iter(stream.readline, b""):
+                line = raw.decode("utf-8", errors="replace").rstrip()
+                output.append(f"{name}: {line}")
+                if PVSERVER_READY_MARKER in line:
+                    ready.set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+
+    def _is_listening(self, pid: int, port: int) -> bool:
+        """Check whether a process has a socket listening on a port, without connecting to it."""
+        try:
+            return any(
+                conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port
+                for conn in psutil.Process(pid).net_connections(kind="tcp")
+            )
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def _wait_until_ready(self, process: subprocess.Popen, port: int, ready: threading.Event,
+                          output: deque, timeout: float):
+        """
+        Wait until a starting pvserver accepts connections.
+
+        Ready means the 'Accepting connection(s)' line was printed or the
+        process listens on its port. A TCP connect is not used as a probe:
+        pvserver would take it as its client and exit when it disconnects.
+
+        Raises:
+            PVServerError: If the process exits or is not ready before the deadline.
+        """
+        deadline = time.monotonic() + timeout
+        while not ready.wait(READINESS_POLL_INTERVAL):
+            if process.poll() is not None:
+                raise PVServerError(
+                    f"PVServer exited with code {process.returncode} during startup. Output: {' | '.join(output)}"
+                )
+            if self._is_listening(process.pid, port):
+                return
+            if time.monotonic() >= deadline:
+                process.kill()
+                process.wait()
+                raise PVServerError(
+                    f"PVServer did not accept connections on port {port} within {timeout:.0f}s. Output: {' | '.join(output)}"
+                )
 
     def _setup_exit_handler(self):
         """Set up a handler to clean up processes on exit."""
@@ -84,9 +200,10 @@ class ProcessManager:
             except Exception as e:
                 print(f"⚠️ Error stopping pvserver {pid} during shutdown: {e}")
 
-    def start_pvserver(self, case_path: str, port: int, task_id: str) -> int:
+    def start_pvserver(self, case_path: str, port: int, task_id: str,
+                       timeout: float = PVSERVER_START_TIMEOUT) -> int:
         """
-        Start a pvserver process and track it.
+        Start a pvserver process, wait until it accepts connections and track it.
         
         Returns:
             int: PID of the started process.
@@ -111,12 +228,18 @@ class ProcessManager:
                 cwd=str(case_dir)
             )
             
-            # Give it a moment to start and check if it died immediately
-            time.sleep(1) # Short delay to allow process to initialize or fail
-            process.poll()
-            if process.returncode is not None:
-                _, stderr = process.communicate()
-                raise PVServerError(f"PVServer failed to start. Stderr: {stderr.decode('utf-8', 'ignore')}")
+            # Drain both pipes for the lifetime of the process
+            output = deque(maxlen=OUTPUT_TAIL_LINES)
+            ready = threading.Event()
+            for stream, name in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+                threading.Thread(
+                    target=self._drain, args=(stream, name, output, ready),
+                    name=f"pvserver-{process.pid}-{name}", daemon=True
+                ).start()
+
+            start_time = time.monotonic()
+            self._wait_until_ready(process, port, ready, output, timeout)
+            PVSERVER_STARTUP_DURATION.observe(time.monotonic() - start_time)
 
             with self._lock:
                 self._active_pvservers[process.pid] = {
@@ -125,12 +248,19 @@ class ProcessManager:
                     'case_path': str(case_path),
                     'started': datetime.now()
                 }
+                self._processes[process.pid] = process
+                self._output[process.pid] = output
+            validator.mark_started(process.pid, port)
+            self._wake_reaper()
             
-            print(f"✅ Started and now tracking pvserver PID {process.pid} on port {port}")
+            print(f"✅ Started and now tracking pvserver PID {process.pid} on port {port} "
+                  f"(ready after {time.monotonic() - start_time:.2f}s)")
             return process.pid
 
         except FileNotFoundError:
             raise PVServerError("'pvserver' command not found. Is ParaView installed and in the system's PATH?")
+        except PVServerError:
+            raise
         except Exception as e:
             raise PVServerError(f"An unexpected error occurred while starting pvserver: {e}")
 
@@ -153,6 +283,7 @@ class ProcessManager:
         #             print(f"⚠️ PID {pid} not tracked by ProcessManager. Skipping stop.")
         #             return False
 
+        stopped = True
         try:
             if not psutil.pid_exists(pid):
                 print(f"🔄 pvserver PID {pid} was already stopped.")
@@ -176,16 +307,34 @@ class ProcessManager:
             return True # It's already stopped, so the goal is achieved.
         except (psutil.AccessDenied, Exception) as e:
             print(f"❌ Error stopping pvserver PID {pid}: {e}")
+            stopped = False
             return False
         finally:
             # If the process was tracked, always remove it from the dict.
             with self._lock:
+                self._processes.pop(pid, None)
+                self._output.pop(pid, None)
                 if pid in self._active_pvservers:
                     del self._active_pvservers[pid]
                     if not is_shutdown:
                         # This should not be printed, as the logic is now removed.
                         # Keeping the nested if for structure.
                         pass
+            if stopped:
+                validator.mark_exited(pid)
+
+    def assign_pvserver(self, pid: int, task_id: str, case_path: str):
+        """Record the task and case a tracked (e.g. pre-started) pvserver now serves."""
+        with self._lock:
+            info = self._active_pvservers.get(pid)
+            if info is not None:
+                info['task_id'] = task_id
+                info['case_path'] = str(case_path)
+
+    def is_tracked(self, pid: int) -> bool:
+        """Check whether a pvserver started by this manager is still running."""
+        with self._lock:
+            return pid in self._processes
 
     def get_active_pvserver_summary(self) -> Dict:
         """Get a summary of currently tracked pvservers."""
@@ -195,6 +344,11 @@ class ProcessManager:
                 "count": len(self._active_pvservers)
             }
 
+    def get_pvserver_output(self, pid: int) -> List[str]:
+        """Get the last output lines of a tracked pvserver."""
+        with self._lock:
+            return list(self._output.get(pid, ()))
+
     def get_tracked_pvservers(self) -> Dict:
         """Get the full dictionary of tracked pvservers."""
         with self._lock:
@@ -5,9 +5,13 @@ This module provides a clean way to compose process validation logic,
 maintaining separation of concerns.
 """
 
-from typing import Dict, List
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
 import psutil
 
+from config import PVSERVER_LIVENESS_TTL
+
 def validate_pvserver_pid(pid: int, expected_port: int = None) -> bool:
     """
     Validate that a PID is actually a running pvserver process.
@@ -60,7 +64,36 @@ def validate_pvserver_pid(pid: int, expected_port: int = None) -> bool:
 
 
 class ProcessValidator:
-    """A service for validating that pvserver processes are running."""
+    """
+    A service for validating that pvserver processes are running.
+
+    Results are cached per (pid, port) so repeated reads of the same records
+    do not scan /proc. pvservers started by this process are reported by
+    the ProcessManager reaper when they exit and never expire; any other
+    pid (started by a Celery worker, or before a restart) is re-checked
+    once its entry is older than the TTL.
+    """
+
+    # Expired entries are swept once the cache grows beyond this
+    MAX_ENTRIES = 1024
+
+    def __init__(self, ttl: float = PVSERVER_LIVENESS_TTL):
+        self.ttl = ttl
+        # (pid, port) -> (alive, expiry on the monotonic clock, None for never)
+        self._cache: Dict[Tuple[int, int], Tuple[bool, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def mark_started(self, pid: int, port: int):
+        """Record a pvserver started by this process; it stays alive until mark_exited."""
+        with self._lock:
+            self._cache[(pid, port)] = (True, None)
+
+    def mark_exited(self, pid: int):
+        """Record that a process exited. The pid is re-checked after the TTL in case it is reused."""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == pid]:
+                self._cache[key] = (False, expires)
 
     def is_running(self, record: Dict) -> bool:
         """
@@ -83,8 +116,28 @@ class ProcessValidator:
         
         if not pid or not port:
             return False
-        
-        return validate_pvserver_pid(pid, port)
+
+        key = (pid, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and (cached[1] is None or cached[1] > now):
+            return cached[0]
+
+        alive = validate_pvserver_pid(pid, port)
+        with self._lock:
+            if len(self._cache) >= self.MAX_ENTRIES:
+                self._sweep(now)
+            # The reaper may have recorded this pid while it was validated
+            current = self._cache.get(key)
+            if current is None or current == cached:
+                self._cache[key] = (alive, now + self.ttl)
+        return alive
+
+    def _sweep(self, now: float):
+        """Drop expired entries. Must be called with the lock held."""
+        for key in [key for key, (_, expires) in self._cache.items() if expires is not None and expires <= now]:
+            del self._cache[key]
 
     def filter_running(self, records: List[Dict]) -> List[Dict]:
         """
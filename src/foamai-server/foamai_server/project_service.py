@@ -1,10 +1,15 @@
 import os
 import re
+import json
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
-from config import PROJECTS_BASE_PATH
+from config import PROJECTS_BASE_PATH, COMMAND_CPU_LIMIT, COMMAND_MEMORY_LIMIT_MB
+from file_index import file_index
+
+# Values of the 'kind' filter of get_project_info
+FILE_KINDS = ("time", "case")
 
 class ProjectError(Exception):
     """Base exception for project-related errors."""
@@ -91,6 +96,9 @@ def scan_active_run_directory(active_run_path: Path) -> Tuple[List[str], int, in
     """
     Scan the active_run directory and return file information.
     
+    Listings come from the cached file index, so only directories that
+    changed since the previous scan are read again.
+    
     Args:
         active_run_path: Path to the active_run directory
         
@@ -100,30 +108,26 @@ def scan_active_run_directory(active_run_path: Path) -> Tuple[List[str], int, in
         - file_count: Number of readable files
         - total_size: Total size of readable files in bytes
     """
-    if not active_run_path.exists() or not active_run_path.is_dir():
-        return [], 0, 0
-    
-    files = []
-    total_size = 0
+    entries, total_size = file_index.list_files(active_run_path)
+    return [entry.path for entry in entries], len(entries), total_size
+
+
+def is_time_directory_file(relative_path: str) -> bool:
+    """
+    Check whether a path relative to active_run lies in a time directory.
     
+    Matches both '0.5/U' and decomposed 'processor3/0.5/U'.
+    """
+    parts = relative_path.split("/")
+    if parts[0].startswith("processor") and len(parts) > 2:
+        parts = parts[1:]
+    if len(parts) < 2:
+        return False
     try:
-        # Use rglob to recursively find all files
-        for item in active_run_path.rglob("*"):
-            if item.is_file():
-                try:
-                    # Get path relative to active_run directory
-                    relative_path = item.relative_to(active_run_path)
-                    files.append(str(relative_path))
-                    # Get file size
-                    total_size += item.stat().st_size
-                except (PermissionError, OSError, FileNotFoundError):
-                    # Skip files we can't read or that disappeared
-                    continue
-    except (PermissionError, OSError):
-        # If we can't even scan the directory, return empty results
-        return [], 0, 0
-    
-    return files, len(files), total_size
+        float(parts[0])
+        return True
+    except ValueError:
+        return False
 
 
 def read_project_description(project_path: Path) -> str:
@@ -163,6 +167,43 @@ def write_project_description(project_path: Path, description: str):
             pass
 
 
+def read_project_limits(project_path: Path) -> Dict:
+    """
+    Read the project's command resource limits from limits.json.
+    
+    Args:
+        project_path: Path to the project directory
+        
+    Returns:
+        Dict with cpu_limit (cores) and memory_limit_mb; None means unlimited.
+        Missing entries fall back to COMMAND_CPU_LIMIT and COMMAND_MEMORY_LIMIT_MB.
+    """
+    limits = {"cpu_limit": COMMAND_CPU_LIMIT or None, "memory_limit_mb": COMMAND_MEMORY_LIMIT_MB or None}
+    limits_file = project_path / "limits.json"
+    try:
+        stored = json.loads(limits_file.read_text(encoding='utf-8'))
+        limits.update({key: stored[key] for key in limits if key in stored})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError):
+        # An unreadable file leaves the defaults in place
+        pass
+    return limits
+
+
+def write_project_limits(project_path: Path, cpu_limit: Optional[float], memory_limit_mb: Optional[int]):
+    """
+    Write the project's command resource limits to limits.json.
+    
+    Args:
+        project_path: Path to the project directory
+        cpu_limit: Cores the project's commands may use together (None: unlimited)
+        memory_limit_mb: Memory the project's commands may use together (None: unlimited)
+    """
+    limits_file = project_path / "limits.json"
+    limits_file.write_text(json.dumps({"cpu_limit": cpu_limit, "memory_limit_mb": memory_limit_mb}), encoding='utf-8')
+
+
 def get_directory_creation_time(directory_path: Path) -> datetime:
     """
     Get the creation time of a directory.
@@ -249,10 +290,32 @@ class ProjectService:
         project_path = self.base_path / project_name
         return project_path.exists() and project_path.is_dir()
     
-    def get_project_info(self, project_name: str) -> Dict:
-        """Get project information"""
+    def get_project_info(
+        self,
+        project_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        prefix: Optional[str] = None,
+        kind: Optional[str] = None
+    ) -> Dict:
+        """
+        Get project information.
+        
+        Args:
+            project_name: Name of the project
+            offset: Number of matching files to skip
+            limit: Maximum number of files to return (all if None)
+            prefix: Only list files whose path starts with this (e.g. 'system/')
+            kind: 'time' for files in time directories, 'case' for everything else
+        """
         if not self.project_exists(project_name):
             raise ProjectError(f"Project '{project_name}' not found")
+        if offset < 0:
+            raise ProjectError("offset must not be negative")
+        if limit is not None and limit < 0:
+            raise ProjectError("limit must not be negative")
+        if kind is not None and kind not in FILE_KINDS:
+            raise ProjectError(f"Invalid kind '{kind}'. Must be one of: {', '.join(FILE_KINDS)}")
         
         project_path = self.base_path / project_name
         active_run_path = project_path / "active_run"
@@ -263,8 +326,17 @@ class ProjectService:
         # Get creation time
         created_at = get_directory_creation_time(project_path)
         
-        # Scan active_run directory for files
-        files, file_count, total_size = scan_active_run_directory(active_run_path)
+        # List active_run from the cached index, then filter and paginate
+        entries, total_size = file_index.list_files(active_run_path)
+        files = [entry.path for entry in entries]
+        file_count = len(files)
+        if prefix:
+            files = [path for path in files if path.startswith(prefix)]
+        if kind is not None:
+            wanted = kind == "time"
+            files = [path for path in files if is_time_directory_file(path) == wanted]
+        matched_count = len(files)
+        files = files[offset:offset + limit] if limit is not None else files[offset:]
         
         return {
             "project_name": project_name,
@@ -273,7 +345,10 @@ class ProjectService:
             "created_at": created_at,
             "files": files,
             "file_count": file_count,
-            "total_size": total_size
+            "total_size": total_size,
+            "matched_count": matched_count,
+            "offset": offset,
+            "limit": limit
         }
     
     def delete_project(self, project_name: str):
@@ -282,12 +357,33 @@ class ProjectService:
             raise ProjectError(f"Project '{project_name}' not found")
         
         project_path = self.base_path / project_name
+        file_index.forget(project_path)
         try:
             import shutil
             shutil.rmtree(project_path)
         except OSError as e:
             raise ProjectError(f"Failed to delete project '{project_name}': {e}")
     
+    def get_project_limits(self, project_name: str) -> Dict:
+        """Get the resource limits applied to a project's commands"""
+        if not self.project_exists(project_name):
+            raise ProjectError(f"Project '{project_name}' not found")
+        return {"project_name": project_name, **read_project_limits(self.base_path / project_name)}
+    
+    def set_project_limits(self, project_name: str, cpu_limit: Optional[float], memory_limit_mb: Optional[int]) -> Dict:
+        """Set the resource limits of a project's commands; None removes a limit"""
+        if not self.project_exists(project_name):
+            raise ProjectError(f"Project '{project_name}' not found")
+        if cpu_limit is not None and cpu_limit <= 0:
+            raise ProjectError("cpu_limit must be positive")
+        if memory_limit_mb is not None and memory_limit_mb <= 0:
+            raise ProjectError("memory_limit_mb must be positive")
+        try:
+            write_project_limits(self.base_path / project_name, cpu_limit, memory_limit_mb)
+        except OSError as e:
+            raise ProjectError(f"Failed to write limits of project '{project_name}': {e}")
+        return self.get_project_limits(project_name)
+    
     def get_project_path(self, project_name: str) -> Path:
         """Get the full path to a project"""
         return self.base_path / project_name 
\ No newline at end of file
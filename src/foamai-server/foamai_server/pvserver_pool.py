@@ -0,0 +1,232 @@
+"""
+Pool of pre-started pvserver processes.
+
+Starting a pvserver takes seconds, so the pool keeps PVSERVER_POOL_SIZE idle
+servers running and hands one out as soon as a case asks for visualization.
+A pvserver does not depend on the case it serves (clients open the case by
+its absolute path), so any idle server can be given to any case. After each
+hand-out the pool is refilled in the background, as far as the configured
+port range and MAX_CONCURRENT_PVSERVERS allow.
+
+A maintenance thread refills the pool periodically and reclaims assigned
+servers whose last_activity is older than CLEANUP_THRESHOLD_HOURS.
+
+The pool only pre-starts servers once start() has been called (by the API
+process); elsewhere acquire() simply cold-starts a server.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from config import (
+    MAX_CONCURRENT_PVSERVERS, PVSERVER_POOL_SIZE, PVSERVER_POOL_MAINTENANCE_INTERVAL,
+    PROJECTS_BASE_PATH
+)
+from process_utils import PVServerError, process_manager
+from port_utils import port_is_available, get_port_range
+from database import count_running_pvservers, DatabaseError
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Task ID recorded for pvservers waiting in the pool
+POOL_TASK_ID = "pool"
+# Startup latencies kept for the pool statistics
+LATENCY_SAMPLES = 200
+
+ACQUIRE_DURATION = metrics.histogram(
+    "foamai_pvserver_acquire_seconds",
+    "Time to hand out a pvserver, by source (pool or cold start)",
+    ["source"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30)
+)
+
+class PVServerPool:
+    """Keeps idle pvservers warm and hands them out on request"""
+
+    def __init__(self, size: int = PVSERVER_POOL_SIZE, max_servers: int = MAX_CONCURRENT_PVSERVERS):
+        self.size = size
+        self.max_servers = max_servers
+        self._idle: List[Dict] = []  # {"pid", "port", "started"}, oldest first
+        self._reserved_ports: Set[int] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._hits = 0
+        self._misses = 0
+        self._cold_start_seconds = deque(maxlen=LATENCY_SAMPLES)
+        self._acquire_seconds = deque(maxlen=LATENCY_SAMPLES)
+
+    def start(self):
+        """Start pre-starting servers and the maintenance thread"""
+        if self._running or self.size <= 0:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._maintain, name="pvserver-pool", daemon=True)
+        self._thread.start()
+        logger.info(f"PVServer pool started (size {self.size}, ports {get_port_range()})")
+
+    def shutdown(self):
+        """Stop the maintenance thread and all idle servers"""
+        self._running = False
+        self._wakeup.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server in idle:
+            process_manager.stop_pvserver(server["pid"], is_shutdown=True)
+
+    def acquire(self, case_path: str, port: Optional[int] = None) -> Dict:
+        """
+        Get a running pvserver for a case: an idle one from the pool if
+        possible, otherwise a freshly started one.
+
+        Args:
+            case_path: Case directory the server is for
+            port: Specific port to use (None for any port in the range)
+
+        Returns:
+            Dict: {"pid", "port", "warm"} where warm tells whether the server came from the pool
+
+        Raises:
+            PVServerError: If no server could be started
+        """
+        start = time.perf_counter()
+        server = self._take_idle(port)
+        if server is not None:
+            warm = True
+        else:
+            warm = False
+            server = self._start_server(case_path, port)
+            self._cold_start_seconds.append(time.perf_counter() - start)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if warm:
+                self._hits += 1
+            else:
+                self._misses += 1
+            self._acquire_seconds.append(elapsed)
+        ACQUIRE_DURATION.observe(elapsed, "pool" if warm else "cold")
+        logger.info(f"{'Pool hit' if warm else 'Pool miss'}: pvserver PID {server['pid']} on port {server['port']} "
+                    f"for {case_path} in {elapsed * 1000:.0f} ms")
+        self._wakeup.set()
+        return {"pid": server["pid"], "port": server["port"], "warm": warm}
+
+    def _take_idle(self, port: Optional[int]) -> Optional[Dict]:
+        """Remove and return a live idle server (on the given port, if any)"""
+        with self._lock:
+            for server in list(self._idle):
+                if not process_manager.is_tracked(server["pid"]):
+                    # Died while idle; the reaper has already forgotten it
+                    self._idle.remove(server)
+                    continue
+                if port is None or server["port"] == port:
+                    self._idle.remove(server)
+                    return server
+        return None
+
+    def _claim_port(self, port: Optional[int]) -> int:
+        """Reserve a free port so that concurrent starts never pick the same one"""
+        start_port, end_port = get_port_range()
+        # A pvserver may take a while to bind its port, so ports of servers
+        # we started count as taken even if they still look free
+        tracked_ports = {info['port'] for info in process_manager.get_tracked_pvservers().values()}
+        with self._lock:
+            candidates = [port] if port else range(start_port, end_port + 1)
+            for candidate in candidates:
+                if (candidate not in self._reserved_ports and candidate not in tracked_ports
+                        and port_is_available(candidate)):
+                    self._reserved_ports.add(candidate)
+                    return candidate
+        if port:
+            raise PVServerError(f"Specified port {port} is not available.")
+        raise PVServerError("No available ports in the configured range.")
+
+    def _start_server(self, case_path: str, port: Optional[int] = None, task_id: str = POOL_TASK_ID) -> Dict:
+        port = self._claim_port(port)
+        try:
+            pid = process_manager.start_pvserver(case_path, port, task_id)
+        finally:
+            with self._lock:
+                self._reserved_ports.discard(port)
+        return {"pid": pid, "port": port, "started": datetime.now()}
+
+    def _refill(self):
+        """Start idle servers until the pool is full or capacity runs out"""
+        while self._running:
+            try:
+                assigned = count_running_pvservers()
+            except DatabaseError as e:
+                logger.warning(f"Cannot refill pvserver pool: {e}")
+                return
+            with self._lock:
+                idle = len(self._idle)
+            if idle >= self.size or assigned + idle >= self.max_servers:
+                return
+            try:
+                server = self._start_server(str(PROJECTS_BASE_PATH))
+            except PVServerError as e:
+                logger.warning(f"Cannot pre-start pvserver for the pool: {e}")
+                return
+            with self._lock:
+                self._idle.append(server)
+            logger.info(f"Pre-started pvserver PID {server['pid']} on port {server['port']} ({idle + 1}/{self.size} idle)")
+
+    def _maintain(self):
+        """Refill the pool after hand-outs and periodically reclaim inactive servers"""
+        # Imported here: pvserver_service uses the pool
+        from pvserver_service import cleanup_inactive_pvservers
+
+        last_cleanup = 0.0
+        while self._running:
+            self._refill()
+            if time.monotonic() - last_cleanup >= PVSERVER_POOL_MAINTENANCE_INTERVAL:
+                last_cleanup = time.monotonic()
+                try:
+                    reclaimed = cleanup_inactive_pvservers()
+                    if reclaimed:
+                        self._refill()
+                except Exception as e:
+                    logger.warning(f"Reclaiming inactive pvservers failed: {e}")
+            self._wakeup.wait(PVSERVER_POOL_MAINTENANCE_INTERVAL)
+            self._wakeup.clear()
+
+    def get_stats(self) -> Dict:
+        """Pool size, hit rate and startup latencies (in milliseconds)"""
+        with self._lock:
+            total = self._hits + self._misses
+            acquire = sorted(self._acquire_seconds)
+            cold = sorted(self._cold_start_seconds)
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "idle_ports": [server["port"] for server in self._idle],
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else None,
+                "startup_ms_p50": _percentile(acquire, 0.50),
+                "startup_ms_p95": _percentile(acquire, 0.95),
+                "cold_start_ms_p50": _percentile(cold, 0.50),
+            }
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+# Global pvserver pool instance
+pvserver_pool = PVServerPool()
+
+def _pvserver_occupancy() -> Dict:
+    tracked = process_manager.get_tracked_pvservers()
+    idle = sum(1 for info in tracked.values() if info["task_id"] == POOL_TASK_ID)
+    return {("idle",): idle, ("assigned",): len(tracked) - idle}
+
+metrics.gauge("foamai_pvservers", "pvservers started by this process, by state", _pvserver_occupancy, ["state"])
+metrics.gauge("foamai_pvserver_capacity", "Maximum number of concurrent pvservers", lambda: pvserver_pool.max_servers)
+metrics.gauge("foamai_pvserver_pool_size", "Target number of idle pvservers", lambda: pvserver_pool.size)
@@ -8,8 +8,7 @@ from config import MAX_CONCURRENT_PVSERVERS, CLEANUP_THRESHOLD_HOURS
 # Import our utility modules
 from process_utils import PVServerError, process_manager
 from port_utils import (
-    port_is_available, find_available_port, PortInUseError,
-    get_port_range, get_available_port_count
+    PortInUseError, get_port_range, get_available_port_count
 )
 from database import (
     get_running_pvservers, get_running_pvserver_for_case,
@@ -17,10 +16,11 @@ from database import (
     link_task_to_pvserver, DatabaseError, TaskNotFoundError,
     create_task, update_task_status, get_inactive_pvservers,
     set_pvserver_running, set_pvserver_error, set_pvserver_stopped,
-    get_all_project_pvservers, set_project_pvserver_stopped
+    get_all_project_pvservers, set_project_pvserver_stopped, touch_pvserver_activity
 )
 from query_pvservers import get_system_pvservers
 from process_validator import validator
+from pvserver_pool import pvserver_pool
 
 logger = logging.getLogger(__name__)
 
@@ -40,21 +40,11 @@ def _check_concurrency_limit():
     except DatabaseError as e:
         raise PVServerServiceError(f"Database error checking concurrency: {e}")
 
-def _find_and_validate_port(port: Optional[int] = None) -> int:
-    """Finds an available port or validates a specific one, raising an error if unavailable."""
-    if port:
-        if not port_is_available(port):
-            msg = f"Specified port {port} is not available."
-            logger.error(msg)
-            raise PVServerServiceError(msg)
-        return port
-    else:
-        available_port = find_available_port()
-        if not available_port:
-            msg = "No available ports in the configured range."
-            logger.error(msg)
-            raise PVServerServiceError(msg)
-        return available_port
+def _stop_project_pvserver_records(port: int, message: str):
+    """Mark the project pvserver records of a stopped server as stopped."""
+    for record in get_all_project_pvservers():
+        if record.get('port') == port and record.get('status') == 'running':
+            set_project_pvserver_stopped(record['project_name'], message)
 
 # --- Public Service Functions ---
 
@@ -68,6 +58,7 @@ def ensure_pvserver_for_task(task_id: str, case_path: str) -> Dict:
         if existing:
             logger.info(f"Task {task_id}: Reusing pvserver on port {existing['pvserver_port']} for case {case_path}")
             link_task_to_pvserver(task_id, existing['pvserver_port'], existing['pvserver_pid'])
+            touch_pvserver_activity(existing['pvserver_port'])
             return {
                 "status": "reused",
                 "port": existing['pvserver_port'],
@@ -76,10 +67,11 @@ def ensure_pvserver_for_task(task_id: str, case_path: str) -> Dict:
             }
 
         _check_concurrency_limit()
-        port = _find_and_validate_port()
 
-        logger.info(f"Task {task_id}: Starting new pvserver on port {port} for case {case_path}")
-        pid = process_manager.start_pvserver(case_path, port, task_id)
+        server = pvserver_pool.acquire(case_path)
+        port, pid = server["port"], server["pid"]
+        logger.info(f"Task {task_id}: Using pvserver on port {port} for case {case_path}")
+        process_manager.assign_pvserver(pid, task_id, case_path)
         set_pvserver_running(task_id, port, pid)
         
         return {
@@ -108,6 +100,7 @@ def start_pvserver_for_case(case_path: str, port: Optional[int] = None) -> Dict:
         existing = get_running_pvserver_for_case(case_path)
         if existing:
             logger.info(f"Reusing existing pvserver on port {existing['pvserver_port']} for case {case_path}")
+            touch_pvserver_activity(existing['pvserver_port'])
             return {
                 "status": "running", "port": existing['pvserver_port'], "pid": existing['pvserver_pid'],
                 "connection_string": f"localhost:{existing['pvserver_port']}", "case_path": case_path,
@@ -115,20 +108,23 @@ def start_pvserver_for_case(case_path: str, port: Optional[int] = None) -> Dict:
             }
 
         _check_concurrency_limit()
-        validated_port = _find_and_validate_port(port)
+
+        server = pvserver_pool.acquire(case_path, port)
+        validated_port, pid = server["port"], server["pid"]
 
         temp_task_id = f"direct_{validated_port}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         create_task(temp_task_id, "pending", f"Direct pvserver for {case_path}")
         update_task_status(temp_task_id, "running", f"Starting pvserver on port {validated_port}", case_path=case_path)
         
-        pid = process_manager.start_pvserver(case_path, validated_port, temp_task_id)
+        process_manager.assign_pvserver(pid, temp_task_id, case_path)
         set_pvserver_running(temp_task_id, validated_port, pid)
         
-        logger.info(f"Started new pvserver on port {validated_port} for case {case_path}")
+        logger.info(f"{'Assigned pre-started' if server['warm'] else 'Started new'} pvserver on port {validated_port} for case {case_path}")
         return {
             "status": "running", "port": validated_port, "pid": pid,
             "connection_string": f"localhost:{validated_port}", "case_path": case_path,
-            "message": "Started new server.", "reused": False
+            "message": "Assigned pre-started server." if server["warm"] else "Started new server.",
+            "reused": False
         }
     except (PVServerError, PortInUseError, DatabaseError, PVServerServiceError) as e:
         logger.error(f"Failed to start pvserver for case {case_path}: {e}")
@@ -175,7 +171,8 @@ def list_active_pvservers() -> Dict:
         return {
             "pvservers": formatted_servers, "total_count": len(formatted_servers),
             "port_range": get_port_range(),
-            "available_ports": get_available_port_count()
+            "available_ports": get_available_port_count(),
+            "pool": pvserver_pool.get_stats()
         }
     except (DatabaseError, Exception) as e:
         logger.exception("Failed to list active pvservers")
@@ -194,6 +191,7 @@ def cleanup_inactive_pvservers() -> List[str]:
                 logger.info(f"Stopping inactive running pvserver: Task {task_id}, Port {port}")
                 if process_manager.stop_pvserver(pid):
                     set_pvserver_stopped(task_id, "Cleaned up due to inactivity.")
+                    _stop_project_pvserver_records(port, "Cleaned up due to inactivity.")
                     cleaned_up.append(f"stopped_task_{task_id}")
             else:
                 logger.info(f"Cleaning up dead pvserver DB entry: Task {task_id}")
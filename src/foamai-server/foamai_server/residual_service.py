@@ -0,0 +1,236 @@
+"""
+Residual service for tracking solver convergence while a job runs.
+
+Solver output is parsed line by line as it is produced (see the on_output
+hook of CommandService.execute_command) into a compact columnar history:
+one row per time step holding the time, deltaT, Courant numbers, execution
+time and the initial/final residual of every solved field. Columns are
+stdlib ``array('d')`` buffers (8 bytes per value), so a long run costs a
+few hundred bytes per time step instead of keeping the whole log text.
+
+Clients poll ``GET /api/projects/{name}/residuals?since=<step>`` and only
+receive rows they have not seen yet. When no in-memory history exists
+(e.g. after a server restart) the newest ``log.*`` file of the project is
+parsed instead.
+"""
+
+import re
+import math
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import PROJECTS_BASE_PATH, RESIDUAL_HISTORY_JOBS
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+# Solver log lines of interest. Each pattern is only tried on lines with the
+# matching prefix, so the bulk of the output costs one startswith/'in' check.
+TIME_RE = re.compile(r"^Time = ([-+0-9.eE]+)")
+COURANT_RE = re.compile(r"^Courant Number mean: (\S+) max: (\S+)")
+DELTA_T_RE = re.compile(r"^deltaT = (\S+)")
+EXECUTION_TIME_RE = re.compile(r"^ExecutionTime = (\S+) s")
+SOLVING_RE = re.compile(
+    r"Solving for (\w+), Initial residual = ([^,]+), Final residual = ([^,]+), No Iterations (\d+)"
+)
+
+# Scalar columns every row has, in response order
+SCALAR_COLUMNS = ("time", "delta_t", "courant_mean", "courant_max", "execution_time")
+
+class ResidualError(Exception):
+    """Custom exception for residual history errors"""
+    pass
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return NAN
+
+class ResidualHistory:
+    """Columnar residual history of one solver run, filled one line at a time"""
+
+    def __init__(self):
+        self._columns: Dict[str, array] = {name: array("d") for name in SCALAR_COLUMNS}
+        self._initial: Dict[str, array] = {}
+        self._final: Dict[str, array] = {}
+        self._row: Optional[Dict] = None
+        # Transient solvers print Courant number and deltaT before "Time = "
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.finished = False
+
+    def __len__(self) -> int:
+        return len(self._columns["time"])
+
+    def feed(self, line: str):
+        """Parse one line of solver output"""
+        if line.startswith("Time = "):
+            match = TIME_RE.match(line)
+            if match:
+                self._commit()
+                self._row = {"time": _to_float(match.group(1)), "initial": {}, "final": {}, **self._pending}
+                self._pending = {}
+            return
+
+        row = self._row
+        if row is None:
+            row = self._pending
+            if not line.startswith(("Courant Number mean: ", "deltaT = ")):
+                return
+
+        if "Solving for " in line:
+            match = SOLVING_RE.search(line)
+            if match:
+                field = match.group(1)
+                # PIMPLE/PISO solve a field several times per step: the first
+                # initial residual and the last final residual are the ones to plot
+                row["initial"].setdefault(field, _to_float(match.group(2)))
+                row["final"][field] = _to_float(match.group(3))
+        elif line.startswith("Courant Number mean: "):
+            match = COURANT_RE.match(line)
+            if match:
+                row["courant_mean"] = _to_float(match.group(1))
+                row["courant_max"] = _to_float(match.group(2))
+        elif line.startswith("deltaT = "):
+            match = DELTA_T_RE.match(line)
+            if match:
+                row["delta_t"] = _to_float(match.group(1))
+        elif line.startswith("ExecutionTime = "):
+            match = EXECUTION_TIME_RE.match(line)
+            if match:
+                row["execution_time"] = _to_float(match.group(1))
+                # ExecutionTime closes a time step, so the row can be published now
+                self._commit()
+
+    def finish(self):
+        """Publish the last, possibly incomplete, time step"""
+        self._commit()
+        self.finished = True
+
+    def _commit(self):
+        row, self._row = self._row, None
+        if row is None:
+            return
+
+        with self._lock:
+            rows = len(self)
+            for name in SCALAR_COLUMNS:
+                self._columns[name].append(row.get(name, NAN))
+            for values, columns in ((row["initial"], self._initial), (row["final"], self._final)):
+                for field, value in values.items():
+                    if field not in columns:
+                        # Fields that first appear mid-run are back-filled with NaN
+                        columns[field] = array("d", [NAN]) * rows
+                    columns[field].append(value)
+                for field, column in columns.items():
+                    if len(column) == rows:
+                        column.append(NAN)
+
+    def rows_since(self, since: int = 0) -> Dict:
+        """Return the rows from index `since` on, with NaN mapped to None for JSON"""
+        since = max(0, since)
+        with self._lock:
+            data = {name: column[since:].tolist() for name, column in self._columns.items()}
+            data["initial_residuals"] = {field: column[since:].tolist() for field, column in self._initial.items()}
+            data["final_residuals"] = {field: column[since:].tolist() for field, column in self._final.items()}
+            total = len(self)
+
+        data = {
+            key: ({field: _json_safe(values) for field, values in value.items()} if isinstance(value, dict) else _json_safe(value))
+            for key, value in data.items()
+        }
+        data["since"] = since
+        data["next_since"] = total
+        data["row_count"] = max(0, total - since)
+        return data
+
+    @classmethod
+    def from_log(cls, log_path: Path) -> "ResidualHistory":
+        """Build a history by parsing an existing solver log file"""
+        history = cls()
+        with open(log_path, "r", errors="replace") as f:
+            for line in f:
+                history.feed(line)
+        history.finish()
+        return history
+
+def _json_safe(values: List[float]) -> List[Optional[float]]:
+    return [None if math.isnan(value) else value for value in values]
+
+class ResidualService:
+    """Service keeping residual histories of recent jobs"""
+
+    def __init__(self, max_jobs: int = RESIDUAL_HISTORY_JOBS):
+        self.max_jobs = max_jobs
+        self._histories: "OrderedDict[str, Tuple[str, ResidualHistory]]" = OrderedDict()
+        self._log_cache: Dict[str, Tuple[Tuple[int, int], ResidualHistory]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, job_id: str, project_name: str) -> ResidualHistory:
+        """Create the residual history a job's output is parsed into"""
+        history = ResidualHistory()
+        with self._lock:
+            self._histories[job_id] = (project_name, history)
+            while len(self._histories) > self.max_jobs:
+                self._histories.popitem(last=False)
+        return history
+
+    def get_history(self, job_id: str) -> ResidualHistory:
+        """Get the history of a job. Raises ResidualError if unknown."""
+        with self._lock:
+            entry = self._histories.get(job_id)
+        if entry is None:
+            raise ResidualError(f"No residual history for job '{job_id}'")
+        return entry[1]
+
+    def latest_for_project(self, project_name: str) -> Optional[Tuple[str, ResidualHistory]]:
+        """Newest job of a project that is still running or produced at least one time step"""
+        with self._lock:
+            entries = list(self._histories.items())
+        for job_id, (name, history) in reversed(entries):
+            if name == project_name and (len(history) or not history.finished):
+                return job_id, history
+        return None
+
+    def history_from_logs(self, project_name: str, working_directory: str = "active_run") -> Optional[Tuple[str, ResidualHistory]]:
+        """
+        Parse the newest solver log of a project on disk.
+
+        Parsed logs are cached by size and modification time, so repeated
+        polls of a finished run do not re-read the file.
+        """
+        work_dir = Path(PROJECTS_BASE_PATH) / project_name / working_directory
+        try:
+            logs = sorted(
+                (path for path in work_dir.glob("log.*") if path.is_file()),
+                key=lambda path: path.stat().st_mtime_ns,
+                reverse=True
+            )
+        except OSError:
+            return None
+
+        for log_path in logs:
+            stat = log_path.stat()
+            key = str(log_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                cached = self._log_cache.get(key)
+            if cached and cached[0] == signature:
+                history = cached[1]
+            else:
+                history = ResidualHistory.from_log(log_path)
+                with self._lock:
+                    self._log_cache[key] = (signature, history)
+            if len(history):
+                return log_path.name, history
+        return None
+
+
+# Global instance for easy import
+residual_service = ResidualService()
@@ -0,0 +1,283 @@
+"""
+CPU/memory limits and resource accounting for commands.
+
+With cgroup v2 every project gets a cgroup below CGROUP_ROOT whose cpu.max
+and memory.max hold the project's limits, and every command runs in its own
+child cgroup. The kernel then enforces the limits across all processes of
+the project (mpirun and all solver ranks included), and the command's peak
+memory, CPU time and I/O are read from its cgroup when it exits. The command
+is started through a small shell wrapper that joins the cgroup and then
+execs it, so nothing runs in the server process between fork and exec.
+
+Without a usable cgroup v2 hierarchy (no delegation, cgroup v1, containers)
+the limits fall back to the process level: memory via RLIMIT_AS per process
+and cores via the CPU affinity of the command, which its children inherit.
+These are applied to the command right after it was spawned.
+Usage is then sampled from the process tree every RESOURCE_SAMPLE_INTERVAL
+seconds (also with RESOURCE_LIMITS_MODE=off), so very short-lived children
+may be missed.
+"""
+
+import os
+import math
+import uuid
+import errno
+import resource
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import psutil
+
+from config import RESOURCE_LIMITS_MODE, CGROUP_ROOT, RESOURCE_SAMPLE_INTERVAL
+from project_service import read_project_limits
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_MOUNT = Path("/sys/fs/cgroup")
+CPU_PERIOD_USEC = 100000
+CONTROLLERS = ("cpu", "memory", "io")
+
+class ResourceLimitError(Exception):
+    """Custom exception for resource limit errors"""
+    pass
+
+def _write(path: Path, value: str):
+    with open(path, "w") as f:
+        f.write(value)
+
+def _read_flat_keyed(path: Path) -> Dict[str, int]:
+    """Parse a cgroup file of 'key value' lines"""
+    values = {}
+    try:
+        for line in path.read_text().splitlines():
+            key, _, value = line.partition(" ")
+            if value.isdigit():
+                values[key] = int(value)
+    except OSError:
+        pass
+    return values
+
+class CommandLimits:
+    """Limits and accounting of one command; created by ResourceLimiter.prepare()"""
+
+    def __init__(self, mode: str, limits: Dict, cgroup: Optional[Path] = None, cpus: Optional[list] = None):
+        self.mode = mode
+        self.limits = limits
+        self.cgroup = cgroup
+        self.cpus = cpus
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._peak_rss = 0
+        self._cpu_seconds: Dict[int, float] = {}
+        self._io: Dict[int, tuple] = {}
+
+    def wrap(self, cmd_list: list) -> list:
+        """The command line to spawn: in cgroup mode, join the command's cgroup and exec cmd_list"""
+        if self.mode != "cgroup":
+            return cmd_list
+        return ["/bin/sh", "-c", 'echo $$ > "$0" && exec "$@"', str(self.cgroup / "cgroup.procs"), *cmd_list]
+
+    def started(self, pid: int):
+        """Apply the process-level limits to pid and start sampling its process tree
+
+        Nothing is needed in cgroup mode: the wrapper joined the cgroup, which
+        also accounts for the command's usage.
+        """
+        if self.mode == "cgroup":
+            return
+        if self.mode == "rlimit":
+            self._apply_process_limits(pid)
+        self._sampler = threading.Thread(target=self._sample_loop, args=(pid,), name=f"usage-{pid}", daemon=True)
+        self._sampler.start()
+
+    def _apply_process_limits(self, pid: int):
+        # The command sources the OpenFOAM environment before it starts the
+        # solver, so the limits are in place before the heavy children exist
+        try:
+            memory_mb = self.limits.get("memory_limit_mb")
+            if memory_mb:
+                limit = memory_mb * 1024 * 1024
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+            if self.cpus:
+                os.sched_setaffinity(pid, self.cpus)
+        except ProcessLookupError:
+            # Already exited
+            pass
+        except OSError as e:
+            logger.warning(f"Could not apply resource limits to PID {pid}: {e}")
+
+    def _sample_loop(self, pid: int):
+        try:
+            root = psutil.Process(pid)
+        except psutil.Error:
+            return
+        while True:
+            self._sample(root)
+            if self._stop.wait(RESOURCE_SAMPLE_INTERVAL):
+                return
+
+    def _sample(self, root: psutil.Process):
+        try:
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return
+        rss = 0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+                    self._cpu_seconds[process.pid] = times.user + times.system
+                    io = process.io_counters()
+                    self._io[process.pid] = (io.read_bytes, io.write_bytes)
+            except (psutil.Error, AttributeError):
+                continue
+        self._peak_rss = max(self._peak_rss, rss)
+
+    def finish(self) -> Dict:
+        """
+        Collect the command's resource usage after it exited and clean up.
+
+        Returns:
+            Dict with peak_memory_bytes, cpu_seconds, io_read_bytes, io_write_bytes and resource_accounting
+        """
+        if self.mode == "cgroup":
+            usage = self._cgroup_usage()
+            self._remove_cgroup()
+            return usage
+
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        return {
+            "peak_memory_bytes": self._peak_rss,
+            "cpu_seconds": round(sum(self._cpu_seconds.values()), 2),
+            "io_read_bytes": sum(read for read, _ in self._io.values()),
+            "io_write_bytes": sum(write for _, write in self._io.values()),
+            "resource_accounting": "sampled"
+        }
+
+    def _cgroup_usage(self) -> Dict:
+        cpu = _read_flat_keyed(self.cgroup / "cpu.stat")
+        read_bytes = write_bytes = 0
+        try:
+            for line in (self.cgroup / "io.stat").read_text().splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition("=")
+                    if key == "rbytes":
+                        read_bytes += int(value)
+                    elif key == "wbytes":
+                        write_bytes += int(value)
+        except OSError:
+            pass
+        try:
+            peak = int((self.cgroup / "memory.peak").read_text())
+        except (OSError, ValueError):
+            # memory.peak needs Linux 5.19
+            peak = None
+        return {
+            "peak_memory_bytes": peak,
+            "cpu_seconds": round(cpu.get("usage_usec", 0) / 1e6, 2),
+            "io_read_bytes": read_bytes,
+            "io_write_bytes": write_bytes,
+            "resource_accounting": "cgroup"
+        }
+
+    def _remove_cgroup(self):
+        try:
+            self.cgroup.rmdir()
+        except OSError as e:
+            if e.errno == errno.EBUSY:
+                # Leftover processes: kill them (Linux 5.14+) and retry once
+                try:
+                    _write(self.cgroup / "cgroup.kill", "1")
+                    self.cgroup.rmdir()
+                    return
+                except OSError:
+                    pass
+            logger.warning(f"Could not remove cgroup {self.cgroup}: {e}")
+
+class ResourceLimiter:
+    """Applies per-project limits to commands and measures their resource usage"""
+
+    def __init__(self, mode: str = RESOURCE_LIMITS_MODE, cgroup_root: Path = CGROUP_ROOT):
+        self.cgroup_root = Path(cgroup_root)
+        self._cpu_offset = 0
+        self._lock = threading.Lock()
+        if mode == "auto":
+            mode = "cgroup" if self._setup_cgroup_root() else "rlimit"
+        elif mode == "cgroup":
+            if not self._setup_cgroup_root():
+                raise ResourceLimitError(f"cgroup v2 hierarchy at {self.cgroup_root} is not usable")
+        elif mode not in ("rlimit", "off"):
+            raise ResourceLimitError(f"Invalid RESOURCE_LIMITS_MODE '{mode}'. Must be one of: auto, cgroup, rlimit, off")
+        self.mode = mode
+        logger.info(f"Command resource limits: {mode}" + (f" ({self.cgroup_root})" if mode == "cgroup" else ""))
+
+    def _setup_cgroup_root(self) -> bool:
+        """Create CGROUP_ROOT and enable the controllers its children need"""
+        if not (CGROUP_V2_MOUNT / "cgroup.controllers").exists():
+            return False
+        try:
+            self.cgroup_root.mkdir(exist_ok=True)
+            self._enable_controllers(self.cgroup_root.parent)
+            self._enable_controllers(self.cgroup_root)
+            return True
+        except OSError as e:
+            logger.info(f"cgroup v2 limits unavailable ({e}), using process limits")
+            return False
+
+    def _enable_controllers(self, cgroup: Path):
+        available = (cgroup / "cgroup.controllers").read_text().split()
+        missing = [c for c in CONTROLLERS if c not in (cgroup / "cgroup.subtree_control").read_text().split()]
+        wanted = [f"+{c}" for c in missing if c in available]
+        if wanted:
+            _write(cgroup / "cgroup.subtree_control", " ".join(wanted))
+
+    def prepare(self, project_dir: Path) -> CommandLimits:
+        """
+        Set up limits for a command of the project at project_dir.
+
+        Raises:
+            ResourceLimitError: If the command's cgroup cannot be created
+        """
+        limits = read_project_limits(project_dir)
+        if self.mode == "cgroup":
+            return CommandLimits("cgroup", limits, cgroup=self._command_cgroup(project_dir.name, limits))
+        if self.mode == "rlimit":
+            return CommandLimits("rlimit", limits, cpus=self._pick_cpus(limits.get("cpu_limit")))
+        return CommandLimits("off", limits)
+
+    def _command_cgroup(self, project_name: str, limits: Dict) -> Path:
+        project_cgroup = self.cgroup_root / f"project-{project_name}"
+        try:
+            project_cgroup.mkdir(exist_ok=True)
+            self._enable_controllers(project_cgroup)
+            cpu_limit = limits.get("cpu_limit")
+            quota = str(int(cpu_limit * CPU_PERIOD_USEC)) if cpu_limit else "max"
+            _write(project_cgroup / "cpu.max", f"{quota} {CPU_PERIOD_USEC}")
+            memory_mb = limits.get("memory_limit_mb")
+            _write(project_cgroup / "memory.max", str(memory_mb * 1024 * 1024) if memory_mb else "max")
+            command_cgroup = project_cgroup / f"cmd-{uuid.uuid4().hex[:12]}"
+            command_cgroup.mkdir()
+            return command_cgroup
+        except OSError as e:
+            raise ResourceLimitError(f"Failed to set up cgroup for project '{project_name}': {e}")
+
+    def _pick_cpus(self, cpu_limit: Optional[float]) -> Optional[list]:
+        """CPUs for an affinity-limited command, rotated so projects spread over the machine"""
+        if not cpu_limit:
+            return None
+        allowed = sorted(os.sched_getaffinity(0))
+        count = min(len(allowed), max(1, math.ceil(cpu_limit)))
+        if count == len(allowed):
+            return None
+        with self._lock:
+            start = self._cpu_offset
+            self._cpu_offset = (start + count) % len(allowed)
+        return [allowed[(start + i) % len(allowed)] for i in range(count)]
+
+# Global resource limiter instance
+resource_limiter = ResourceLimiter()
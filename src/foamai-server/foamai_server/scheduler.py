@@ -0,0 +1,313 @@
+"""
+Resource-aware scheduling of command jobs.
+
+Every job gets an estimate of the cores and memory it needs, derived from
+the command (mpirun -np, -parallel with the case's decomposeParDict), the
+mesh cell count (read from the polyMesh owner header) and the solver type.
+Jobs wait in a priority queue and are only admitted while their estimate
+fits into the machine's remaining capacity, so the box is filled without
+being oversubscribed:
+
+- interactive utilities (checkMesh, foamDictionary, ...) go first,
+- meshing and decomposition next,
+- solver runs last.
+
+Lower priority jobs may be backfilled past a job that does not fit yet,
+unless that job has waited longer than SCHEDULER_STARVATION_SECONDS.
+Non-interactive jobs leave SCHEDULER_INTERACTIVE_RESERVED_CORES cores free
+so that mesh checks do not queue behind long solves.
+
+Solver runs get a time limit from their controlDict: the number of time
+steps (or iterations) times an estimated cost per cell and step, with a
+safety factor, instead of a fixed default.
+"""
+
+import re
+import heapq
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from config import (
+    SCHEDULER_CORES, SCHEDULER_MEMORY_MB, SCHEDULER_INTERACTIVE_RESERVED_CORES, SCHEDULER_STARVATION_SECONDS,
+    MAX_CONCURRENT_JOBS, JOB_DEFAULT_TIMEOUT, JOB_MIN_SOLVER_TIME_LIMIT, JOB_MAX_TIME_LIMIT,
+    SOLVER_SECONDS_PER_CELL_STEP, JOB_TIME_LIMIT_SAFETY_FACTOR
+)
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITIES = {"interactive": 0, "normal": 1, "batch": 2}
+
+MPI_LAUNCHERS = {"mpirun", "mpiexec"}
+MESH_COMMANDS = {
+    "blockMesh", "snappyHexMesh", "extrudeMesh", "cartesianMesh", "foamyHexMesh",
+    "decomposePar", "reconstructPar", "reconstructParMesh", "redistributePar", "mapFields"
+}
+
+# Memory per cell, in bytes, by kind of work
+BYTES_PER_CELL_SOLVER = 1500
+BYTES_PER_CELL_HEAVY_SOLVER = 3000  # compressible, multiphase, reacting, conjugate heat transfer
+BYTES_PER_CELL_MESHER = 3000
+BYTES_PER_CELL_UTILITY = 500
+BASE_PROCESS_MEMORY_MB = 150
+HEAVY_SOLVER_KEYWORDS = ("rho", "inter", "multiphase", "buoyant", "compressible", "reacting", "cht", "euler")
+
+_NCELLS_PATTERN = re.compile(rb"nCells:\s*(\d+)")
+_DICT_ENTRY_PATTERN = re.compile(r"^\s*(\w+)\s+([^;{}]+);", re.MULTILINE)
+
+class SchedulerError(Exception):
+    """Custom exception for scheduling errors"""
+    pass
+
+# --- Case inspection ---
+
+def read_cell_count(case_dir: Path) -> Optional[int]:
+    """
+    Number of mesh cells of a case, from the 'note' in the polyMesh owner
+    header. Decomposed cases are summed over their processor directories.
+    """
+    def owner_cells(owner: Path) -> Optional[int]:
+        try:
+            with open(owner, "rb") as f:
+                match = _NCELLS_PATTERN.search(f.read(4096))
+        except OSError:
+            return None
+        return int(match.group(1)) if match else None
+
+    cells = owner_cells(case_dir / "constant" / "polyMesh" / "owner")
+    if cells is not None:
+        return cells
+
+    total = None
+    for processor in case_dir.glob("processor*"):
+        count = owner_cells(processor / "constant" / "polyMesh" / "owner")
+        if count is not None:
+            total = (total or 0) + count
+    return total
+
+def read_foam_dict_entries(path: Path) -> Dict[str, str]:
+    """Top-level 'key value;' entries of an OpenFOAM dictionary file (comments stripped)"""
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return {}
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    text = re.sub(r"//[^\n]*", "", text)
+    return {key: value.strip() for key, value in _DICT_ENTRY_PATTERN.findall(text)}
+
+def _as_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+# --- Estimation ---
+
+def _split_launcher(command: str, args: List[str]):
+    """Return (application, application args, process count) for a possibly mpirun-wrapped command"""
+    if command not in MPI_LAUNCHERS:
+        return command, args, None
+    processes = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ("-np", "-n", "--np") and i + 1 < len(args):
+            processes = int(args[i + 1]) if args[i + 1].isdigit() else None
+            i += 2
+            continue
+        if not arg.startswith("-"):
+            return arg, args[i + 1:], processes
+        i += 1
+    return command, [], processes
+
+def classify_command(application: str) -> str:
+    """Kind of work a command does: 'solver', 'mesher' or 'utility'"""
+    if application.endswith("Foam") or application in ("foamRun", "foamMultiRun"):
+        return "solver"
+    if application in MESH_COMMANDS:
+        return "mesher"
+    return "utility"
+
+def estimate_requirements(
+    case_dir: Path,
+    command: str,
+    args: Optional[List[str]] = None,
+    priority: Optional[str] = None,
+    timeout: Optional[int] = None
+) -> Dict:
+    """
+    Estimate what a command needs to run.
+
+    Args:
+        case_dir: Directory the command runs in
+        command: Command to execute
+        args: Command arguments
+        priority: 'interactive', 'normal' or 'batch' (derived from the command if None)
+        timeout: Explicit time limit in seconds (derived from the case if None)
+
+    Returns:
+        Dict with cores, memory_mb, priority, time_limit and the cells the estimate is based on
+
+    Raises:
+        SchedulerError: If the priority is unknown
+    """
+    args = args or []
+    if priority is not None and priority not in PRIORITIES:
+        raise SchedulerError(f"Invalid priority '{priority}'. Must be one of: {', '.join(PRIORITIES)}")
+
+    application, app_args, processes = _split_launcher(command, args)
+    kind = classify_command(application)
+    control = read_foam_dict_entries(case_dir / "system" / "controlDict") if kind == "solver" else {}
+
+    cores = processes or 1
+    if processes is None and "-parallel" in app_args:
+        decompose = read_foam_dict_entries(case_dir / "system" / "decomposeParDict")
+        subdomains = _as_float(decompose.get("numberOfSubdomains"))
+        cores = int(subdomains) if subdomains else 1
+
+    cells = read_cell_count(case_dir)
+    if kind == "solver":
+        solver_name = f"{application} {control.get('solver', '')}".lower()
+        bytes_per_cell = (BYTES_PER_CELL_HEAVY_SOLVER if any(word in solver_name for word in HEAVY_SOLVER_KEYWORDS)
+                          else BYTES_PER_CELL_SOLVER)
+    elif kind == "mesher":
+        bytes_per_cell = BYTES_PER_CELL_MESHER
+    else:
+        bytes_per_cell = BYTES_PER_CELL_UTILITY
+    memory_mb = BASE_PROCESS_MEMORY_MB * cores + (cells or 0) * bytes_per_cell // (1024 * 1024)
+
+    if priority is None:
+        priority = {"solver": "batch", "mesher": "normal"}.get(kind, "interactive")
+
+    if timeout:
+        time_limit = timeout
+    elif kind == "solver":
+        time_limit = solver_time_limit(control, cells, cores)
+    else:
+        time_limit = JOB_DEFAULT_TIMEOUT
+
+    return {
+        "cores": cores,
+        "memory_mb": int(memory_mb),
+        "priority": priority,
+        "time_limit": int(time_limit),
+        "cells": cells,
+        "kind": kind
+    }
+
+def solver_time_limit(control: Dict[str, str], cells: Optional[int], cores: int) -> float:
+    """
+    Wall-clock limit for a solver run from its controlDict.
+
+    Steps are (endTime - startTime) / deltaT, which is the iteration count
+    for steady solvers. Without a mesh or usable times the maximum applies.
+    """
+    start = _as_float(control.get("startTime")) or 0.0
+    end = _as_float(control.get("endTime"))
+    delta = _as_float(control.get("deltaT"))
+    if not cells or end is None or not delta or delta <= 0 or end <= start:
+        return JOB_MAX_TIME_LIMIT
+    steps = (end - start) / delta
+    estimate = steps * cells * SOLVER_SECONDS_PER_CELL_STEP / max(1, cores)
+    return min(JOB_MAX_TIME_LIMIT, max(JOB_MIN_SOLVER_TIME_LIMIT, estimate * JOB_TIME_LIMIT_SAFETY_FACTOR))
+
+def _detect_memory_mb() -> int:
+    return int(psutil.virtual_memory().total * 0.9 / (1024 * 1024))
+
+# --- Admission ---
+
+class ResourceScheduler:
+    """Admits queued jobs while their estimated cores and memory fit the machine"""
+
+    def __init__(self, cores: int = SCHEDULER_CORES, memory_mb: Optional[int] = None,
+                 max_jobs: int = MAX_CONCURRENT_JOBS,
+                 interactive_reserved_cores: int = SCHEDULER_INTERACTIVE_RESERVED_CORES):
+        self.cores = max(1, cores)
+        self.memory_mb = memory_mb or SCHEDULER_MEMORY_MB or _detect_memory_mb()
+        self.max_jobs = max_jobs
+        # Cores non-interactive jobs may use; the rest is kept for interactive work
+        self.batch_cores = max(1, self.cores - interactive_reserved_cores)
+        self._queue: List = []  # heap of (priority, sequence, job_id)
+        self._pending: Dict[str, Dict] = {}  # job_id -> {"requirements", "start", "queued_at"}
+        self._running: Dict[str, Dict] = {}  # job_id -> requirements
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str, requirements: Dict, start: Callable[[], None]):
+        """Queue a job; start() is called (outside the scheduler lock) once it is admitted"""
+        with self._lock:
+            self._sequence += 1
+            heapq.heappush(self._queue, (PRIORITIES[requirements["priority"]], self._sequence, job_id))
+            self._pending[job_id] = {"requirements": requirements, "start": start, "queued_at": time.monotonic()}
+        self._dispatch()
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a queued job. Returns False if it is not queued (already admitted or unknown)."""
+        with self._lock:
+            # The heap entry is skipped lazily once its job is no longer pending
+            return self._pending.pop(job_id, None) is not None
+
+    def release(self, job_id: str):
+        """Return the resources of a finished job and admit what fits now"""
+        with self._lock:
+            self._running.pop(job_id, None)
+        self._dispatch()
+
+    def _fits(self, requirements: Dict, used_cores: int, used_memory: int) -> bool:
+        limit = self.cores if requirements["priority"] == "interactive" else self.batch_cores
+        # Jobs bigger than the machine run alone rather than never
+        cores = min(requirements["cores"], limit)
+        memory = min(requirements["memory_mb"], self.memory_mb)
+        return used_cores + cores <= limit and used_memory + memory <= self.memory_mb
+
+    def _dispatch(self):
+        """Admit queued jobs in priority order while they fit"""
+        admitted = []
+        with self._lock:
+            used_cores = sum(min(r["cores"], self.cores) for r in self._running.values())
+            used_memory = sum(min(r["memory_mb"], self.memory_mb) for r in self._running.values())
+            now = time.monotonic()
+            skipped = []
+            while self._queue and len(self._running) < self.max_jobs:
+                entry = heapq.heappop(self._queue)
+                pending = self._pending.get(entry[2])
+                if pending is None:
+                    continue  # removed while queued
+                requirements = pending["requirements"]
+                if not self._fits(requirements, used_cores, used_memory):
+                    skipped.append(entry)
+                    if now - pending["queued_at"] > SCHEDULER_STARVATION_SECONDS:
+                        # Stop backfilling so this job gets the next free resources
+                        break
+                    continue
+                del self._pending[entry[2]]
+                self._running[entry[2]] = requirements
+                used_cores += min(requirements["cores"], self.cores)
+                used_memory += min(requirements["memory_mb"], self.memory_mb)
+                admitted.append(pending["start"])
+            for entry in skipped:
+                heapq.heappush(self._queue, entry)
+
+        for start in admitted:
+            start()
+
+    def get_status(self) -> Dict:
+        """Capacity, current use and queue length per priority"""
+        with self._lock:
+            queued = {name: 0 for name in PRIORITIES}
+            for pending in self._pending.values():
+                queued[pending["requirements"]["priority"]] += 1
+            return {
+                "cores": self.cores,
+                "memory_mb": self.memory_mb,
+                "max_jobs": self.max_jobs,
+                "used_cores": sum(min(r["cores"], self.cores) for r in self._running.values()),
+                "used_memory_mb": sum(min(r["memory_mb"], self.memory_mb) for r in self._running.values()),
+                "running_jobs": len(self._running),
+                "queued_jobs": queued
+            }
@@ -68,6 +68,20 @@ class ProjectInfoResponse(BaseModel):
     files: List[str]
     file_count: int
     total_size: int
+    matched_count: int
+    offset: int = 0
+    limit: Optional[int] = None
+
+class ProjectLimitsRequest(BaseModel):
+    """Resource limits for all commands of a project together"""
+    cpu_limit: Optional[float] = Field(None, description="Cores the project's commands may use (null: unlimited)")
+    memory_limit_mb: Optional[int] = Field(None, description="Memory the project's commands may use in MB (null: unlimited)")
+
+class ProjectLimitsResponse(BaseModel):
+    project_name: str
+    cpu_limit: Optional[float] = None
+    memory_limit_mb: Optional[int] = None
+    enforcement: str = Field(..., description="How limits are enforced: cgroup, rlimit or off")
 
 # =============================================================================
 # FILE UPLOAD SCHEMAS
@@ -80,6 +94,34 @@ class FileUploadResponse(BaseModel):
     upload_time: datetime
     message: str
 
+class ArchiveUploadResponse(BaseModel):
+    """Response for uploading a case directory as a single tar archive"""
+    archive_size: int = Field(..., description="Size of the uploaded (possibly compressed) archive in bytes")
+    file_count: int = Field(..., description="Number of files extracted into active_run")
+    total_size: int = Field(..., description="Total unpacked size of the extracted files in bytes")
+    files: List[str] = Field(..., description="Extracted file paths relative to active_run")
+    skipped: List[str] = Field(default_factory=list, description="Archive members skipped because they are not regular files")
+    upload_time: datetime
+    message: str
+
+class ManifestEntry(BaseModel):
+    sha256: str
+    size: int
+
+class ManifestResponse(BaseModel):
+    """Hashes of the files uploaded into a project's active_run directory"""
+    project_name: str
+    files: Dict[str, ManifestEntry]
+    file_count: int
+
+class FileDeleteRequest(BaseModel):
+    paths: List[str] = Field(..., description="File paths relative to active_run to delete")
+
+class FileDeleteResponse(BaseModel):
+    deleted: List[str]
+    missing: List[str]
+    message: str
+
 # =============================================================================
 # PVSERVER SCHEMAS
 # =============================================================================
@@ -167,6 +209,7 @@ class CombinedPVServerResponse(BaseModel):
     project_pvservers: List[Dict[str, Any]]
     total_count: int
     running_count: int
+    pool: Optional[Dict[str, Any]] = None  # pre-started pvserver pool: idle count, hit rate, startup latency
 
 # =============================================================================
 # ERROR SCHEMAS
@@ -192,8 +235,10 @@ class CommandRequest(BaseModel):
     args: Optional[List[str]] = Field(None, description="List of command arguments")
     environment: Optional[Dict[str, str]] = Field(None, description="Additional environment variables")
     working_directory: str = Field("active_run", description="Working directory within project (default: active_run)")
-    timeout: Optional[int] = Field(None, description="Timeout in seconds (default: 300)")
+    timeout: Optional[int] = Field(None, description="Timeout in seconds (default: estimated from the controlDict for solvers, 300 otherwise)")
+    priority: Optional[str] = Field(None, description="Scheduling priority: interactive, normal or batch (default: derived from the command)")
     save_run: Optional[bool] = Field(False, description="Save a copy of the active_run directory after successful execution (default: false)")
+    wait: bool = Field(True, description="Wait for the command to finish (default: true). If false, return the job immediately")
 
 class CommandResponse(BaseModel):
     """Response from command execution"""
@@ -206,6 +251,71 @@ class CommandResponse(BaseModel):
     working_directory: str = Field(..., description="Directory where command was executed")
     timestamp: str = Field(..., description="ISO timestamp of execution")
     saved_run_directory: Optional[str] = Field(None, description="Directory name where the run was saved (e.g., 'run_000')")
+    job_id: Optional[str] = Field(None, description="ID of the job that ran the command")
+    log_file: Optional[str] = Field(None, description="Log file holding the full command output")
+    peak_memory_bytes: Optional[int] = Field(None, description="Peak memory of the command and its children")
+    cpu_seconds: Optional[float] = Field(None, description="User plus system CPU time of the command and its children")
+    io_read_bytes: Optional[int] = Field(None, description="Bytes read from storage")
+    io_write_bytes: Optional[int] = Field(None, description="Bytes written to storage")
+    resource_accounting: Optional[str] = Field(None, description="How usage was measured: 'cgroup' (exact) or 'sampled' (process tree polled)")
+
+# =============================================================================
+# JOB SCHEMAS
+# =============================================================================
+
+class JobResponse(BaseModel):
+    """Status of a background command job"""
+    job_id: str
+    project_name: str
+    command: str
+    args: List[str]
+    working_directory: str
+    status: str = Field(..., description="One of: queued, running, completed, failed, cancelled")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    pid: Optional[int] = None
+    log_file: Optional[str] = Field(None, description="Log file the command output is written to")
+    result: Optional[CommandResponse] = Field(None, description="Command result once the job has finished")
+    error: Optional[str] = Field(None, description="Error message if the command could not be run")
+    priority: Optional[str] = Field(None, description="Scheduling priority: interactive, normal or batch")
+    cores: Optional[int] = Field(None, description="Estimated number of cores the job occupies")
+    memory_mb: Optional[int] = Field(None, description="Estimated memory the job needs in MB")
+    time_limit: Optional[int] = Field(None, description="Time limit of the command in seconds")
+
+class JobListResponse(BaseModel):
+    jobs: List[JobResponse]
+    count: int
+
+class SchedulerStatusResponse(BaseModel):
+    """Capacity and current load of the job scheduler"""
+    cores: int
+    memory_mb: int
+    max_jobs: int
+    used_cores: int
+    used_memory_mb: int
+    running_jobs: int
+    queued_jobs: Dict[str, int] = Field(..., description="Queued jobs per priority")
+
+# =============================================================================
+# RESIDUAL SCHEMAS
+# =============================================================================
+
+class ResidualsResponse(BaseModel):
+    """Columnar residual history of a solver run, one entry per time step"""
+    project_name: str
+    job_id: Optional[str] = Field(None, description="Job the history was parsed from, if it came from a job")
+    source: Optional[str] = Field(None, description="'job', or the log file name when parsed from disk")
+    since: int = Field(..., description="Index of the first returned time step")
+    next_since: int = Field(..., description="Value of 'since' to pass to receive only newer rows")
+    row_count: int = Field(..., description="Number of time steps returned")
+    time: List[Optional[float]] = []
+    delta_t: List[Optional[float]] = []
+    courant_mean: List[Optional[float]] = []
+    courant_max: List[Optional[float]] = []
+    execution_time: List[Optional[float]] = []
+    initial_residuals: Dict[str, List[Optional[float]]] = Field(default_factory=dict, description="Initial residual per field")
+    final_residuals: Dict[str, List[Optional[float]]] = Field(default_factory=dict, description="Final residual per field")
 
 # =============================================================================
 # SYSTEM SCHEMAS
@@ -217,6 +327,7 @@ class HealthCheckResponse(BaseModel):
     database_connected: bool
     running_pvservers: int
     running_project_pvservers: int
+    cpu_count: Optional[int] = None
 
 class DatabaseStatsResponse(BaseModel):
     total_tasks: int
@@ -3,9 +3,13 @@
 Simple pvserver process checker without psutil dependency
 """
 
+import os
 import subprocess
 import re
 
+PORT_RANGE_START = int(os.environ.get("PVSERVER_PORT_RANGE_START", "11111"))
+PORT_RANGE_END = int(os.environ.get("PVSERVER_PORT_RANGE_END", "11116"))
+
 def check_pvserver_processes():
     """Check for running pvserver processes using basic commands"""
     print("🔍 Checking for running pvserver processes...")
@@ -72,9 +76,9 @@ def check_pvserver_processes():
 
 def check_port_listeners():
     """Check which ports are listening"""
-    print("\n🔍 Checking listening ports in range 11111-11116...")
+    print(f"\n🔍 Checking listening ports in range {PORT_RANGE_START}-{PORT_RANGE_END}...")
     
-    for port in range(11111, 11117):
+    for port in range(PORT_RANGE_START, PORT_RANGE_END + 1):
         try:
             # Method 1: Using ss
             result = subprocess.run(['ss', '-tuln'], capture_output=True, text=True)
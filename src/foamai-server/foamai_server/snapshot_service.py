@@ -0,0 +1,188 @@
+"""
+Snapshot service for saving numbered copies of a project's active_run.
+
+A snapshot never shares storage with active_run itself, since OpenFOAM
+rewrites fields in place. Instead every file is, in order of preference:
+
+- hardlinked to the same file in the previous snapshot, if it has not
+  changed since then (same size and modification time), which covers the
+  mesh and time directories that are no longer written to;
+- reflinked (copy-on-write clone) from active_run on filesystems that
+  support it, e.g. btrfs and XFS;
+- copied.
+
+Snapshot directories are numbered run_000, run_001, ... from a per-project
+counter that is seeded from the existing directories once and then only
+incremented.
+"""
+
+import os
+import re
+import errno
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import SAVE_RUN_MODE
+
+logger = logging.getLogger(__name__)
+
+RUN_DIR_PATTERN = re.compile(r"^run_(\d+)$")
+MAX_RUN_NUMBER = 9999
+
+# ioctl request that clones one file's extents into another (linux/fs.h)
+FICLONE = 0x40049409
+
+class SnapshotError(Exception):
+    """Custom exception for snapshot errors"""
+    pass
+
+def _reflink(source: Path, target: Path) -> bool:
+    """Clone source into a new file at target. Returns False if cloning is not supported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError as e:
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM):
+                dst.close()
+                os.unlink(target)
+                return False
+            raise
+    shutil.copystat(source, target)
+    return True
+
+class SnapshotService:
+    """Creates run_NNN snapshots of a working directory"""
+
+    def __init__(self, mode: str = SAVE_RUN_MODE):
+        self.mode = mode
+        # Next run number and last snapshot per project directory
+        self._next_run: Dict[Path, int] = {}
+        self._last_snapshot: Dict[Path, Path] = {}
+        # Devices on which reflinks failed, so they are not retried per file
+        self._no_reflink_devices = set()
+        self._lock = threading.Lock()
+
+    def save_run(self, project_dir: Path, working_directory: str) -> str:
+        """
+        Save a snapshot of project_dir/working_directory to the next run_NNN directory.
+
+        Args:
+            project_dir: Path to the project directory
+            working_directory: The working directory to snapshot (usually 'active_run')
+
+        Returns:
+            str: The name of the created run directory (e.g., 'run_000')
+
+        Raises:
+            SnapshotError: If the snapshot cannot be created
+        """
+        source_dir = project_dir / working_directory
+        if not source_dir.exists():
+            raise SnapshotError(f"Source directory does not exist: {source_dir}")
+
+        target_dir, previous_dir = self._reserve_run_directory(project_dir)
+        stats = {"linked": 0, "cloned": 0, "copied": 0, "bytes_written": 0}
+        try:
+            if self.mode == "copy":
+                # copytree needs a target that does not exist yet
+                target_dir.rmdir()
+                shutil.copytree(source_dir, target_dir)
+            else:
+                self._snapshot_tree(source_dir, target_dir, previous_dir, stats)
+        except Exception as e:
+            shutil.rmtree(target_dir, ignore_errors=True)
+            raise SnapshotError(f"Failed to save run copy: {e}")
+
+        with self._lock:
+            self._last_snapshot[project_dir] = target_dir
+        if self.mode == "copy":
+            logger.info(f"Saved run copy to: {target_dir.name}")
+        else:
+            logger.info(
+                f"Saved run snapshot to: {target_dir.name} ({stats['linked']} linked, {stats['cloned']} cloned, "
+                f"{stats['copied']} copied, {stats['bytes_written'] / (1024 * 1024):.1f} MB written)"
+            )
+        return target_dir.name
+
+    def _reserve_run_directory(self, project_dir: Path):
+        """Create the next run_NNN directory; returns it and the previous snapshot (if any)"""
+        with self._lock:
+            if project_dir not in self._next_run:
+                self._seed_counter(project_dir)
+            while True:
+                run_number = self._next_run[project_dir]
+                if run_number > MAX_RUN_NUMBER:
+                    raise SnapshotError(f"Too many run directories (max {MAX_RUN_NUMBER})")
+                self._next_run[project_dir] = run_number + 1
+                target_dir = project_dir / f"run_{run_number:03d}"
+                try:
+                    target_dir.mkdir()
+                except FileExistsError:
+                    # Created outside this service since the counter was seeded
+                    continue
+                return target_dir, self._last_snapshot.get(project_dir)
+
+    def _seed_counter(self, project_dir: Path):
+        """Start numbering after the highest existing run directory"""
+        highest = -1
+        latest = None
+        with os.scandir(project_dir) as entries:
+            for entry in entries:
+                match = RUN_DIR_PATTERN.match(entry.name)
+                if match and entry.is_dir(follow_symlinks=False) and int(match.group(1)) > highest:
+                    highest = int(match.group(1))
+                    latest = Path(entry.path)
+        self._next_run[project_dir] = highest + 1
+        if latest is not None:
+            self._last_snapshot[project_dir] = latest
+
+    def _snapshot_tree(self, source_dir: Path, target_dir: Path, previous_dir: Optional[Path], stats: Dict[str, int]):
+        """Recursively snapshot source_dir into the existing target_dir"""
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                source = Path(entry.path)
+                target = target_dir / entry.name
+                previous = previous_dir / entry.name if previous_dir is not None else None
+
+                if entry.is_symlink():
+                    os.symlink(os.readlink(source), target)
+                elif entry.is_dir():
+                    target.mkdir()
+                    self._snapshot_tree(source, target, previous, stats)
+                    shutil.copystat(source, target)
+                else:
+                    self._snapshot_file(source, entry.stat(), target, previous, stats)
+
+    def _snapshot_file(self, source: Path, source_stat: os.stat_result, target: Path,
+                       previous: Optional[Path], stats: Dict[str, int]):
+        if previous is not None:
+            try:
+                previous_stat = previous.stat(follow_symlinks=False)
+                if (previous_stat.st_size == source_stat.st_size
+                        and previous_stat.st_mtime_ns == source_stat.st_mtime_ns):
+                    os.link(previous, target)
+                    stats["linked"] += 1
+                    return
+            except OSError:
+                # Missing in the previous snapshot or too many links: fall through to a copy
+                pass
+
+        if source_stat.st_dev not in self._no_reflink_devices:
+            if _reflink(source, target):
+                stats["cloned"] += 1
+                return
+            self._no_reflink_devices.add(source_stat.st_dev)
+        shutil.copy2(source, target)
+        stats["copied"] += 1
+        stats["bytes_written"] += source_stat.st_size
+
+# Global snapshot service instance
+snapshot_service = SnapshotService()
@@ -374,6 +374,73 @@ runTimeModifiable true;
     else:
         print("✗ Custom environment variables test failed")
     
+    # 12. Test background jobs
+    print("\n12. Testing background command jobs...")
+    
+    job = make_request("POST", f"/api/projects/{PROJECT_NAME}/run_command", {
+        "command": "sleep",
+        "args": ["20"],
+        "working_directory": "active_run",
+        "wait": False
+    })
+    
+    if job.get("job_id") and job.get("status") in ("queued", "running"):
+        print("✓ Command returned a job ID immediately")
+        
+        # The API must stay responsive while the job runs
+        start = time.time()
+        requests.get(f"{BASE_URL}/health", timeout=30)
+        health_latency = time.time() - start
+        if health_latency < 1:
+            print(f"✓ Health check answered in {health_latency:.3f}s while the job runs")
+        else:
+            print(f"⚠ Health check took {health_latency:.3f}s while the job runs")
+        
+        result = make_request("DELETE", f"/api/jobs/{job['job_id']}")
+        time.sleep(1)
+        result = make_request("GET", f"/api/jobs/{job['job_id']}")
+        if result.get("status") == "cancelled":
+            print("✓ Job cancelled successfully")
+        else:
+            print(f"⚠ Job cancellation inconclusive (status: {result.get('status')})")
+    else:
+        print("✗ Background job submission failed")
+    
+    # 13. Test live log streaming
+    print("\n13. Testing live log streaming...")
+    
+    job = make_request("POST", f"/api/projects/{PROJECT_NAME}/run_command", {
+        "command": "blockMesh",
+        "working_directory": "active_run",
+        "wait": False
+    })
+    
+    if job.get("job_id"):
+        lines = []
+        ended = False
+        with requests.get(f"{BASE_URL}/api/jobs/{job['job_id']}/log", stream=True, timeout=60) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data:"):
+                    lines.append(line[5:].strip())
+                elif line == "event: end":
+                    ended = True
+        if lines and ended:
+            print(f"✓ Streamed {len(lines)} lines of blockMesh output before the end event")
+        else:
+            print(f"⚠ Log stream incomplete ({len(lines)} lines, end event: {ended})")
+        
+        log_check = make_request("POST", f"/api/projects/{PROJECT_NAME}/run_command", {
+            "command": "ls",
+            "args": [f"log.blockMesh.{job['job_id']}"],
+            "working_directory": "active_run"
+        })
+        if log_check.get("success"):
+            print(f"✓ Output spilled to active_run/log.blockMesh.{job['job_id']}")
+        else:
+            print(f"⚠ log.blockMesh.{job['job_id']} not found")
+    else:
+        print("✗ Job submission for log streaming failed")
+    
     print("\n" + "=" * 60)
     print("COMMAND EXECUTION TESTS COMPLETED")
     print("=" * 60)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Load test for the pooled SQLite connection layer.
+
+Hammers update_task_status from many threads against a scratch database and
+reports throughput and 'database is locked' failures. For comparison the
+same load is replayed with the previous connect-per-call access (rollback
+journal, default 5s busy timeout) on a separate database file.
+
+Usage:
+    python test_database_load.py [--threads 32] [--updates 500] [--tasks 50] [--skip-legacy]
+
+Runs locally; no server is needed.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.insert(0, '.')
+import database
+from database import DatabaseError
+
+TASKS_TABLE = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        task_id TEXT PRIMARY KEY,
+        status TEXT,
+        message TEXT,
+        file_path TEXT,
+        case_path TEXT,
+        pvserver_port INTEGER,
+        pvserver_pid INTEGER,
+        pvserver_status TEXT,
+        pvserver_started_at TIMESTAMP,
+        pvserver_last_activity TIMESTAMP,
+        pvserver_error_message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def setup_database(path: str, task_count: int):
+    """Create the tasks table with task_count pending tasks"""
+    conn = sqlite3.connect(path)
+    conn.execute(TASKS_TABLE)
+    conn.executemany(
+        "INSERT INTO tasks (task_id, status, message, created_at) VALUES (?, ?, ?, ?)",
+        [(f"load-task-{i}", "pending", "Task created", datetime.now()) for i in range(task_count)]
+    )
+    conn.commit()
+    conn.close()
+
+def legacy_update_task_status(path: str, task_id: str, status: str, message: str):
+    """The previous access pattern: a new connection for every query"""
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE tasks SET status = ?, message = ? WHERE task_id = ?", (status, message, task_id))
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        raise DatabaseError(f"Database operation failed: {e}")
+    finally:
+        conn.close()
+
+def hammer(update, threads: int, updates: int, tasks: int) -> dict:
+    """Run `updates` status updates in each of `threads` threads"""
+    errors = []
+    errors_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        barrier.wait()
+        for i in range(updates):
+            task_id = f"load-task-{(index * updates + i) % tasks}"
+            try:
+                update(task_id, "running", f"thread {index} update {i}")
+            except DatabaseError as e:
+                with errors_lock:
+                    errors.append(str(e))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "total": threads * updates,
+        "errors": len(errors),
+        "locked": sum(1 for error in errors if "locked" in error),
+        "first_error": errors[0] if errors else None
+    }
+
+def report(name: str, result: dict):
+    rate = result["total"] / result["elapsed"] if result["elapsed"] else 0
+    print(f"{name:<24} {result['elapsed']:>8.2f} s {rate:>10.0f} updates/s {result['errors']:>6} errors")
+    if result["first_error"]:
+        print(f"   first error: {result['first_error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test update_task_status")
+    parser.add_argument("--threads", type=int, default=32, help="Number of concurrent threads")
+    parser.add_argument("--updates", type=int, default=500, help="Updates per thread")
+    parser.add_argument("--tasks", type=int, default=50, help="Number of tasks the updates are spread over")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the pooled connection layer")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DATABASE LOAD TEST")
+    print("=" * 60)
+    print(f"{args.threads} threads x {args.updates} updates over {args.tasks} tasks\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pooled_path = os.path.join(tmp, "pooled.db")
+        setup_database(pooled_path, args.tasks)
+        database.DATABASE_PATH = pooled_path
+
+        pooled = hammer(database.update_task_status, args.threads, args.updates, args.tasks)
+        report("pooled (WAL)", pooled)
+        stats = database.get_database_stats()
+        database.close_all_connections()
+
+        if not args.skip_legacy:
+            legacy_path = os.path.join(tmp, "legacy.db")
+            setup_database(legacy_path, args.tasks)
+            legacy = hammer(
+                lambda task_id, status, message: legacy_update_task_status(legacy_path, task_id, status, message),
+                args.threads, args.updates, args.tasks
+            )
+            report("connect per call", legacy)
+
+    print()
+    if stats["total_tasks"] == args.tasks:
+        print(f"✓ Aggregate stats query returned {stats}")
+    else:
+        print(f"✗ Unexpected stats: {stats}")
+
+    if pooled["errors"] == 0:
+        print("✓ No 'database is locked' errors under load")
+    else:
+        print(f"⚠ {pooled['locked']} locked / {pooled['errors']} failed updates")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""
+Upload service for writing files into a project's active_run directory.
+
+Uploads are never held in memory as a whole: the payload is consumed in
+fixed-size chunks, written to a temporary file next to its final location
+and atomically renamed into place once it is complete. Uploads that exceed
+MAX_UPLOAD_SIZE are aborted as soon as the limit is passed.
+
+Whole case directories can be uploaded as a single tar archive (optionally
+gzip, bzip2, xz or zstd compressed), which is unpacked member by member with
+the same path checks and atomic writes as single-file uploads.
+
+Every file written through this service is recorded with its SHA-256 in a
+per-project upload manifest, so clients can compare hashes and send only the
+files that actually changed between iterations.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import tarfile
+import tempfile
+import contextlib
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from config import (
+    PROJECTS_BASE_PATH, MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE, MAX_ARCHIVE_EXTRACTED_SIZE
+)
+from metrics import metrics
+
+# zstd support is optional; gzip/bzip2/xz are handled by tarfile itself
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Per-project record of uploaded files, kept next to (not inside) active_run
+MANIFEST_FILENAME = ".upload_manifest.json"
+
+# mkstemp() creates files as 0600; written files get the mode a plain open()
+# would give them. The umask can only be read by setting it, so it is read
+# once at import, before any upload threads exist.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+DEFAULT_FILE_MODE = 0o666 & ~_UMASK
+
+# Errors that mean the archive itself is corrupt or truncated
+ARCHIVE_ERRORS = (tarfile.TarError, EOFError) + ((zstandard.ZstdError,) if ZSTD_AVAILABLE else ())
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_BYTES = metrics.counter("foamai_upload_bytes_total", "Bytes received by file and archive uploads")
+UPLOAD_THROUGHPUT = metrics.histogram(
+    "foamai_upload_throughput_bytes_per_second",
+    "Throughput of individual uploads, including the time spent receiving them",
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 2.5e8, 5e8, 1e9)
+)
+
+class UploadError(Exception):
+    """Custom exception for upload-related errors"""
+    pass
+
+class UploadTooLargeError(UploadError):
+    """Exception raised when an upload exceeds MAX_UPLOAD_SIZE"""
+    pass
+
+class UploadService:
+    """Service for streaming uploads into project directories"""
+
+    def __init__(self, chunk_size: int = UPLOAD_CHUNK_SIZE, max_upload_size: int = MAX_UPLOAD_SIZE,
+                 max_extracted_size: int = MAX_ARCHIVE_EXTRACTED_SIZE):
+        self.chunk_size = chunk_size
+        self.max_upload_size = max_upload_size
+        self.max_extracted_size = max_extracted_size
+        self._manifest_lock = threading.Lock()
+
+    def get_active_run_dir(self, project_name: str) -> Path:
+        """Get (and create if needed) the active_run directory of a project"""
+        active_run_dir = Path(PROJECTS_BASE_PATH) / project_name / "active_run"
+        active_run_dir.mkdir(parents=True, exist_ok=True)
+        return active_run_dir
+
+    def resolve_destination(self, active_run_dir: Path, destination_path: str) -> Path:
+        """
+        Resolve a relative destination path inside active_run.
+
+        Raises:
+            UploadError: If the path is empty, absolute or escapes active_run
+        """
+        if not destination_path or destination_path.startswith(("/", "\\")):
+            raise UploadError(f"Invalid destination path: '{destination_path}'")
+
+        root = active_run_dir.resolve()
+        target = (root / destination_path).resolve()
+        if target == root or root not in target.parents:
+            raise UploadError(f"Destination path escapes the project directory: '{destination_path}'")
+        return target
+
+    def check_declared_size(self, declared_size: Optional[int]):
+        """Reject an upload up front when its declared size is already too large"""
+        if declared_size is not None and declared_size > self.max_upload_size:
+            raise UploadTooLargeError(self._too_large_message())
+
+    async def write_stream(self, chunks: AsyncIterator[bytes], target: Path, hasher=None) -> int:
+        """
+        Write an async stream of byte chunks to target atomically.
+
+        The data goes to a temporary file in the target's directory, so the
+        final os.replace() never crosses a filesystem boundary. Chunks are
+        collected up to the upload chunk size and written and hashed in the
+        threadpool, so disk I/O and hashing never block the event loop.
+
+        Args:
+            chunks: Async iterator yielding bytes
+            target: Final path of the file
+            hasher: Optional hashlib object updated with every chunk
+
+        Returns:
+            int: Number of bytes written
+
+        Raises:
+            UploadTooLargeError: If the stream exceeds MAX_UPLOAD_SIZE
+            UploadError: If the file cannot be written
+        """
+        written = 0
+        start = time.perf_counter()
+        try:
+            with self._atomic_file(target) as tmp_file:
+                pending = bytearray()
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    written += len(chunk)
+                    if written > self.max_upload_size:
+                        raise UploadTooLargeError(self._too_large_message())
+                    pending += chunk
+                    if len(pending) >= self.chunk_size:
+                        await run_in_threadpool(self._write_chunk, tmp_file, bytes(pending), hasher)
+                        pending.clear()
+                if pending:
+                    await run_in_threadpool(self._write_chunk, tmp_file, bytes(pending), hasher)
+        except OSError as e:
+            raise UploadError(f"Failed to write '{target.name}': {e}")
+
+        elapsed = time.perf_counter() - start
+        UPLOAD_BYTES.inc(written)
+        if written and elapsed > 0:
+            UPLOAD_THROUGHPUT.observe(written / elapsed)
+        logger.info(f"Wrote {written} bytes to {target}")
+        return written
+
+    def _write_chunk(self, tmp_file, chunk: bytes, hasher=None):
+        tmp_file.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+
+    async def iter_upload_file(self, upload_file) -> AsyncIterator[bytes]:
+        """Iterate over a starlette UploadFile in fixed-size chunks"""
+        while True:
+            chunk = await upload_file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def save_upload(self, project_name: str, destination_path: str, chunks: AsyncIterator[bytes]) -> Dict:
+        """
+        Stream an upload into a project's active_run directory.
+
+        Returns:
+            Dict with the written path (relative to the project root) and its size
+        """
+        active_run_dir = self.get_active_run_dir(project_name)
+        target = self.resolve_destination(active_run_dir, destination_path)
+        hasher = hashlib.sha256()
+        file_size = await self.write_stream(chunks, target, hasher)
+        await run_in_threadpool(
+            self.record_files, project_name, {self._manifest_key(active_run_dir, target): hasher.hexdigest()}
+        )
+        project_root = active_run_dir.parent.resolve()
+        return {
+            "file_path": str(target.relative_to(project_root)),
+            "file_size": file_size
+        }
+
+    async def save_archive(self, project_name: str, chunks: AsyncIterator[bytes]) -> Path:
+        """
+        Spool an uploaded archive to a temporary file in the project directory.
+
+        The archive is kept outside active_run so that a failed or partial
+        upload never touches the case. The caller must remove the file.
+        """
+        spool_dir = Path(PROJECTS_BASE_PATH) / project_name / ".uploads"
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        fd, archive_name = tempfile.mkstemp(prefix="archive_", suffix=".tar", dir=str(spool_dir))
+        os.close(fd)
+        archive_path = Path(archive_name)
+        try:
+            await self.write_stream(chunks, archive_path)
+        except BaseException:
+            self._discard(archive_name)
+            raise
+        return archive_path
+
+    def extract_archive(self, project_name: str, archive_path: Path, destination_path: str = "") -> Dict:
+        """
+        Unpack a tar archive into a project's active_run directory.
+
+        Only regular files and directories are extracted. Every member path is
+        checked to stay inside active_run, and links, devices and other special
+        members are skipped. Files are written atomically, so readers never see
+        a half-written dictionary, and keep their permission bits from the
+        archive (without setuid, setgid and sticky bits).
+
+        Args:
+            project_name: Name of the project
+            archive_path: Path to the (optionally compressed) tar archive
+            destination_path: Optional subdirectory of active_run to extract into
+
+        Returns:
+            Dict with the extracted file list, count and total size
+
+        Raises:
+            UploadTooLargeError: If the unpacked size exceeds MAX_ARCHIVE_EXTRACTED_SIZE
+            UploadError: If the archive is invalid or cannot be extracted
+        """
+        active_run_dir = self.get_active_run_dir(project_name)
+        if destination_path:
+            destination_root = self.resolve_destination(active_run_dir, destination_path)
+        else:
+            destination_root = active_run_dir.resolve()
+
+        files = []
+        skipped = []
+        hashes = {}
+        extracted_size = 0
+
+        try:
+            with self._open_archive(archive_path) as archive:
+                for member in archive:
+                    if member.isdir():
+                        if os.path.normpath(member.name) != ".":
+                            self._resolve_member(destination_root, member.name).mkdir(parents=True, exist_ok=True)
+                        continue
+                    if not member.isfile():
+                        skipped.append(member.name)
+                        continue
+
+                    extracted_size += member.size
+                    if extracted_size > self.max_extracted_size:
+                        raise UploadTooLargeError(
+                            f"Archive too large. Maximum unpacked size is {self.max_extracted_size // (1024*1024)}MB"
+                        )
+
+                    target = self._resolve_member(destination_root, member.name)
+                    source = archive.extractfile(member)
+                    hasher = hashlib.sha256()
+                    # Keep the member's permission bits (Allrun stays executable), never setuid/setgid
+                    with self._atomic_file(target, member.mode & 0o777) as tmp_file:
+                        while chunk := source.read(self.chunk_size):
+                            tmp_file.write(chunk)
+                            hasher.update(chunk)
+                    key = self._manifest_key(active_run_dir, target)
+                    hashes[key] = hasher.hexdigest()
+                    files.append(key)
+        except ARCHIVE_ERRORS as e:
+            raise UploadError(f"Invalid archive: {e}")
+        except OSError as e:
+            raise UploadError(f"Failed to extract archive: {e}")
+        finally:
+            # Whatever made it to disk before a failure is still tracked
+            if hashes:
+                self.record_files(project_name, hashes)
+
+        if skipped:
+            logger.warning(f"Skipped {len(skipped)} non-regular archive members for project '{project_name}': {skipped}")
+        logger.info(f"Extracted {len(files)} files ({extracted_size} bytes) into {destination_root}")
+
+        return {
+            "files": files,
+            "file_count": len(files),
+            "total_size": extracted_size,
+            "skipped": skipped
+        }
+
+    # -------------------------------------------------------------------------
+    # Upload manifest
+    # -------------------------------------------------------------------------
+
+    def record_files(self, project_name: str, hashes: Dict[str, str]):
+        """
+        Record the SHA-256 of files written into active_run.
+
+        The size and mtime are stored alongside the hash so that later changes
+        made on the server (e.g. by a utility rewriting 0/U) are detected.
+        """
+        active_run_dir = self.get_active_run_dir(project_name)
+        with self._manifest_lock:
+            manifest = self._load_manifest(project_name)
+            for key, digest in hashes.items():
+                try:
+                    stat = (active_run_dir / key).stat()
+                except OSError:
+                    manifest.pop(key, None)
+                    continue
+                manifest[key] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            self._store_manifest(project_name, manifest)
+
+    def get_manifest(self, project_name: str) -> Dict[str, Dict]:
+        """
+        Return the hash and size of every file uploaded into active_run.
+
+        Only files written through the upload API are listed; solver output and
+        meshes generated on the server are not part of the manifest. Entries
+        whose file disappeared are dropped, and files modified on the server
+        since upload are re-hashed so clients never skip a needed upload.
+
+        Returns:
+            Dict mapping paths relative to active_run to {"sha256", "size"}
+        """
+        active_run_dir = self.get_active_run_dir(project_name)
+        with self._manifest_lock:
+            manifest = self._load_manifest(project_name)
+            changed = False
+            for key in list(manifest):
+                entry = manifest[key]
+                path = active_run_dir / key
+                try:
+                    stat = path.stat()
+                except OSError:
+                    del manifest[key]
+                    changed = True
+                    continue
+                if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+                    manifest[key] = {
+                        "sha256": self._hash_file(path),
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns
+                    }
+                    changed = True
+            if changed:
+                self._store_manifest(project_name, manifest)
+
+        return {key: {"sha256": entry["sha256"], "size": entry["size"]} for key, entry in manifest.items()}
+
+    def delete_files(self, project_name: str, paths: List[str]) -> Dict:
+        """
+        Delete files from active_run and forget them in the upload manifest.
+
+        Every path is checked before anything is deleted, so a request with an
+        invalid path (outside active_run, a directory or other non-regular
+        file) fails as a whole instead of leaving a partial delete behind.
+
+        Returns:
+            Dict with the deleted paths and the paths that did not exist
+
+        Raises:
+            UploadError: If a path is invalid or a file cannot be deleted
+        """
+        active_run_dir = self.get_active_run_dir(project_name)
+        targets = [(path, self.resolve_destination(active_run_dir, path)) for path in paths]
+
+        missing = []
+        existing = []
+        for path, target in targets:
+            if not target.exists():
+                missing.append(path)
+            elif not target.is_file():
+                raise UploadError(f"Refusing to delete '{path}': not a regular file")
+            else:
+                existing.append((path, target))
+
+        deleted = []
+        error = None
+        for path, target in existing:
+            try:
+                target.unlink()
+                deleted.append(path)
+            except FileNotFoundError:
+                missing.append(path)
+            except OSError as e:
+                error = UploadError(f"Failed to delete '{path}': {e}")
+                break
+
+        # Files deleted before a failure are forgotten all the same
+        gone = set(deleted + missing)
+        with self._manifest_lock:
+            manifest = self._load_manifest(project_name)
+            for path, target in targets:
+                if path in gone:
+                    manifest.pop(self._manifest_key(active_run_dir, target), None)
+            self._store_manifest(project_name, manifest)
+        if error is not None:
+            raise error
+
+        logger.info(f"Deleted {len(deleted)} files from project '{project_name}' ({len(missing)} already missing)")
+        return {"deleted": deleted, "missing": missing}
+
+    def _manifest_path(self, project_name: str) -> Path:
+        return Path(PROJECTS_BASE_PATH) / project_name / MANIFEST_FILENAME
+
+    def _manifest_key(self, active_run_dir: Path, target: Path) -> str:
+        return target.relative_to(active_run_dir.resolve()).as_posix()
+
+    def _load_manifest(self, project_name: str) -> Dict[str, Dict]:
+        try:
+            with open(self._manifest_path(project_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            # A corrupt manifest only costs a full re-upload, never a wrong skip
+            logger.warning(f"Discarding unreadable upload manifest for project '{project_name}': {e}")
+            return {}
+
+    def _store_manifest(self, project_name: str, manifest: Dict[str, Dict]):
+        with self._atomic_file(self._manifest_path(project_name)) as tmp_file:
+            tmp_file.write(json.dumps(manifest).encode("utf-8"))
+
+    def _hash_file(self, path: Path) -> str:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(self.chunk_size):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _resolve_member(self, destination_root: Path, member_name: str) -> Path:
+        """Resolve an archive member below destination_root, rejecting escapes"""
+        try:
+            return self.resolve_destination(destination_root, member_name)
+        except UploadError:
+            raise UploadError(f"Archive member escapes the destination directory: '{member_name}'")
+
+    @contextlib.contextmanager
+    def _open_archive(self, archive_path: Path) -> Iterator[tarfile.TarFile]:
+        """Open a tar archive in streaming mode, transparently decompressing it"""
+        with open(archive_path, "rb") as raw:
+            magic = raw.read(len(ZSTD_MAGIC))
+            raw.seek(0)
+            if magic == ZSTD_MAGIC:
+                if not ZSTD_AVAILABLE:
+                    raise UploadError("zstd-compressed archives require the 'zstandard' package on the server")
+                with zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+                    with tarfile.open(fileobj=reader, mode="r|") as archive:
+                        yield archive
+            else:
+                with tarfile.open(fileobj=raw, mode="r|*") as archive:
+                    yield archive
+
+    @contextlib.contextmanager
+    def _atomic_file(self, target: Path, mode: int = DEFAULT_FILE_MODE):
+        """Yield a temporary file next to target and rename it into place (with mode) on success"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".part", dir=str(target.parent))
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                yield tmp_file
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, target)
+        except BaseException:
+            # Errors, client disconnects and cancellation must not leave .part files behind
+            self._discard(tmp_name)
+            raise
+
+    def _too_large_message(self) -> str:
+        return f"File too large. Maximum size is {self.max_upload_size // (1024*1024)}MB"
+
+    def _discard(self, tmp_name: str):
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+
+
+# Global instance for easy import
+upload_service = UploadService()
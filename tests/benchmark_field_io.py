@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmark the OpenFOAM field reader against the previous regex extraction.
+
+Writes a synthetic case (U and p of the requested cell count in a time
+directory, plus polyMesh/owner and boundary) in ASCII and in binary format,
+then extracts the maximum velocity and the pressure drop with
+foamai_core.field_io and with the previous regex-over-the-whole-file code.
+The reader's results are checked against the arrays that were written. Each
+extraction runs in its own process so the reported peak RSS is its own.
+
+Usage:
+    python tests/benchmark_field_io.py [--cells 1000000] [--dir /tmp] [--skip-legacy]
+"""
+
+import re
+import sys
+import json
+import shutil
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core.field_io import field_statistics, latest_time_directory, read_boundary_cells, read_field
+
+BANNER = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     | Website:  https://openfoam.org
+    \\\\  /    A nd           | Version:  11
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+"""
+SEPARATOR = "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n\n"
+PATCH_FACES = {"inlet": 2000, "outlet": 2000, "walls": 8000}
+TIME = "500"
+
+
+def header(file_format: str, field_class: str, location: str, name: str) -> str:
+    return (f"{BANNER}FoamFile\n{{\n    format      {file_format};\n"
+            f"    arch        \"LSB;label=32;scalar=64\";\n    class       {field_class};\n"
+            f"    location    \"{location}\";\n    object      {name};\n}}\n{SEPARATOR}")
+
+
+def format_list(values: np.ndarray, kind: str, binary: bool) -> bytes:
+    """A nonuniform list as OpenFOAM writes it, starting with its size."""
+    if binary:
+        dtype = "<i4" if kind == "label" else "<f8"
+        return f"\n{len(values)}\n(".encode() + np.ascontiguousarray(values, dtype=dtype).tobytes() + b")"
+    if values.ndim == 2:
+        rows = "\n".join(f"({' '.join(f'{v:.6g}' for v in row)})" for row in values)
+    else:
+        rows = "\n".join(f"{v:.6g}" if kind != "label" else str(v) for v in values)
+    return f"\n{len(values)}\n(\n{rows}\n)".encode()
+
+
+def write_field(path: Path, name: str, internal: np.ndarray, patches: dict, binary: bool):
+    kind = "vector" if internal.ndim == 2 else "scalar"
+    field_class = "volVectorField" if kind == "vector" else "volScalarField"
+    dimensions = "[0 1 -1 0 0 0 0]" if kind == "vector" else "[0 2 -2 0 0 0 0]"
+    with open(path, "wb") as f:
+        f.write(header("binary" if binary else "ascii", field_class, TIME, name).encode())
+        f.write(f"dimensions      {dimensions};\n\ninternalField   nonuniform List<{kind}> ".encode())
+        f.write(format_list(internal, kind, binary) + b"\n;\n\nboundaryField\n{\n")
+        for patch, (patch_type, value) in patches.items():
+            f.write(f"    {patch}\n    {{\n        type            {patch_type};\n".encode())
+            if isinstance(value, np.ndarray):
+                f.write(f"        value           nonuniform List<{kind}> ".encode()
+                        + format_list(value, kind, binary) + b";\n")
+            elif value is not None:
+                f.write(f"        value           uniform {value};\n".encode())
+            f.write(b"    }\n")
+        f.write(b"    frontAndBack\n    {\n        type            empty;\n    }\n}\n\n\n")
+        f.write(b"// ************************************************************************* //\n")
+
+
+def write_case(case: Path, cells: int, binary: bool, seed: int = 0) -> dict:
+    """Write the synthetic case and return the expected extraction results."""
+    rng = np.random.default_rng(seed)
+    (case / TIME).mkdir(parents=True, exist_ok=True)
+    (case / "constant" / "polyMesh").mkdir(parents=True, exist_ok=True)
+
+    velocity = rng.normal([5.0, 0.0, 0.0], 1.0, (cells, 3))
+    pressure = rng.normal(50.0, 10.0, cells)
+    outlet_velocity = rng.normal([5.0, 0.0, 0.0], 1.0, (PATCH_FACES["outlet"], 3))
+    write_field(case / TIME / "U", "U", velocity, {
+        "inlet": ("fixedValue", "(5 0 0)"),
+        "outlet": ("inletOutlet", outlet_velocity),
+        "walls": ("noSlip", None)
+    }, binary)
+    write_field(case / TIME / "p", "p", pressure, {
+        "inlet": ("zeroGradient", None),
+        "outlet": ("fixedValue", "0"),
+        "walls": ("zeroGradient", None)
+    }, binary)
+
+    # Boundary faces come after the internal faces, in patch order
+    internal_faces = 3 * cells
+    boundary_faces = sum(PATCH_FACES.values())
+    owner = np.concatenate([np.arange(internal_faces) // 3, rng.integers(0, cells, boundary_faces)]).astype(np.int32)
+    with open(case / "constant" / "polyMesh" / "owner", "wb") as f:
+        f.write(header("binary" if binary else "ascii", "labelList", "constant/polyMesh", "owner").encode())
+        f.write(format_list(owner, "label", binary).lstrip(b"\n") + b"\n")
+    entries = []
+    start = internal_faces
+    for patch, faces in PATCH_FACES.items():
+        patch_type = "wall" if patch == "walls" else "patch"
+        entries.append(f"    {patch}\n    {{\n        type            {patch_type};\n"
+                       f"        inGroups        List<word> 1({patch_type});\n"
+                       f"        nFaces          {faces};\n        startFace       {start};\n    }}\n")
+        start += faces
+    entries.append(f"    frontAndBack\n    {{\n        type            empty;\n        nFaces          0;\n"
+                   f"        startFace       {start};\n    }}\n")
+    with open(case / "constant" / "polyMesh" / "boundary", "w") as f:
+        f.write(header("ascii", "polyBoundaryMesh", "constant/polyMesh", "boundary"))
+        f.write(f"{len(entries)}\n(\n{''.join(entries)})\n")
+
+    inlet_cells = owner[internal_faces:internal_faces + PATCH_FACES["inlet"]]
+    return {
+        "max_velocity": float(np.linalg.norm(velocity, axis=1).max()),
+        "pressure_drop": float(pressure[inlet_cells].mean())
+    }
+
+
+def legacy_extract(case: Path) -> dict:
+    """The previous extract_max_velocity and extract_pressure_drop."""
+    results = {}
+    time_dirs = [d for d in case.iterdir() if d.is_dir() and d.name.replace('.', '').isdigit()]
+    latest_time = max(time_dirs, key=lambda x: float(x.name))
+    with open(latest_time / "U", 'r', errors='replace') as f:
+        numbers = re.findall(r'[-+]?\d*\.?\d+', f.read())
+        results["max_velocity"] = max(abs(float(n)) for n in numbers[-100:])
+    with open(latest_time / "p", 'r', errors='replace') as f:
+        numbers = re.findall(r'[-+]?\d*\.?\d+', f.read())
+        pressures = [float(n) for n in numbers[-100:]]
+        results["pressure_drop"] = max(pressures) - min(pressures)
+    return results
+
+
+def reader_extract(case: Path) -> dict:
+    latest_time = latest_time_directory(case)
+    boundary_cells = read_boundary_cells(case / "constant" / "polyMesh")
+    velocity = field_statistics(read_field(latest_time / "U"), boundary_cells)
+    pressure = field_statistics(read_field(latest_time / "p"), boundary_cells)
+    return {
+        "max_velocity": velocity["max"],
+        "pressure_drop": pressure["patches"]["inlet"] - pressure["patches"]["outlet"]
+    }
+
+
+EXTRACTORS = {"reader": reader_extract, "legacy": legacy_extract}
+
+
+def run_worker(name: str, case: Path):
+    """Worker mode: run one extraction and print its result, time and peak RSS as JSON."""
+    start = time.perf_counter()
+    result = EXTRACTORS[name](case)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({"elapsed": elapsed, "peak_rss": peak_rss, "result": result}))
+
+
+def run(*args) -> str:
+    return subprocess.run([sys.executable, __file__, *map(str, args)], check=True, capture_output=True, text=True).stdout
+
+
+def measure(name: str, case: Path) -> dict:
+    report = json.loads(run("--worker", name, case))
+    result = report["result"]
+    print(f"  {name:<8} {report['elapsed']:>8.2f} s {report['peak_rss'] / (1024 * 1024):>8.0f} MB   "
+          f"max |U| {result['max_velocity']:.6g}, pressure drop {result['pressure_drop']:.6g}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OpenFOAM field extraction")
+    parser.add_argument("--cells", type=int, default=1_000_000, help="Cells of the test fields")
+    parser.add_argument("--dir", type=Path, default=Path("/tmp"), help="Where to write the test cases")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the field reader")
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], Path(args.worker[1]))
+        return
+    if args.generate:
+        cells, file_format, case = args.generate
+        print(json.dumps(write_case(Path(case), int(cells), file_format == "binary")))
+        return
+
+    for file_format in ("ascii", "binary"):
+        case = args.dir / f"benchmark_field_{args.cells}_{file_format}"
+        # Written in a subprocess: a child starts out with its parent's peak RSS
+        expected = json.loads(run("--generate", args.cells, file_format, case))
+        size = sum(f.stat().st_size for f in (case / TIME).iterdir())
+        print(f"{args.cells:,} cells, {file_format}, U and p {size / (1024 * 1024):.0f} MB")
+        result = measure("reader", case)
+        for key, value in expected.items():
+            assert np.isclose(result[key], value, rtol=1e-4), f"{key}: {result[key]} != expected {value}"
+        if not args.skip_legacy:
+            measure("legacy", case)
+        shutil.rmtree(case)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Benchmark the single-pass OpenFOAM log parser on a synthetic pimpleFoam log.
+
+Writes a transient pimpleFoam log of the requested size (1 GB by default),
+then parses it with OpenFOAMLogParser and with the previous read-everything,
+one-regex-per-metric approach. Each parser runs in its own process so the
+reported peak RSS is its own.
+
+Usage:
+    python tests/benchmark_log_parser.py [--size-mb 1024] [--log /tmp/log.pimpleFoam] [--skip-legacy]
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core.log_parser import OpenFOAMLogParser
+
+HEADER = """/*---------------------------------------------------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     | Website:  https://openfoam.org
+    \\\\  /    A nd           | Version:  11
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+Build  : 11
+Exec   : pimpleFoam
+Create time
+
+Create mesh for time = 0
+
+PIMPLE: Operating solver in PISO mode
+
+Starting time loop
+
+"""
+
+STEP = """Courant Number mean: 0.{mean:04d} max: 0.{peak:04d}
+deltaT = 0.0005
+Time = {time:.4f}
+
+PIMPLE: Iteration 1
+smoothSolver:  Solving for Ux, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 2
+smoothSolver:  Solving for Uy, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 2
+DICPCG:  Solving for p, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 18
+time step continuity errors : sum local = 1.2e-08, global = -3.4e-19, cumulative = 5.6e-18
+DICPCG:  Solving for p, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 17
+time step continuity errors : sum local = 1.1e-08, global = 2.2e-19, cumulative = 5.8e-18
+smoothSolver:  Solving for k, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 2
+smoothSolver:  Solving for omega, Initial residual = {r:.6e}, Final residual = {f:.6e}, No Iterations 2
+ExecutionTime = {exec_time:.2f} s  ClockTime = {clock} s
+
+"""
+
+
+def write_log(path: Path, size_bytes: int) -> int:
+    """Write a synthetic pimpleFoam log of at least size_bytes and return the step count."""
+    steps = 0
+    with open(path, "w", buffering=8 * 1024 * 1024) as f:
+        f.write(HEADER)
+        written = len(HEADER)
+        while written < size_bytes:
+            steps += 1
+            block = STEP.format(
+                mean=steps % 10000, peak=(steps * 7) % 10000, time=steps * 0.0005,
+                r=1.0 / steps, f=1e-3 / steps, exec_time=steps * 0.01, clock=steps // 100
+            )
+            f.write(block)
+            written += len(block)
+        f.write("End\n\n")
+    return steps
+
+
+def legacy_parse(log_file: Path) -> dict:
+    """The previous approach: read the whole file, then one re.findall per metric."""
+    content = log_file.read_text()
+    info = {"final_residuals": {}}
+    for field in ("p", "Ux", "Uy", "Uz", "k", "omega", "epsilon"):
+        matches = re.findall(rf"Solving for {field}.*Final residual = ([\d.]+(?:[eE][+-]?\d+)?)", content)
+        if matches:
+            info["final_residuals"][field] = float(matches[-1])
+    time_match = re.search(r"ExecutionTime = ([\d.]+(?:[eE][+-]?\d+)?) s", content)
+    info["execution_time"] = float(time_match.group(1)) if time_match else 0
+    time_matches = re.findall(r"Time = ([\d.]+(?:[eE][+-]?\d+)?)", content)
+    info["final_time"] = float(time_matches[-1]) if time_matches else 0
+    info["warnings"] = re.findall(r"Warning.*", content)[:10]
+    info["errors"] = re.findall(r"Error.*", content)[:10]
+    return info
+
+
+PARSERS = {
+    "single-pass": lambda path: OpenFOAMLogParser.parse_file(path).solver_info("pimpleFoam"),
+    "legacy (read + findall)": legacy_parse,
+}
+
+
+def run_parser(name: str, log_file: Path):
+    """Worker mode: run one parser and print its result, time and peak RSS as JSON."""
+    start = time.perf_counter()
+    result = PARSERS[name](log_file)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({"elapsed": elapsed, "peak_rss": peak_rss, "result": result}))
+
+
+def measure(name: str, log_file: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", name, "--log", str(log_file)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    report = json.loads(output)
+    print(f"{name:<24} {report['elapsed']:>8.1f} s {report['peak_rss'] / (1024 * 1024):>10.0f} MB")
+    return report["result"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OpenFOAM log parsing")
+    parser.add_argument("--size-mb", type=int, default=1024, help="Size of the synthetic log in MB")
+    parser.add_argument("--log", type=Path, default=Path("/tmp/log.pimpleFoam"), help="Where to write the log")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the single-pass parser")
+    parser.add_argument("--worker", choices=PARSERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_parser(args.worker, args.log)
+        return
+
+    print(f"Writing {args.size_mb} MB synthetic pimpleFoam log to {args.log} ...")
+    steps = write_log(args.log, args.size_mb * 1024 * 1024)
+    print(f"{steps} time steps, {args.log.stat().st_size / (1024 * 1024):.0f} MB\n")
+
+    print(f"{'parser':<24} {'time':>10} {'peak RSS':>13}")
+    single_pass = measure("single-pass", args.log)
+    if not args.skip_legacy:
+        legacy = measure("legacy (read + findall)", args.log)
+        assert legacy["final_residuals"] == {
+            field: value for field, value in single_pass["final_residuals"].items() if field in legacy["final_residuals"]
+        }, "parsers disagree on final residuals"
+
+    assert single_pass["time_steps"] == steps, "time step count mismatch"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmark the vectorized STL engine against the previous per-facet code.
+
+Writes synthetic binary STLs (1M and 10M facets by default) and an ASCII STL,
+then computes the center and applies a rotation with foamai_core.stl_io and
+with the previous struct.unpack-per-facet implementations from case_writer.
+Each run happens in its own process so the reported peak RSS is its own; the
+test surfaces are also written and compared in subprocesses, because a child
+starts out with its parent's peak RSS.
+
+The previous center computation keeps every vertex in a Python list, which
+needs about 5 GB for 10M facets; --legacy-max-facets skips it on larger files.
+
+Usage:
+    python tests/benchmark_stl.py [--facets 1000000 10000000] [--ascii-facets 1000000]
+                                  [--dir /tmp] [--skip-legacy] [--legacy-max-facets 2000000]
+"""
+
+import sys
+import json
+import time
+import struct
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core.stl_io import STL_DTYPE, STLSurface, read_stl, rotation_matrix, stl_center, transform_stl, write_stl
+
+ROTATION = ("z", 30.0)
+
+
+def write_surface(path: Path, facets: int, binary: bool, seed: int = 0):
+    """Write a random surface with the given number of facets."""
+    rng = np.random.default_rng(seed)
+    surface = np.zeros(facets, dtype=STL_DTYPE)
+    for start in range(0, facets, 1_000_000):
+        count = min(1_000_000, facets - start)
+        corners = rng.random((count, 1, 3), dtype=np.float32) * [4.0, 2.0, 1.0]
+        surface["vertices"][start:start + count] = corners + rng.normal(0, 0.01, (count, 3, 3)).astype(np.float32)
+    write_stl(path, STLSurface(surface, [("body", facets)], binary), binary=binary)
+
+
+def legacy_center(stl_path: Path) -> list:
+    """The previous calculate_stl_center."""
+    vertices = []
+    with open(stl_path, 'rb') as f:
+        header = f.read(80)
+    if header.startswith(b'solid'):
+        with open(stl_path, 'r') as f:
+            for line in f:
+                if line.strip().startswith('vertex'):
+                    parts = line.split()
+                    vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
+    else:
+        with open(stl_path, 'rb') as f:
+            f.read(80)
+            num_triangles = struct.unpack('<I', f.read(4))[0]
+            for _ in range(num_triangles):
+                data = struct.unpack('<12fH', f.read(50))
+                vertices.extend([data[3:6], data[6:9], data[9:12]])
+    return np.array(vertices).mean(axis=0).tolist()
+
+
+def legacy_rotate_ascii(input_path: Path, output_path: Path, rotation, center: list):
+    """The previous rotate_ascii_stl."""
+    center_vec = np.array(center)
+    with open(input_path, 'r') as infile, open(output_path, 'w') as outfile:
+        for line in infile:
+            line = line.strip()
+            if line.startswith('vertex'):
+                parts = line.split()
+                vertex = np.array([float(parts[1]), float(parts[2]), float(parts[3])])
+                vertex = rotation @ (vertex - center_vec) + center_vec
+                outfile.write(f"      vertex {vertex[0]:.6e} {vertex[1]:.6e} {vertex[2]:.6e}\n")
+            elif line.startswith('facet normal'):
+                parts = line.split()
+                normal = rotation @ np.array([float(parts[2]), float(parts[3]), float(parts[4])])
+                normal = normal / np.linalg.norm(normal)
+                outfile.write(f"  facet normal {normal[0]:.6e} {normal[1]:.6e} {normal[2]:.6e}\n")
+            else:
+                outfile.write(line + '\n')
+
+
+def legacy_rotate_binary(input_path: Path, output_path: Path, rotation, center: list):
+    """The previous rotate_binary_stl."""
+    center_vec = np.array(center)
+    with open(input_path, 'rb') as infile:
+        header = infile.read(80)
+        num_triangles = struct.unpack('<I', infile.read(4))[0]
+        with open(output_path, 'wb') as outfile:
+            outfile.write(header)
+            outfile.write(struct.pack('<I', num_triangles))
+            for _ in range(num_triangles):
+                data = struct.unpack('<12fH', infile.read(50))
+                normal = rotation @ np.array(data[0:3])
+                normal = normal / np.linalg.norm(normal)
+                v1 = rotation @ (np.array(data[3:6]) - center_vec) + center_vec
+                v2 = rotation @ (np.array(data[6:9]) - center_vec) + center_vec
+                v3 = rotation @ (np.array(data[9:12]) - center_vec) + center_vec
+                outfile.write(struct.pack('<12fH', *normal, *v1, *v2, *v3, data[12]))
+
+
+def legacy_rotate(input_path: Path, output_path: Path, rotation, center: list):
+    with open(input_path, 'rb') as f:
+        header = f.read(80)
+    if header.startswith(b'solid'):
+        legacy_rotate_ascii(input_path, output_path, rotation, center)
+    else:
+        legacy_rotate_binary(input_path, output_path, rotation, center)
+
+
+IMPLEMENTATIONS = {
+    "vectorized": (stl_center, lambda src, dst, rotation, center: transform_stl(src, dst, rotation=rotation, center=center)),
+    "legacy": (legacy_center, legacy_rotate),
+}
+
+
+def run_worker(implementation: str, operation: str, stl_file: Path, output: Path):
+    """Worker mode: run one operation and print its result, time and peak RSS as JSON."""
+    center_fn, rotate_fn = IMPLEMENTATIONS[implementation]
+    start = time.perf_counter()
+    if operation == "center":
+        result = center_fn(stl_file)
+    else:
+        rotate_fn(stl_file, output, rotation_matrix(*ROTATION), [1.0, 0.5, 0.25])
+        result = None
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({"elapsed": elapsed, "peak_rss": peak_rss, "result": result}))
+
+
+def run(*args) -> str:
+    return subprocess.run([sys.executable, __file__, *map(str, args)], check=True, capture_output=True, text=True).stdout
+
+
+def measure(implementation: str, operation: str, stl_file: Path, output: Path):
+    report = json.loads(run("--worker", implementation, operation, stl_file, output))
+    print(f"  {operation:<8} {implementation:<12} {report['elapsed']:>9.2f} s {report['peak_rss'] / (1024 * 1024):>10.0f} MB")
+    return report["result"]
+
+
+def verify(new_file: Path, old_file: Path):
+    """Worker mode: check that two rotated surfaces agree, block by block."""
+    new, old = read_stl(new_file).facets, read_stl(old_file).facets
+    assert len(new) == len(old), "facet counts disagree"
+    for start in range(0, len(new), 1_000_000):
+        block = slice(start, start + 1_000_000)
+        assert np.allclose(new["vertices"][block], old["vertices"][block], atol=1e-5), "rotated vertices disagree"
+
+
+def compare(stl_file: Path, skip_legacy: bool, legacy_max_facets: int, facets: int):
+    vectorized_out = stl_file.with_name(stl_file.stem + "_vectorized.stl")
+    legacy_out = stl_file.with_name(stl_file.stem + "_legacy.stl")
+    run_legacy = not skip_legacy
+
+    center = measure("vectorized", "center", stl_file, vectorized_out)
+    if run_legacy and facets <= legacy_max_facets:
+        legacy = measure("legacy", "center", stl_file, legacy_out)
+        assert np.allclose(center, legacy, atol=1e-5), f"centers disagree: {center} vs {legacy}"
+
+    measure("vectorized", "rotate", stl_file, vectorized_out)
+    if run_legacy:
+        measure("legacy", "rotate", stl_file, legacy_out)
+        run("--verify", vectorized_out, legacy_out)
+        legacy_out.unlink()
+    vectorized_out.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark STL center and rotation")
+    parser.add_argument("--facets", type=int, nargs="+", default=[1_000_000, 10_000_000],
+                        help="Facet counts of the binary test surfaces")
+    parser.add_argument("--ascii-facets", type=int, default=1_000_000, help="Facets of the ASCII test surface (0 to skip)")
+    parser.add_argument("--dir", type=Path, default=Path("/tmp"), help="Where to write the test surfaces")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the vectorized engine")
+    parser.add_argument("--legacy-max-facets", type=int, default=2_000_000,
+                        help="Largest surface to run the legacy (all vertices in memory) center on")
+    parser.add_argument("--worker", nargs=4, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument("--verify", nargs=2, type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        implementation, operation, stl_file, output = args.worker
+        run_worker(implementation, operation, Path(stl_file), Path(output))
+        return
+    if args.generate:
+        facets, surface_format, stl_file = args.generate
+        write_surface(Path(stl_file), int(facets), surface_format == "binary")
+        return
+    if args.verify:
+        verify(*args.verify)
+        return
+
+    cases = [(facets, True) for facets in args.facets]
+    if args.ascii_facets:
+        cases.append((args.ascii_facets, False))
+    for facets, binary in cases:
+        stl_file = args.dir / f"benchmark_{facets}_{'binary' if binary else 'ascii'}.stl"
+        run("--generate", facets, "binary" if binary else "ascii", stl_file)
+        print(f"{facets:,} facets, {'binary' if binary else 'ASCII'}, {stl_file.stat().st_size / (1024 * 1024):.0f} MB")
+        compare(stl_file, args.skip_legacy, args.legacy_max_facets, facets)
+        stl_file.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for the OpenFOAM field reader."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core.field_io import read_boundary_cells, read_field, read_list
+
+
+def header(field_class: str, name: str, label_bits: int = 32, scalar_bits: int = 64) -> bytes:
+    return (f"FoamFile\n{{\n    version     2.0;\n    format      binary;\n"
+            f"    arch        \"LSB;label={label_bits};scalar={scalar_bits}\";\n"
+            f"    class       {field_class};\n    object      {name};\n}}\n"
+            f"// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n\n").encode()
+
+
+def binary_list(values: np.ndarray) -> bytes:
+    return f"\n{len(values)}\n(".encode() + values.tobytes() + b")"
+
+
+def test_binary_scalar32_field(tmp_path):
+    internal = np.array([1.5, -2.0, 3.25, 4.0, 0.5], dtype="<f4")
+    outlet = np.array([[1.0, 0.0, 0.0], [2.0, 0.0, 0.0]], dtype="<f4")
+    path = tmp_path / "U"
+    path.write_bytes(
+        header("volVectorField", "U", scalar_bits=32)
+        + b"dimensions      [0 1 -1 0 0 0 0];\n\ninternalField   nonuniform List<vector> "
+        + binary_list(np.repeat(internal[:, None], 3, axis=1).astype("<f4"))
+        + b";\n\nboundaryField\n{\n    outlet\n    {\n        type            fixedValue;\n"
+        + b"        value           nonuniform List<vector> " + binary_list(outlet) + b";\n    }\n}\n"
+    )
+
+    field = read_field(path)
+    assert field.field_class == "volVectorField"
+    assert field.internal_field.dtype == np.dtype("<f4")
+    assert field.internal_field.shape == (5, 3)
+    np.testing.assert_array_equal(field.internal_field[:, 0], internal)
+    np.testing.assert_array_equal(field.boundary_field["outlet"]["value"], outlet)
+
+
+def test_binary_label64_mesh(tmp_path):
+    owner = np.array([0, 0, 1, 1, 2, 2, 0, 3], dtype="<i8")
+    (tmp_path / "owner").write_bytes(header("labelList", "owner", label_bits=64) + binary_list(owner) + b"\n")
+    (tmp_path / "boundary").write_bytes(
+        header("polyBoundaryMesh", "boundary", label_bits=64).replace(b"format      binary", b"format      ascii")
+        + b"2\n(\n    inlet\n    {\n        type            patch;\n        nFaces          1;\n"
+        + b"        startFace       6;\n    }\n    outlet\n    {\n        type            patch;\n"
+        + b"        nFaces          1;\n        startFace       7;\n    }\n)\n"
+    )
+
+    np.testing.assert_array_equal(read_list(tmp_path / "owner"), owner)
+    cells = read_boundary_cells(tmp_path)
+    assert cells["inlet"].tolist() == [0]
+    assert cells["outlet"].tolist() == [3]
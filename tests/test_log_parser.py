@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Tests for the single-pass OpenFOAM log parser."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core.log_parser import OpenFOAMLogParser
+
+
+def time_step(time: float, pimple: str) -> str:
+    return (f"Courant Number mean: 0.1 max: 0.5\ndeltaT = 0.01\nTime = {time:g}\n\n"
+            "PIMPLE: Iteration 1\n"
+            "smoothSolver:  Solving for Ux, Initial residual = 0.01, Final residual = 1e-06, No Iterations 3\n"
+            "GAMG:  Solving for p, Initial residual = 0.1, Final residual = 1e-05, No Iterations 12\n"
+            f"{pimple}\nExecutionTime = {time * 10:g} s  ClockTime = {time * 10:g} s\n\n")
+
+
+def transient_log(last_pimple: str) -> str:
+    return "".join(time_step(0.01 * (i + 1), "PIMPLE: converged in 2 iterations") for i in range(4)) \
+        + time_step(0.05, last_pimple) + "End\n"
+
+
+def test_not_converged_is_not_converged():
+    parser = OpenFOAMLogParser.parse_text(transient_log("PIMPLE: not converged within 20 iterations"))
+    assert parser.converged is False
+    assert parser.solver_info("pimpleFoam")["converged"] is False
+
+
+def test_converged_markers():
+    assert OpenFOAMLogParser.parse_text(transient_log("PIMPLE: converged in 3 iterations")).converged
+    steady = ("Time = 285\n\nsmoothSolver:  Solving for Ux, Initial residual = 1e-05, Final residual = 1e-07, "
+              "No Iterations 2\n\nSIMPLE solution converged in 285 iterations\n\nEnd\n")
+    assert OpenFOAMLogParser.parse_text(steady).solver_info("simpleFoam")["converged"] is True
+
+
+def test_transient_iterations_count_time_steps():
+    info = OpenFOAMLogParser.parse_text(transient_log("PIMPLE: converged in 2 iterations")).solver_info("pimpleFoam")
+    assert info["time_steps"] == 5
+    assert info["iterations"] == 5
+    assert info["final_time"] == 0.05
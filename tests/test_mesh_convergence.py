@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for running the levels of a mesh convergence study."""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core import mesh_convergence
+
+
+def make_levels(count=4):
+    return [{"level": i, "config": {}, "estimated_cells": 100000 * 4 ** i, "description": f"Level {i}"}
+            for i in range(count)]
+
+
+def make_state(execution_mode):
+    return {
+        "case_directory": "/tmp/case",
+        "execution_mode": execution_mode,
+        "project_name": "study",
+        "parallel_settings": {"max_processes": 8},
+        "mesh_convergence_target_params": ["drag_coefficient"],
+        # Never converged, so every level runs
+        "mesh_convergence_threshold": 0.0,
+    }
+
+
+def record_runs(monkeypatch):
+    """Replace run_mesh_level with a stub that records how many levels ran at once."""
+    runs = {"active": 0, "max_active": 0, "order": [], "cores": {}}
+    lock = threading.Lock()
+
+    def fake_run_mesh_level(state, mesh_level, level_idx, cores, source_result=None):
+        with lock:
+            runs["active"] += 1
+            runs["max_active"] = max(runs["max_active"], runs["active"])
+            runs["order"].append(level_idx)
+            runs["cores"][level_idx] = cores
+        time.sleep(0.05)
+        with lock:
+            runs["active"] -= 1
+        return {"level": level_idx, "mesh_level": mesh_level,
+                "convergence_parameters": {"drag_coefficient": 1.0 + 0.1 / (level_idx + 1)}}
+
+    monkeypatch.setattr(mesh_convergence, "run_mesh_level", fake_run_mesh_level)
+    return runs
+
+
+def test_local_levels_run_concurrently(monkeypatch):
+    runs = record_runs(monkeypatch)
+    results, skipped = mesh_convergence.run_mesh_levels(make_state("local"), make_levels())
+
+    assert [r["level"] for r in results] == [0, 1, 2, 3]
+    assert skipped == []
+    assert runs["max_active"] == mesh_convergence.GCI_LEVELS
+    assert sum(runs["cores"][i] for i in range(mesh_convergence.GCI_LEVELS)) == 8
+
+
+def test_remote_levels_run_one_after_another(monkeypatch):
+    """Remote levels share the project's active_run, so they must not overlap."""
+    runs = record_runs(monkeypatch)
+    results, skipped = mesh_convergence.run_mesh_levels(make_state("remote"), make_levels())
+
+    assert [r["level"] for r in results] == [0, 1, 2, 3]
+    assert skipped == []
+    assert runs["max_active"] == 1
+    assert runs["order"] == [0, 1, 2, 3]
+    assert all(cores == 8 for cores in runs["cores"].values())
+
+
+def test_warm_start_reaches_initial_state():
+    from foamai_core.orchestrator import create_initial_state
+
+    assert create_initial_state("mesh convergence study")["mesh_convergence_warm_start"] is False
+    state = create_initial_state("mesh convergence study", mesh_convergence_active=True,
+                                 mesh_convergence_warm_start=True)
+    assert state["mesh_convergence_warm_start"] is True
+
+
+def test_warm_start_detected_in_prompt():
+    from foamai_core.nl_interpreter import detect_mesh_convergence_request
+
+    info = detect_mesh_convergence_request("Run a mesh convergence study and warm-start each level")
+    assert info["mesh_convergence_active"] and info["mesh_convergence_warm_start"]
+    assert not detect_mesh_convergence_request("Run a mesh convergence study")["mesh_convergence_warm_start"]
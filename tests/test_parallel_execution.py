@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Tests for requesting MPI-parallel solver runs."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-core"))
+
+from foamai_core import simulation_executor
+from foamai_core.nl_interpreter import detect_parallel_request
+from foamai_core.orchestrator import create_initial_state
+
+
+def test_parallel_execution_reaches_plan(monkeypatch):
+    monkeypatch.setattr(simulation_executor, "estimate_total_cells", lambda state: 1_000_000)
+
+    serial = create_initial_state("flow around a cylinder")
+    assert serial["parallel_execution"] is False
+    assert simulation_executor.plan_parallel_run(serial, cores=8)["processes"] == 1
+
+    state = create_initial_state("flow around a cylinder", parallel_execution=True,
+                                 parallel_settings={"max_processes": 4})
+    assert state["parallel_execution"] is True
+    assert simulation_executor.plan_parallel_run(state, cores=8)["processes"] == 4
+
+
+def test_parallel_request_detected_in_prompt():
+    assert detect_parallel_request("Run the cylinder case in parallel") == {
+        "parallel_execution": True, "max_processes": None
+    }
+    assert detect_parallel_request("Flow over a sphere using 6 cores") == {
+        "parallel_execution": True, "max_processes": 6
+    }
+    assert not detect_parallel_request("Flow over a sphere with 4 mesh levels")["parallel_execution"]
+    assert not detect_parallel_request("Flow over a sphere on 1 core")["parallel_execution"]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Tests for running commands on the server through the remote executor."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src" / "foamai-core"))
+sys.path.insert(0, str(ROOT / "src" / "foamai-server" / "foamai_server"))
+
+import scheduler
+from foamai_core.remote_executor import RemoteExecutor
+from foamai_core.simulation_executor import clone_solution_remote, run_solver_remote
+
+
+class FakeServer:
+    """Answers the executor's job requests, estimating time limits with the server's scheduler."""
+
+    def __init__(self, case_dir: Path):
+        self.case_dir = case_dir
+        self.jobs = {}
+        self.submitted = []
+
+    def request(self, method, endpoint, **kwargs):
+        if method == "POST" and endpoint.endswith("/run_command"):
+            data = kwargs["json"]
+            self.submitted.append(data)
+            requirements = scheduler.estimate_requirements(
+                self.case_dir, data["command"], data["args"], timeout=data["timeout"]
+            )
+            job_id = f"job{len(self.jobs)}"
+            self.jobs[job_id] = {"job_id": job_id, "status": "queued", "time_limit": requirements["time_limit"]}
+            return dict(self.jobs[job_id])
+        if method == "GET" and endpoint.startswith("/api/jobs/"):
+            job = self.jobs[endpoint.rsplit("/", 1)[1]]
+            job.update(status="completed", result={"success": True, "exit_code": 0, "stdout": "", "stderr": ""})
+            return dict(job)
+        raise AssertionError(f"Unexpected request {method} {endpoint}")
+
+
+def write_case(case_dir: Path, cells: int, end_time: int):
+    (case_dir / "system").mkdir(parents=True)
+    (case_dir / "constant" / "polyMesh").mkdir(parents=True)
+    (case_dir / "system" / "controlDict").write_text(
+        f"application foamRun;\nsolver incompressibleFluid;\nstartTime 0;\nendTime {end_time};\ndeltaT 1;\n"
+    )
+    (case_dir / "constant" / "polyMesh" / "owner").write_text(
+        f"FoamFile\n{{\n    note \"nPoints:0  nCells:{cells}  nFaces:0  nInternalFaces:0\";\n}}\n"
+    )
+
+
+def test_remote_solver_gets_scheduler_time_limit(tmp_path, monkeypatch):
+    write_case(tmp_path, cells=2_000_000, end_time=5000)
+    server = FakeServer(tmp_path)
+    remote = RemoteExecutor("http://server", "study")
+    monkeypatch.setattr(remote, "_make_request", server.request)
+
+    result = run_solver_remote(remote, "incompressibleFluid", {"verbose": False})
+
+    assert result["success"]
+    assert server.submitted[0]["command"] == "foamRun"
+    assert server.submitted[0]["timeout"] is None
+    control = scheduler.read_foam_dict_entries(tmp_path / "system" / "controlDict")
+    expected = int(scheduler.solver_time_limit(control, 2_000_000, 1))
+    assert server.jobs["job0"]["time_limit"] == expected
+    assert expected > 1800
+
+
+def test_explicit_timeout_is_sent(tmp_path, monkeypatch):
+    write_case(tmp_path, cells=1000, end_time=10)
+    server = FakeServer(tmp_path)
+    remote = RemoteExecutor("http://server", "study")
+    monkeypatch.setattr(remote, "_make_request", server.request)
+
+    remote.run_decomposepar(timeout=600)
+
+    assert server.submitted[0]["timeout"] == 600
+    assert server.jobs["job0"]["time_limit"] == 600
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def polled_remote(monkeypatch, statuses, step):
+    """An executor whose job reports the given statuses, one per poll, step seconds apart."""
+    clock = FakeClock()
+    monkeypatch.setattr("foamai_core.remote_executor.time", clock)
+    remote = RemoteExecutor("http://server", "study")
+    calls = {"polls": 0, "cancelled": []}
+
+    def get_job(job_id):
+        status = statuses[min(calls["polls"], len(statuses) - 1)]
+        calls["polls"] += 1
+        clock.now += step
+        job = {"job_id": job_id, "status": status, "time_limit": 100}
+        if status == "completed":
+            job["result"] = {"success": True, "exit_code": 0}
+        return job
+
+    monkeypatch.setattr(remote, "get_job", get_job)
+    monkeypatch.setattr(remote, "cancel_job", lambda job_id: calls["cancelled"].append(job_id))
+    return remote, calls
+
+
+def test_wait_for_job_ignores_queue_time(monkeypatch):
+    # Queued for far longer than the time limit, then runs briefly
+    remote, calls = polled_remote(monkeypatch, ["queued"] * 50 + ["running", "completed"], step=60)
+
+    assert remote.wait_for_job("job0")["success"]
+    assert calls["cancelled"] == []
+
+
+def test_wait_for_job_cancels_on_timeout(monkeypatch):
+    remote, calls = polled_remote(monkeypatch, ["queued", "running"], step=30)
+
+    with pytest.raises(RuntimeError, match="Timed out"):
+        remote.wait_for_job("job0")
+    assert calls["cancelled"] == ["job0"]
+
+
+class RecordingRemote:
+    """Records run_command calls and answers them with the given results, in order."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.commands = []
+
+    def run_command(self, command, args=None, **kwargs):
+        self.commands.append([command, *(args or [])])
+        return self.results.pop(0) if self.results else {"success": True}
+
+
+@pytest.mark.parametrize("directory", ["", ".", "..", "../other", "a/b", "/", "-rf", "active_run"])
+def test_clone_solution_rejects_unsafe_directories(directory):
+    remote = RecordingRemote()
+
+    result = clone_solution_remote(remote, directory)
+
+    assert not result["success"]
+    assert remote.commands == []
+
+
+def test_clone_solution_stops_when_removal_fails():
+    remote = RecordingRemote({"success": False, "stderr": "rm: Permission denied"})
+
+    result = clone_solution_remote(remote, "mesh_level_1")
+
+    assert not result["success"]
+    assert result["error"] == "rm: Permission denied"
+    assert remote.commands == [["rm", "-rf", "--", "mesh_level_1"]]
+
+
+def test_clone_solution():
+    remote = RecordingRemote()
+
+    assert clone_solution_remote(remote, "mesh_level_1")["success"]
+    assert remote.commands == [["rm", "-rf", "--", "mesh_level_1"],
+                               ["foamCloneCase", "-latestTime", "active_run", "mesh_level_1"]]
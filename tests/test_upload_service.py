@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for writing uploads into a project's active_run."""
+
+import io
+import os
+import sys
+import stat
+import tarfile
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "foamai-server" / "foamai_server"))
+
+import upload_service
+from upload_service import UploadService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_service, "PROJECTS_BASE_PATH", str(tmp_path))
+    (tmp_path / "study" / "active_run").mkdir(parents=True)
+    return UploadService()
+
+
+def mode_of(path: Path) -> int:
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_upload_gets_umask_permissions(service, tmp_path):
+    asyncio.run(service.save_upload("study", "system/controlDict", stream(b"FoamFile", b"\n{}\n")))
+
+    path = tmp_path / "study" / "active_run" / "system" / "controlDict"
+    assert path.read_bytes() == b"FoamFile\n{}\n"
+    assert mode_of(path) == 0o666 & ~upload_service._UMASK
+
+
+def test_archive_keeps_executable_members(service, tmp_path):
+    archive_path = tmp_path / "case.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        for name, data, mode in (("Allrun", b"#!/bin/sh\nblockMesh\n", 0o6755),
+                                 ("system/controlDict", b"FoamFile\n", 0o644)):
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mode = mode
+            archive.addfile(member, io.BytesIO(data))
+
+    result = service.extract_archive("study", archive_path)
+
+    active_run = tmp_path / "study" / "active_run"
+    assert sorted(result["files"]) == ["Allrun", "system/controlDict"]
+    assert mode_of(active_run / "Allrun") == 0o755
+    assert os.access(active_run / "Allrun", os.X_OK)
+    assert mode_of(active_run / "system" / "controlDict") == 0o644